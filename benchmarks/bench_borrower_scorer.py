@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк пакетной оценки заемщиков (borrower_scorer.py).
+
+Синтетический файл заявок (benchmarks/synthetic.make_leads_csv)
+оценивается с разным числом процессов; для каждого варианта - время,
+заявок в секунду и пик памяти процесса-обработчика блоков. Пик памяти
+ограничен окном блоков и не растет с размером файла.
+
+Запуск: python benchmarks/bench_borrower_scorer.py [--rows 1000000] [--workers 1,2,4] [--chunk-mb 16]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from borrower_scorer import score_file  # noqa: E402
+from synthetic import make_leads_csv  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, default=1_000_000)
+    arg_parser.add_argument('--workers', default='1,2,4', help='варианты числа процессов')
+    arg_parser.add_argument('--chunk-mb', type=float, default=16)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        leads = make_leads_csv(os.path.join(tmp_dir, 'leads.csv'), args.rows)
+        output = os.path.join(tmp_dir, 'scored.csv')
+        print(f"📊 {args.rows} заявок, {os.path.getsize(leads) / 1024 / 1024:.1f} МБ, "
+              f"блок {args.chunk_mb:g} МБ, ядер: {os.cpu_count()}\n")
+        print(f"   {'процессов':<12}{'время':>10}{'заявок/с':>14}{'пик памяти':>14}")
+        for workers in (int(value) for value in args.workers.split(',')):
+            start = time.perf_counter()
+            rows, _ = score_file(leads, output, workers, int(args.chunk_mb * (1 << 20)))
+            elapsed = time.perf_counter() - start
+            # Пик по процессу и всем завершенным дочерним (ru_maxrss - КБ)
+            peak = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF,
+                                                                     resource.RUSAGE_CHILDREN))
+            print(f"   {workers:<12}{elapsed:>8.2f} с{rows / elapsed:>14,.0f}{peak / 1024:>11.0f} МБ")
+
+
+if __name__ == "__main__":
+    main()
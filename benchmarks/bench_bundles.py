@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк шардов static_bundles.py против загрузки всего файла данных.
+
+Локальный HTTP сервер раздает каталог экспорта с задержкой --rtt на
+запрос и общим для всех соединений каналом --bandwidth (как у одного
+браузера), с gzip, как статический хостинг. Клиент повторяет
+services/profitabilityDataService.ts:
+- целиком: один запрос all_data_final.json, разбор, выборка диапазона
+- шарды: manifest.json, затем параллельно (до 6 соединений) шарды,
+  пересекающиеся с диапазоном и не встроенные в манифест
+
+Время до первого графика - от начала загрузки до готовых рядов
+диапазона. Для каждого диапазона меряется холодный запуск и переход
+к нему после диапазона по умолчанию (шарды уже в кэше клиента).
+--daily растягивает месячные ряды до рабочих дней (~22 точки в месяц),
+как будет с дневным уровнем данных.
+
+Запуск: python benchmarks/bench_bundles.py [--data public/data/all_data_final.json]
+        [--rtt 0.1] [--bandwidth 200000] [--daily]
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from static_bundles import MANIFEST_NAME, build_bundles, date_key, plan_fetch  # noqa: E402
+
+# Инструменты по умолчанию на странице доходности
+CODES = ['inflation', 'deposit_ruble_1', 'bonds_ofz', 'stock']
+RANGES = [
+    ('2024-06-01', '2025-05-31'),
+    ('2020-01-01', '2024-12-31'),
+    ('2000-01-01', '2024-10-31'),
+]
+BROWSER_CONNECTIONS = 6
+
+
+class Link:
+    """Общий канал: куски ответов всех соединений встают в одну очередь"""
+
+    def __init__(self, bandwidth):
+        self.bandwidth = bandwidth
+        self.busy_until = 0.0
+        self.lock = threading.Lock()
+        self.bytes_sent = 0
+        self.requests = 0
+
+    def send(self, wfile, data, chunk=16384):
+        for offset in range(0, len(data), chunk):
+            part = data[offset:offset + chunk]
+            with self.lock:
+                start = max(time.perf_counter(), self.busy_until)
+                self.busy_until = start + len(part) / self.bandwidth
+                finish = self.busy_until
+                self.bytes_sent += len(part)
+            time.sleep(max(0.0, finish - time.perf_counter()))
+            wfile.write(part)
+
+
+def make_handler(files, link, rtt):
+    """files: {путь URL: сжатое содержимое}"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(rtt)
+            body = files.get(self.path)
+            with link.lock:
+                link.requests += 1
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            link.send(self.wfile, body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def fetch_json(base_url, path):
+    with urlopen(Request(base_url + path)) as response:
+        return json.loads(gzip.decompress(response.read()))
+
+
+def iter_series(tools):
+    for tool in tools:
+        items = tool.get('items') or []
+        if items and 'date' in items[0]:
+            yield tool
+        elif items:
+            yield from iter_series(items)
+
+
+def expand_daily(main_data):
+    """Месячные ряды -> рабочие дни линейной интерполяцией между точками"""
+    for tool in iter_series(main_data['tools']):
+        keys = [date_key(item['date']) for item in tool['items']]
+        known = np.array(keys, dtype='datetime64[D]').astype(np.int64)
+        days = np.arange(known[0], known[-1] + 1)
+        days = days[(days + 3) % 7 < 5]
+        values = np.interp(days, known, [item['value'] for item in tool['items']])
+        iso = np.datetime_as_string(days.astype('datetime64[D]'), unit='D').tolist()
+        tool['items'] = [{"date": f"{d[8:10]}.{d[5:7]}.{d[0:4]}", "value": round(v, 2)}
+                         for d, v in zip(iso, values.tolist())]
+    return main_data
+
+
+def select_range(items, start, end):
+    return [item for item in items if start <= date_key(item['date']) <= end]
+
+
+class WholeFileClient:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.series = None
+
+    def query(self, start, end):
+        if self.series is None:
+            data = fetch_json(self.base_url, '/data/all_data_final.json')
+            self.series = {tool['code']: tool['items'] for tool in iter_series(data['tools'])}
+        return {code: select_range(self.series[code], start, end) for code in CODES}
+
+
+class ShardClient:
+    def __init__(self, base_url, pool):
+        self.base_url = base_url
+        self.pool = pool
+        self.manifest = None
+        self.shards = {}
+
+    def query(self, start, end):
+        if self.manifest is None:
+            self.manifest = fetch_json(self.base_url, f'/data/shards/{MANIFEST_NAME}')
+            for series in self.manifest['series'].values():
+                self.shards.update((shard['path'], shard) for shard in series['shards'] if 'items' in shard)
+        plan = [shard for shard in plan_fetch(self.manifest, CODES, start, end) if shard['path'] not in self.shards]
+        for shard, data in zip(plan, self.pool.map(
+                lambda shard: fetch_json(self.base_url, f"/data/shards/{shard['path']}"), plan)):
+            self.shards[shard['path']] = data
+        result = {}
+        for code in CODES:
+            items = []
+            for shard in self.manifest['series'][code]['shards']:
+                if shard['path'] in self.shards:
+                    items.extend(self.shards[shard['path']]['items'])
+            result[code] = select_range(items, start, end)
+        return result
+
+
+def run_case(client_factory, link, ranges):
+    """Время и байты до готовых рядов каждого из ranges подряд в одном клиенте"""
+    client = client_factory()
+    results = []
+    for start, end in ranges:
+        sent_before, requests_before = link.bytes_sent, link.requests
+        began = time.perf_counter()
+        result = client.query(start, end)
+        results.append((time.perf_counter() - began, link.bytes_sent - sent_before,
+                        link.requests - requests_before, result))
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--data', default='public/data/all_data_final.json')
+    arg_parser.add_argument('--rtt', type=float, default=0.1, help='задержка на запрос, с')
+    arg_parser.add_argument('--bandwidth', type=float, default=200_000, help='канал, байт/с (200000 ~ 1.6 Мбит/с)')
+    arg_parser.add_argument('--daily', action='store_true', help='ряды с дневным шагом')
+    args = arg_parser.parse_args()
+
+    with open(args.data, 'rb') as f:
+        raw = f.read()
+    main_data = json.loads(raw)
+    if args.daily:
+        main_data = expand_daily(main_data)
+        raw = json.dumps(main_data, ensure_ascii=False, indent=2).encode('utf-8')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_bundles(main_data, tmp_dir)
+        files = {'/data/all_data_final.json': gzip.compress(raw)}
+        for root, _, names in os.walk(tmp_dir):
+            for name in names:
+                path = os.path.relpath(os.path.join(root, name), tmp_dir).replace(os.sep, '/')
+                with open(os.path.join(root, name), 'rb') as f:
+                    files[f'/data/shards/{path}'] = gzip.compress(f.read())
+
+    link = Link(args.bandwidth)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(files, link, args.rtt))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    print(f"📦 {args.data}{' (дни)' if args.daily else ''}: {len(raw)} байт, gzip {len(files['/data/all_data_final.json'])} байт")
+    print(f"🌐 RTT {args.rtt * 1000:.0f} мс, канал {args.bandwidth / 1000:.0f} КБ/с, инструменты: {', '.join(CODES)}\n")
+    print(f"   {'диапазон':<24}{'вариант':<18}{'запросов':>9}{'байт (gzip)':>13}{'до графика':>12}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as pool:
+            for index, (start, end) in enumerate(RANGES):
+                # Холодный запуск и переход с диапазона по умолчанию
+                scenarios = [('холодный', [(start, end)])]
+                if index > 0:
+                    scenarios.append(('после 1-го', [RANGES[0], (start, end)]))
+                for label, ranges in scenarios:
+                    whole = run_case(lambda: WholeFileClient(base_url), link, ranges)[-1]
+                    sharded = run_case(lambda: ShardClient(base_url, pool), link, ranges)[-1]
+                    assert whole[3] == sharded[3], "шарды и целый файл дают разные ряды"
+                    for name, (elapsed, sent, requests, _) in (('целиком', whole), ('шарды', sharded)):
+                        print(f"   {start}..{end[2:]:<8} {name + ', ' + label:<18}{requests:>9}{sent:>13}"
+                              f"{elapsed * 1000:>9.0f} мс")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк дневного уровня данных: месячные ряды против дневных (~30x точек).
+
+Для каждого варианта хранения:
+- размер файла (JSON all_data_final.json, JSON по дням, daily_series f8/f4)
+- время загрузки
+- запрос диапазона (по умолчанию 01.06.2024 - 31.05.2025) с прореживанием
+  до месяцев и сериализацией ответа в JSON, как для графика
+
+Запуск: python benchmarks/bench_daily.py [--years 25] [--series 4] [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from daily_series import days_from_keys, load_daily, monthly_items, slice_range, write_daily  # noqa: E402
+
+CODES = ('stock', 'bonds_ofz', 'deposit_ruble_1', 'deposit_ruble_3', 'bonds_corporate', 'inflation')
+
+
+def make_daily(years, series_count, seed=0):
+    """Рабочие дни за years лет до 31.05.2025: индексы - случайное блуждание, ставки - около 10%"""
+    rng = np.random.default_rng(seed)
+    days = np.arange(np.datetime64('2025-06-01') - np.timedelta64(int(years * 365.25), 'D'),
+                     np.datetime64('2025-06-01')).astype(np.int64)
+    days = days[(days + 3) % 7 < 5]
+    series = {}
+    for code in CODES[:series_count]:
+        if code.startswith('deposit'):
+            values = 10 + np.cumsum(rng.normal(0, 0.02, len(days)))
+        else:
+            values = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(days))))
+        series[code] = (days, values)
+    return series
+
+
+def to_main_json(series, daily):
+    """Формат all_data_final.json: месячные точки или все дни"""
+    tools = []
+    for code, (days, values) in series.items():
+        if daily:
+            keys = np.datetime_as_string(days.astype('datetime64[D]'), unit='D').tolist()
+            items = [{"date": f"{k[8:10]}.{k[5:7]}.{k[0:4]}", "value": round(v, 2)}
+                     for k, v in zip(keys, values.tolist())]
+        else:
+            items = monthly_items(days, values, code=code)
+        tools.append({"name": code, "code": code, "sort": len(tools), "items": items})
+    return {"tools": tools}
+
+
+def json_range_query(main_data, start_key, end_key):
+    """Старый путь: фильтр по строковым датам в дереве JSON"""
+    start = (start_key[0:4], start_key[5:7], start_key[8:10])
+    end = (end_key[0:4], end_key[5:7], end_key[8:10])
+    result = {}
+    for tool in main_data['tools']:
+        items = []
+        for item in tool['items']:
+            date = item['date']
+            key = (date[6:10], date[3:5], date[0:2])
+            if start <= key <= end:
+                items.append(item)
+        result[tool['code']] = items
+    return json.dumps(result)
+
+
+def binary_range_query(series, start_day, end_day):
+    result = {}
+    for code, (days, values) in series.items():
+        days, values = slice_range(days, values, start_day, end_day)
+        result[code] = monthly_items(days, values, code=code)
+    return json.dumps(result)
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--years', type=float, default=25)
+    arg_parser.add_argument('--series', type=int, default=4, help=f'число рядов (до {len(CODES)})')
+    arg_parser.add_argument('--start', default='2024-06-01')
+    arg_parser.add_argument('--end', default='2025-05-31')
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    series = make_daily(args.years, args.series)
+    points = sum(len(days) for days, _ in series.values())
+    start_day, end_day = days_from_keys([args.start, args.end]).tolist()
+    print(f"📊 {len(series)} рядов, {points} дневных точек, диапазон {args.start} - {args.end}\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rows = []
+        for label, daily in (('JSON, месяцы', False), ('JSON, дни', True)):
+            path = os.path.join(tmp_dir, f"{'daily' if daily else 'monthly'}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(to_main_json(series, daily), f, ensure_ascii=False, indent=2)
+
+            def load(path=path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+
+            load_time, main_data = timed(load, max(1, args.repeat // 20))
+            query_time, _ = timed(lambda: json_range_query(main_data, args.start, args.end), args.repeat)
+            rows.append((label, os.path.getsize(path), load_time, query_time))
+
+        for label, dtype in (('daily_series, float64', '<f8'), ('daily_series, float32', '<f4')):
+            path = os.path.join(tmp_dir, f"daily{dtype[-1]}.bin")
+            size = write_daily(series, path, value_dtype=dtype)
+            load_time, loaded = timed(lambda path=path: load_daily(path), max(1, args.repeat // 20))
+            query_time, _ = timed(lambda: binary_range_query(loaded, start_day, end_day), args.repeat)
+            rows.append((label, size, load_time, query_time))
+
+    print(f"   {'хранение':<24}{'размер':>12}{'загрузка':>12}{'запрос':>12}")
+    for label, size, load_time, query_time in rows:
+        print(f"   {label:<24}{size / 1024:>9.0f} КБ{load_time * 1000:>9.2f} мс{query_time * 1000:>9.3f} мс")
+    monthly_query = rows[0][3]
+    print(f"\n✅ Запрос по дневному бинарному файлу: x{rows[2][3] / monthly_query:.2f} "
+          f"от месячного JSON, дневной JSON: x{rows[1][3] / monthly_query:.2f}")
+
+
+if __name__ == "__main__":
+    main()
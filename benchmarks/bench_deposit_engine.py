@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк пакетного расчета вкладов (deposit_engine.py).
+
+Случайные вклады в пределах полей калькулятора (сумма, ставка, срок до
+60 месяцев, любая капитализация):
+- quote_batch - итоги с полными графиками в матрицах, блоками CHUNK_SIZE;
+- построчно - тот же расчет по одному вкладу через iter_schedule, как
+  калькулятор строит график в браузере (на части вкладов).
+
+Запуск: python benchmarks/bench_deposit_engine.py [--deposits 1000000] [--loop 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from deposit_engine import MAX_AMOUNT, MAX_MONTHS, MAX_RATE, MIN_RATE, iter_schedule, quote_batch  # noqa: E402
+
+
+def make_deposits(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.integers(1, MAX_AMOUNT + 1, count).astype(np.float64),
+        np.round(rng.uniform(MIN_RATE, MAX_RATE, count), 2),
+        rng.integers(1, MAX_MONTHS + 1, count),
+        rng.choice([0, 1, 3, 12], count),
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--deposits', type=int, default=1_000_000)
+    arg_parser.add_argument('--loop', type=int, default=20_000, help='вкладов для построчного расчета')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    amounts, rates, months, periods = make_deposits(args.deposits)
+    print(f"📊 {args.deposits} вкладов, построчно - первые {args.loop}\n")
+
+    best = min(_timed(lambda: quote_batch(amounts, rates, months, periods)) for _ in range(args.repeat))
+
+    def loop():
+        for i in range(args.loop):
+            for _ in iter_schedule(amounts[i], rates[i], int(months[i]), int(periods[i]), '01.01.2025'):
+                pass
+
+    loop_time = _timed(loop)
+    batch_rate = args.deposits / best
+    loop_rate = args.loop / loop_time
+    print(f"   {'вариант':<16}{'время':>12}{'вкладов/с':>14}")
+    print(f"   {'quote_batch':<16}{best * 1000:>9.0f} мс{batch_rate:>14,.0f}")
+    print(f"   {'построчно':<16}{loop_time * 1000:>9.0f} мс{loop_rate:>14,.0f}")
+    print(f"\n✅ Пакетный расчет быстрее построчного в {batch_rate / loop_rate:.0f} раз")
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
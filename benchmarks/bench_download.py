@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк скачивания Excel файлов RealDepositsParser на локальном HTTP сервере.
+
+Сравниваем:
+1. Старый последовательный цикл (GET + time.sleep(1) после каждого файла)
+2. Новый параллельный режим download_excel_files (холодный запуск)
+3. Повторный запуск с условными GET (файлы не изменились -> 304)
+4. Повторный запуск из свежего кэша data/http_cache (без сети)
+5. Офлайн-режим: поиск ссылок и скачивание только из кэша
+
+Запуск: python benchmarks/bench_download.py [--latency 0.2] [--size 2000000]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from http_cache import HttpCache  # noqa: E402
+from real_deposits_parser import RealDepositsParser  # noqa: E402
+
+INDEX_PAGE = ('<html><body>' + '<p>Статистика</p>' * 2000 +
+              '<a href="deposit_rates.xlsx">Ставки</a><a href="/other.pdf">PDF</a>'
+              '</body></html>').encode('utf-8')
+
+
+def make_handler(payload, latency):
+    """Обработчик, имитирующий сервер ЦБ: задержка, ETag, Range"""
+    etag = '"%s"' % hashlib.md5(payload).hexdigest()
+    last_modified = 'Mon, 02 Jun 2025 10:00:00 GMT'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        requests_served = 0
+
+        def do_GET(self):
+            Handler.requests_served += 1
+            time.sleep(latency)
+            if self.path.endswith('/'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(INDEX_PAGE)))
+                self.end_headers()
+                self.wfile.write(INDEX_PAGE)
+                return
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            body = payload
+            status = 200
+            range_header = self.headers.get('Range')
+            if range_header and range_header.startswith('bytes='):
+                start = int(range_header[6:].split('-')[0])
+                body = payload[start:]
+                status = 206
+
+            self.send_response(status)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def legacy_serial_download(session, urls, data_dir, pause):
+    """Копия старого цикла download_excel_files"""
+    downloaded_files = []
+    for url in urls:
+        response = session.get(url, timeout=30)
+        if response.status_code == 200:
+            filepath = os.path.join(data_dir, url.split('/')[-1])
+            with open(filepath, 'wb') as f:
+                f.write(response.content)
+            downloaded_files.append(filepath)
+        time.sleep(pause)
+    return downloaded_files
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--latency', type=float, default=0.2, help='задержка ответа сервера, с')
+    arg_parser.add_argument('--size', type=int, default=2_000_000, help='размер файла, байт')
+    arg_parser.add_argument('--workers', type=int, default=8, help='число потоков скачивания')
+    arg_parser.add_argument('--legacy-pause', type=float, default=1.0, help='пауза в старом цикле, с')
+    args = arg_parser.parse_args()
+
+    payload = os.urandom(args.size)
+    handler = make_handler(payload, args.latency)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+
+        # ttl=0: кэш не считается свежим, повторный запуск идет условными GET
+        parser = RealDepositsParser(max_workers=args.workers, cache=HttpCache('http_cache_304', ttl=0))
+        parser.base_url = base_url
+        urls = parser.get_excel_urls()
+
+        legacy_dir = os.path.join(tmp_dir, 'legacy')
+        os.makedirs(legacy_dir)
+        start = time.perf_counter()
+        legacy_serial_download(parser.session, urls, legacy_dir, args.legacy_pause)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        files = parser.download_excel_files(urls)
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser.download_excel_files(urls)
+        warm_time = time.perf_counter() - start
+
+        # Кэш с явным TTL (--cache-ttl 24): холодный прогон заполняет его, следующие идут без сети
+        parser = RealDepositsParser(max_workers=args.workers, cache=HttpCache(ttl=24 * 3600))
+        parser.base_url = base_url
+        parser.find_real_excel_urls()
+        parser.download_excel_files(urls)
+
+        served = handler.requests_served
+        start = time.perf_counter()
+        parser = RealDepositsParser(max_workers=args.workers, cache=HttpCache(ttl=24 * 3600))
+        parser.base_url = base_url
+        parser.find_real_excel_urls()
+        parser.download_excel_files(urls)
+        cached_time = time.perf_counter() - start
+        cached_report = parser.cache.report()
+
+        start = time.perf_counter()
+        parser = RealDepositsParser(max_workers=args.workers, offline=True)
+        parser.base_url = base_url
+        offline_urls = parser.find_real_excel_urls()
+        offline_files = parser.download_excel_files(urls)
+        offline_time = time.perf_counter() - start
+        network_requests = handler.requests_served - served
+
+    server.shutdown()
+
+    print("\n" + "=" * 60)
+    print(f"📊 Файлов: {len(files)} x {args.size} байт, задержка {args.latency} с")
+    print(f"   Старый последовательный цикл: {legacy_time:.2f} с")
+    print(f"   Параллельный ({args.workers} потоков):  {cold_time:.2f} с "
+          f"(x{legacy_time / cold_time:.1f})")
+    print(f"   Повторный запуск (304):       {warm_time:.2f} с")
+    print(f"   Повторный запуск (кэш):       {cached_time:.2f} с, {cached_report}")
+    print(f"   Офлайн из кэша:               {offline_time:.2f} с, "
+          f"{len(offline_urls)} ссылок, {len(offline_files)} файлов")
+    print(f"   Запросов к серверу после заполнения кэша: {network_requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк полного и инкрементального разбора инфляции на синтетической
+книге Росстата за 30 лет.
+
+Запуск: python benchmarks/bench_inflation.py [--years 30]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import inflation_parser  # noqa: E402
+from synthetic import make_cpi_workbook  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--years', type=int, default=30)
+    arg_parser.add_argument('--regions', type=int, default=1, help='число блоков месяцев (региональный лист)')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        path = os.path.join(tmp_dir, 'ipc.xlsx')
+
+        # Месяц N: полный разбор
+        make_cpi_workbook(path, years=args.years, last_month=4, regions=args.regions)
+        full, full_time = timed(inflation_parser.parse_inflation_data, path)
+
+        # Тот же файл: инкрементальный режим ничего не читает
+        _, same_time = timed(inflation_parser.parse_inflation_incremental, path)
+
+        # Месяц N+1: появилась одна новая ячейка
+        make_cpi_workbook(path, years=args.years, last_month=5, regions=args.regions)
+        incremental, inc_time = timed(inflation_parser.parse_inflation_incremental, path)
+
+        # Контроль: совпадает с полным разбором новой книги
+        reference, ref_time = timed(inflation_parser.parse_inflation_data, path)
+        assert incremental == reference, "Инкрементальный результат расходится с полным"
+
+    print(f"📊 Синтетическая книга: {args.years} лет, {args.regions} блок(ов), {len(reference)} точек")
+    print(f"   Полный разбор (pandas):         {full_time * 1000:.1f} мс")
+    print(f"   Инкремент, файл не изменился:   {same_time * 1000:.1f} мс")
+    print(f"   Инкремент, +1 месяц:            {inc_time * 1000:.1f} мс")
+    print(f"   Полный разбор новой книги:      {ref_time * 1000:.1f} мс")
+    print(f"   Точек до/после: {len(full)} -> {len(incremental)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк интерполяции ставок: старый interpolate_rates (сортировка и
+strptime на каждый месяц) против RateInterpolationIndex на месячной и
+дневной сетке с расширенным набором сроков.
+
+Запуск: python benchmarks/bench_interpolation.py [--points 300] [--buckets 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from real_deposits_parser import RateInterpolationIndex, month_keys  # noqa: E402
+
+
+def legacy_interpolate_rates(target_date, known_points, fmt="%Y-%m"):
+    """Копия старого RealDepositsParser.interpolate_rates"""
+    target_dt = datetime.strptime(target_date, fmt)
+    before_point = None
+    after_point = None
+    for date_str, values in sorted(known_points.items()):
+        point_dt = datetime.strptime(date_str, fmt)
+        if point_dt <= target_dt:
+            before_point = (point_dt, values)
+        elif point_dt > target_dt and after_point is None:
+            after_point = (point_dt, values)
+            break
+    if before_point and after_point:
+        before_dt, before_values = before_point
+        after_dt, after_values = after_point
+        total_days = (after_dt - before_dt).days
+        current_days = (target_dt - before_dt).days
+        ratio = current_days / total_days if total_days > 0 else 0
+        return {key: round(before_values[key] + (after_values[key] - before_values[key]) * ratio, 2)
+                for key in before_values}
+    return (before_point or after_point)[1].copy()
+
+
+def make_points(keys, buckets, count, seed=0):
+    rng = random.Random(seed)
+    chosen = sorted(rng.sample(keys, min(count, len(keys))))
+    return {key: {bucket: round(rng.uniform(3, 25), 2) for bucket in buckets} for key in chosen}
+
+
+def bench(label, keys, points, fmt, repeat_legacy=True):
+    index_start = time.perf_counter()
+    index = RateInterpolationIndex(points)
+    result = index.interpolate_dict(keys)
+    index_time = time.perf_counter() - index_start
+
+    legacy_time = None
+    if repeat_legacy:
+        start = time.perf_counter()
+        legacy = {key: legacy_interpolate_rates(key, points, fmt) for key in keys}
+        legacy_time = time.perf_counter() - start
+        assert legacy == result, "Результаты индекса и старой интерполяции расходятся"
+
+    legacy_info = f"{legacy_time * 1000:9.1f} мс" if legacy_time is not None else "        -"
+    speedup = f"x{legacy_time / index_time:.0f}" if legacy_time else ""
+    print(f"   {label:<28}{len(keys):>8} дат {legacy_info}  ->  {index_time * 1000:7.1f} мс  {speedup}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--points', type=int, default=300, help='число известных точек')
+    arg_parser.add_argument('--buckets', type=int, default=8, help='число сроков')
+    args = arg_parser.parse_args()
+
+    print("📊 старый interpolate_rates -> RateInterpolationIndex")
+
+    months = month_keys(2000, 1, 2025, 12)
+    base_buckets = ["<1", "1-3", ">3"]
+    bench("месяцы, 3 срока", months, make_points(months, base_buckets, 28), "%Y-%m")
+
+    buckets = [f"term_{k}" for k in range(args.buckets)]
+    bench(f"месяцы, {args.buckets} сроков", months,
+          make_points(months, buckets, args.points), "%Y-%m")
+
+    first = date(2000, 1, 1)
+    days = [(first + timedelta(days=k)).isoformat() for k in range((date(2025, 12, 31) - first).days + 1)]
+    bench(f"дни, {args.buckets} сроков", days,
+          make_points(days, buckets, args.points), "%Y-%m-%d")
+
+    for method in RateInterpolationIndex.METHODS:
+        index = RateInterpolationIndex(make_points(days, buckets, args.points))
+        ordinals = [date_ordinal for date_ordinal in range(first.toordinal(), first.toordinal() + len(days))]
+        start = time.perf_counter()
+        index.interpolate(ordinals, method)
+        print(f"   матрица {method:<8} (дни): {(time.perf_counter() - start) * 1000:7.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк моделирования monte_carlo.py.
+
+Для числа путей 10^5 и 10^6 и разного числа процессов - время расчета
+и путей в секунду; затем повторный запрос тех же параметров из кэша
+в памяти и на диске. Проверяется, что число процессов не меняет
+результат.
+
+Запуск: python benchmarks/bench_monte_carlo.py [--data public/data/all_data_final.json]
+        [--paths 100000,1000000] [--workers 1,4] [--horizon 36]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import monte_carlo  # noqa: E402
+from monte_carlo import parse_mix, run_simulation, simulate  # noqa: E402
+from return_tables import build_return_tables  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--data', default='public/data/all_data_final.json')
+    arg_parser.add_argument('--mix', default='stock:0.5,bonds_ofz:0.3,deposit_ruble_1:0.2')
+    arg_parser.add_argument('--paths', default='100000,1000000')
+    arg_parser.add_argument('--workers', default='1,4')
+    arg_parser.add_argument('--horizon', type=int, default=36)
+    arg_parser.add_argument('--shards', type=int, default=16)
+    args = arg_parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        tables = build_return_tables(json.load(f))
+    weights = parse_mix(args.mix)
+    print(f"🎲 {args.mix}, горизонт {args.horizon} мес., частей {args.shards}, ядер: {os.cpu_count()}\n")
+    print(f"   {'путей':<10}{'процессов':>10}{'время':>10}{'путей/с':>14}")
+
+    for paths in (int(value) for value in args.paths.split(',')):
+        reference = None
+        for workers in (int(value) for value in args.workers.split(',')):
+            start = time.perf_counter()
+            result = simulate(tables, weights, args.horizon, paths, shards=args.shards, workers=workers)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = result
+            assert result == reference, "результат зависит от числа процессов"
+            print(f"   {paths:<10}{workers:>10}{elapsed:>8.2f} с{paths / elapsed:>14,.0f}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        paths = int(args.paths.split(',')[0])
+        print()
+        for attempt in ('первый запрос', 'повтор', 'повтор, новый процесс'):
+            if attempt.endswith('новый процесс'):
+                monte_carlo._memory_cache.clear()
+            start = time.perf_counter()
+            _, source = run_simulation(args.data, weights, args.horizon, paths, shards=args.shards,
+                                       cache_dir=cache_dir)
+            print(f"   {attempt:<24}{source:>10}{(time.perf_counter() - start) * 1000:>10.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
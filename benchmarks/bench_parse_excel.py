@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк парсинга книг ЦБ: старый pd.read_excel(sheet_name=None) против
+потокового RealDepositsParser.parse_excel_files. Для каждого файла
+выводим время и пик памяти (tracemalloc).
+
+Запуск: python benchmarks/bench_parse_excel.py [--files 3] [--rows 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from real_deposits_parser import RealDepositsParser  # noqa: E402
+from synthetic import make_deposit_workbook  # noqa: E402
+
+
+def legacy_parse(filepath):
+    """Копия старого parse_excel_files для одного файла"""
+    all_data = {}
+    df = pd.read_excel(filepath, sheet_name=None)
+    for sheet_name, sheet_data in df.items():
+        for col in sheet_data.columns:
+            if any(keyword in str(col).lower() for keyword in RealDepositsParser.DEPOSIT_KEYWORDS):
+                data_values = sheet_data[col].dropna()
+                if not data_values.empty:
+                    all_data[f"{os.path.basename(filepath)}_{sheet_name}_{col}"] = data_values.tolist()
+    return all_data
+
+
+def streaming_parse(parser, filepath):
+    return {
+        f"{filename}_{sheet}_{col}": values
+        for filename, sheet, col, values in parser.parse_excel_files([filepath], track_memory=False)
+    }
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--files', type=int, default=3)
+    arg_parser.add_argument('--rows', type=int, default=2000)
+    arg_parser.add_argument('--filler-columns', type=int, default=40)
+    args = arg_parser.parse_args()
+
+    parser = RealDepositsParser.__new__(RealDepositsParser)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'файл':<16}{'pandas, с':>12}{'МБ':>9}{'поток, с':>12}{'МБ':>9}")
+        for file_idx in range(args.files):
+            path = os.path.join(tmp_dir, f'bulletin_{file_idx}.xlsx')
+            make_deposit_workbook(path, rows=args.rows, filler_columns=args.filler_columns, seed=file_idx)
+
+            legacy, legacy_time, legacy_peak = measure(legacy_parse, path)
+            streamed, stream_time, stream_peak = measure(streaming_parse, parser, path)
+            assert legacy == streamed, "Результаты pandas и потокового парсера расходятся"
+
+            print(f"{os.path.basename(path):<16}{legacy_time:>12.2f}{legacy_peak:>9.1f}"
+                  f"{stream_time:>12.2f}{stream_peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
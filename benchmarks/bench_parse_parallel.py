@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк масштабирования RealDepositsParser.parse_excel_files по числу
+процессов (1..N) на наборе сгенерированных книг. Один файл намеренно
+битый: он должен попасть в лог как ошибка, не прерывая пакет.
+
+Запуск: python benchmarks/bench_parse_parallel.py [--files 8] [--max-workers 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from real_deposits_parser import RealDepositsParser  # noqa: E402
+from synthetic import make_deposit_workbook  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--files', type=int, default=8)
+    arg_parser.add_argument('--rows', type=int, default=1000)
+    arg_parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = arg_parser.parse_args()
+
+    parser = RealDepositsParser.__new__(RealDepositsParser)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = []
+        for file_idx in range(args.files):
+            path = os.path.join(tmp_dir, f'deposit_{2010 + file_idx}.xlsx')
+            make_deposit_workbook(path, rows=args.rows, seed=file_idx)
+            files.append(path)
+        broken = os.path.join(tmp_dir, 'broken.xlsx')
+        with open(broken, 'wb') as f:
+            f.write(b'not a workbook')
+        files.insert(len(files) // 2, broken)
+
+        print(f"📊 {args.files} книг по {args.rows} строк + 1 битый файл")
+        reference = None
+        base_time = None
+        workers = 1
+        while workers <= args.max_workers:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                records = list(parser.parse_excel_files(files, track_memory=False, workers=workers))
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference, base_time = records, elapsed
+            assert records == reference, "Порядок или состав записей зависит от числа процессов"
+            print(f"   workers={workers:<3} {elapsed:6.2f} с  x{base_time / elapsed:.2f}  записей: {len(records)}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
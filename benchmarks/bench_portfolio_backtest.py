@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк бэктеста сетки портфелей (portfolio_backtest.py).
+
+Для сеток от 10^3 до 10^5 случайных портфелей и каждого режима
+ребалансировки - время полного расчета всей истории, портфелей и
+портфеле-месяцев в секунду. Затем досчет: состояние по данным без
+последнего месяца сохраняется, загружается и продолжается полными
+данными; время сравнивается с расчетом с начала, результаты должны
+совпасть побитно.
+
+Запуск: python benchmarks/bench_portfolio_backtest.py [--data public/data/all_data_final.json]
+        [--portfolios 1000,10000,100000] [--codes stock,bonds_ofz,bonds_corporate,deposit_ruble_1]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from portfolio_backtest import (REBALANCE_MONTHS, PortfolioBacktest, aligned_prefixes, random_weights,  # noqa: E402
+                                resume_or_run)
+from return_tables import build_return_tables, month_key, month_key_to_ordinal  # noqa: E402
+
+
+def drop_last_month(tables, codes):
+    """Таблицы, какими они были месяцем раньше: ряды обрезаны до месяца перед последним общим"""
+    end = month_key_to_ordinal(aligned_prefixes(tables, codes)[2]) - 1
+    previous = copy.deepcopy(tables)
+    previous['end'] = month_key(end)
+    last = end - month_key_to_ordinal(tables['start'])
+    for table in previous['instruments'].values():
+        del table['prefix'][max(last - table['offset'] + 1, 0):]
+        if table['present'] is not None:
+            del table['present'][max(last - table['offset'] + 1, 0):]
+    return previous
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--data', default='public/data/all_data_final.json')
+    arg_parser.add_argument('--codes', default='stock,bonds_ofz,bonds_corporate,deposit_ruble_1')
+    arg_parser.add_argument('--portfolios', default='1000,10000,100000')
+    arg_parser.add_argument('--contribution', type=float, default=10_000)
+    args = arg_parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        tables = build_return_tables(json.load(f))
+    codes = args.codes.split(',')
+    print(f"📈 {', '.join(codes)}, взнос {args.contribution:,.0f} в месяц\n")
+    print(f"   {'портфелей':<12}{'ребалансировка':<16}{'месяцев':>8}{'время':>12}{'портфелей/с':>14}"
+          f"{'портфеле-мес./с':>18}")
+
+    for portfolios in (int(value) for value in args.portfolios.split(',')):
+        weights = random_weights(portfolios, len(codes))
+        for name, months in REBALANCE_MONTHS.items():
+            start = time.perf_counter()
+            backtest = PortfolioBacktest.from_tables(tables, codes, weights, contribution=args.contribution,
+                                                     rebalance=months)
+            elapsed = time.perf_counter() - start
+            print(f"   {portfolios:<12}{name:<16}{backtest.months:>8}{elapsed * 1000:>9.0f} мс"
+                  f"{portfolios / elapsed:>14,.0f}{portfolios * backtest.months / elapsed:>18,.0f}")
+
+    portfolios = int(args.portfolios.split(',')[-1])
+    weights = random_weights(portfolios, len(codes))
+    previous = drop_last_month(tables, codes)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_path = os.path.join(tmp_dir, 'state.npz')
+        resume_or_run(previous, codes, weights, contribution=args.contribution, rebalance=12)[0].save(state_path)
+
+        start = time.perf_counter()
+        resumed, added, source = resume_or_run(tables, codes, weights, contribution=args.contribution,
+                                               rebalance=12, state_path=state_path)
+        resume_time = time.perf_counter() - start
+        start = time.perf_counter()
+        replayed = PortfolioBacktest.from_tables(tables, codes, weights, contribution=args.contribution, rebalance=12)
+        replay_time = time.perf_counter() - start
+
+    assert source == 'resumed' and added == 1, "состояние не продолжено"
+    expected, actual = replayed.results(), resumed.results()
+    assert all(np.array_equal(expected[name], actual[name]) for name in expected), "досчет расходится с расчетом"
+    print(f"\n   {portfolios} портфелей, новый месяц {resumed.last_month}:")
+    print(f"   {'с начала':<24}{replay_time * 1000:>9.0f} мс")
+    print(f"   {'загрузка и досчет':<24}{resume_time * 1000:>9.0f} мс")
+    print(f"\n✅ Досчет совпадает с расчетом с начала и быстрее в {replay_time / resume_time:.0f} раз")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env node
+// Сравнение текущей схемы (ряды из /api/profitability-data, расчет на клиенте)
+// с /api/profitability-compute (расчет на сервере, в ответе только итоги и график).
+//
+// Запуск (при запущенном `npm run dev` или `next start`):
+//   node benchmarks/bench_profitability_compute.mjs --base http://localhost:3000 --repeat 200
+//
+// Для каждого типового диапазона: размер ответа (несжатый и gzip), задержка
+// p50/p95 обеих схем и повторный запрос compute с If-None-Match (ожидается 304).
+
+import { gzipSync } from 'node:zlib';
+
+const args = Object.fromEntries(
+  process.argv.slice(2).reduce((pairs, arg, i, all) => {
+    if (arg.startsWith('--')) pairs.push([arg.slice(2), all[i + 1]]);
+    return pairs;
+  }, [])
+);
+
+const base = args.base || 'http://localhost:3000';
+const repeat = parseInt(args.repeat || '200');
+
+const cases = [
+  ['2024-06-01', '2025-05-31'],
+  ['2020-01-01', '2024-12-31'],
+  ['2000-01-01', '2024-10-31'],
+].map(([startDate, endDate]) => ({
+  startDate,
+  endDate,
+  instruments: ['deposits', 'bonds', 'stocks'],
+  depositTerm: 'less_than_1_year',
+  bondType: 'ofz',
+}));
+
+const rawRequest = (query) => fetch(`${base}/api/profitability-data`, {
+  method: 'POST',
+  headers: { 'Content-Type': 'application/json' },
+  body: JSON.stringify({ ...query, instruments: [...query.instruments, 'inflation'] }),
+});
+
+const computeUrl = (query) => `${base}/api/profitability-compute?${new URLSearchParams({
+  startDate: query.startDate,
+  endDate: query.endDate,
+  instruments: query.instruments.join(','),
+  depositTerm: query.depositTerm,
+  bondType: query.bondType,
+  amount: '100000',
+  inflation: '1',
+})}`;
+
+const computeRequest = (query, etag) =>
+  fetch(computeUrl(query), etag ? { headers: { 'If-None-Match': etag } } : undefined);
+
+const measure = async (request) => {
+  const latencies = [];
+  let body = null;
+  let response = null;
+  for (let i = 0; i < repeat; i += 1) {
+    const start = performance.now();
+    response = await request();
+    body = Buffer.from(await response.arrayBuffer());
+    latencies.push(performance.now() - start);
+  }
+  latencies.sort((a, b) => a - b);
+  const percentile = (p) => latencies[Math.min(latencies.length - 1, Math.floor(latencies.length * p))];
+  return { body, response, p50: percentile(0.5), p95: percentile(0.95) };
+};
+
+const row = (label, { body, response, p50, p95 }) => {
+  const size = body.length;
+  const gzipped = size > 0 ? gzipSync(body).length : 0;
+  console.log(`   ${label.padEnd(22)}${String(response.status).padStart(6)}${String(size).padStart(10)}` +
+    `${String(gzipped).padStart(10)}${p50.toFixed(2).padStart(10)}${p95.toFixed(2).padStart(10)}`);
+};
+
+console.log(`📊 ${base}, повторов на случай: ${repeat}`);
+console.log(`   ${'схема'.padEnd(22)}${'код'.padStart(6)}${'байт'.padStart(10)}${'gzip'.padStart(10)}` +
+  `${'p50, мс'.padStart(10)}${'p95, мс'.padStart(10)}`);
+
+for (const query of cases) {
+  console.log(`\n   ${query.startDate}..${query.endDate}`);
+  row('ряды (data)', await measure(() => rawRequest(query)));
+  const computed = await measure(() => computeRequest(query));
+  row('расчет (compute)', computed);
+  const etag = computed.response.headers.get('etag');
+  if (etag) {
+    row('compute, If-None-Match', await measure(() => computeRequest(query, etag)));
+  } else {
+    console.log('   ⚠️ compute без ETag');
+  }
+}
@@ -0,0 +1,115 @@
+#!/usr/bin/env node
+// Эталонные расчеты калькулятора вкладов для verify_deposit_engine.py.
+//
+// hooks/useDepositCalculator.ts транслируется пакетом typescript (devDependency)
+// и выполняется с подмененным react: useState отдает заданные значения полей,
+// useEffect выполняется сразу, результат читается из вызовов сеттеров.
+// Так эталон - это сам код хука, а не его пересказ.
+//
+// Запуск (после npm install):
+//   node benchmarks/golden_deposits.mjs [--output benchmarks/golden/deposits.json]
+
+import { mkdirSync, readFileSync, writeFileSync } from 'node:fs';
+import { createRequire } from 'node:module';
+import { dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const args = Object.fromEntries(
+  process.argv.slice(2).reduce((pairs, arg, i, all) => {
+    if (arg.startsWith('--')) pairs.push([arg.slice(2), all[i + 1]]);
+    return pairs;
+  }, [])
+);
+
+const root = join(dirname(fileURLToPath(import.meta.url)), '..');
+const output = args.output || join(root, 'benchmarks', 'golden', 'deposits.json');
+const require = createRequire(join(root, 'package.json'));
+const ts = require('typescript');
+
+// Порядок useState в useDepositCalculator: amount, term, periodType, rate,
+// startDate, isCapitalized, capitalizationPeriod, total, profit, effectiveRate,
+// schedule, totalInterest, isVisible, errors
+const STATE = { amount: 0, term: 1, periodType: 2, rate: 3, startDate: 4, isCapitalized: 5,
+  capitalizationPeriod: 6, total: 7, profit: 8, effectiveRate: 9, schedule: 10, totalInterest: 11 };
+
+const loadHook = () => {
+  const source = readFileSync(join(root, 'hooks', 'useDepositCalculator.ts'), 'utf8');
+  const { outputText } = ts.transpileModule(source, {
+    compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+  });
+  let overrides = {};
+  let captured = {};
+  let index = 0;
+  const react = {
+    useState: (initial) => {
+      const slot = index++;
+      const value = slot in overrides ? overrides[slot] : initial;
+      return [value, (next) => { captured[slot] = typeof next === 'function' ? next(value) : next; }];
+    },
+    useEffect: (effect) => effect(),
+  };
+  const module = { exports: {} };
+  new Function('require', 'module', 'exports', outputText)(
+    (name) => (name === 'react' ? react : require(name)), module, module.exports
+  );
+  const quiet = console.log;
+  return (inputs) => {
+    overrides = inputs;
+    captured = {};
+    index = 0;
+    console.log = () => {};
+    try {
+      module.exports.useDepositCalculator();
+    } finally {
+      console.log = quiet;
+    }
+    return captured;
+  };
+};
+
+// Сетка: суммы x ставки x сроки x капитализация, дата открытия по кругу
+// (в том числе 31-е число и 29 февраля - переполнение setMonth)
+const amounts = [1, 150000, 10000000];
+const rates = ['0.01', '5.00', '12.5', '21', '50'];
+const terms = [1, 2, 3, 4, 5, 6, 11, 12, 13, 18, 24, 35, 36, 60];
+const periods = [null, 'monthly', 'quarterly', 'yearly'];
+const startDates = [[2024, 0, 31], [2024, 1, 29], [2023, 7, 31], [2025, 4, 15], [2024, 11, 1]];
+
+const run = loadHook();
+const cases = [];
+for (const amount of amounts) {
+  for (const rate of rates) {
+    for (const months of terms) {
+      for (const period of periods) {
+        const [year, month, day] = startDates[cases.length % startDates.length];
+        const captured = run({
+          [STATE.amount]: String(amount),
+          [STATE.term]: String(months),
+          [STATE.periodType]: 'month',
+          [STATE.rate]: rate,
+          [STATE.startDate]: new Date(year, month, day),
+          [STATE.isCapitalized]: period !== null,
+          [STATE.capitalizationPeriod]: period,
+        });
+        cases.push({
+          amount,
+          rate: Number(rate),
+          months,
+          capitalization: period || 'none',
+          start_date: new Date(year, month, day).toLocaleDateString('ru-RU'),
+          total: captured[STATE.total],
+          profit: captured[STATE.profit],
+          effective_rate: captured[STATE.effectiveRate],
+          total_interest: captured[STATE.totalInterest],
+          // Строка графика: [дата, начисление, остаток, капитализация]
+          schedule: captured[STATE.schedule].map((item) =>
+            [item.date, item.interest, item.balance, item.isCapitalization ? 1 : 0]),
+        });
+      }
+    }
+  }
+}
+
+mkdirSync(dirname(output), { recursive: true });
+writeFileSync(output, JSON.stringify({ source: 'hooks/useDepositCalculator.ts', cases }));
+console.log(`✅ ${cases.length} эталонных вкладов -> ${output}`);
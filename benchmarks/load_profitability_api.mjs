@@ -0,0 +1,87 @@
+#!/usr/bin/env node
+// Нагрузочный тест /api/profitability-data при высокой частоте запросов.
+//
+// Запуск (при запущенном `npm run dev` или `next start`):
+//   node benchmarks/load_profitability_api.mjs --url http://localhost:3000/api/profitability-data \
+//     --requests 20000 --concurrency 64
+//
+// Смесь запросов: типовые диапазоны (повторяются, попадают в кэш ответов)
+// и случайные диапазоны (проверяют сам индекс). Выводит RPS и перцентили.
+
+const args = Object.fromEntries(
+  process.argv.slice(2).reduce((pairs, arg, i, all) => {
+    if (arg.startsWith('--')) pairs.push([arg.slice(2), all[i + 1]]);
+    return pairs;
+  }, [])
+);
+
+const url = args.url || 'http://localhost:3000/api/profitability-data';
+const totalRequests = parseInt(args.requests || '20000');
+const concurrency = parseInt(args.concurrency || '64');
+const randomShare = parseFloat(args.random || '0.5');
+
+const pad = (n) => String(n).padStart(2, '0');
+const lastDay = (year, month) => new Date(Date.UTC(year, month, 0)).getUTCDate();
+
+const typicalBodies = [
+  ['2024-06-01', '2025-05-31'],
+  ['2020-01-01', '2024-12-31'],
+  ['2000-01-01', '2024-10-31'],
+].map(([startDate, endDate]) => ({
+  startDate,
+  endDate,
+  instruments: ['inflation', 'deposits', 'bonds', 'stocks'],
+  depositTerm: 'less_than_1_year',
+  bondType: 'ofz',
+}));
+
+const randomBody = () => {
+  const startYear = 2000 + Math.floor(Math.random() * 24);
+  const startMonth = 1 + Math.floor(Math.random() * 12);
+  const endYear = startYear + 1 + Math.floor(Math.random() * (2025 - startYear));
+  const endMonth = 1 + Math.floor(Math.random() * 12);
+  return {
+    startDate: `${startYear}-${pad(startMonth)}-01`,
+    endDate: `${endYear}-${pad(endMonth)}-${pad(lastDay(endYear, endMonth))}`,
+    instruments: ['inflation', 'deposits', 'bonds', 'stocks'],
+    depositTerm: ['less_than_1_year', '1_to_3_years', 'more_than_3_years'][Math.floor(Math.random() * 3)],
+    bondType: ['ofz', 'corporate'][Math.floor(Math.random() * 2)],
+  };
+};
+
+const latencies = [];
+let failures = 0;
+let issued = 0;
+
+const worker = async () => {
+  while (issued < totalRequests) {
+    issued += 1;
+    const body = Math.random() < randomShare
+      ? randomBody()
+      : typicalBodies[Math.floor(Math.random() * typicalBodies.length)];
+    const start = performance.now();
+    try {
+      const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body),
+      });
+      await response.arrayBuffer();
+      if (!response.ok) failures += 1;
+    } catch (error) {
+      failures += 1;
+    }
+    latencies.push(performance.now() - start);
+  }
+};
+
+const started = performance.now();
+await Promise.all(Array.from({ length: concurrency }, worker));
+const elapsed = (performance.now() - started) / 1000;
+
+latencies.sort((a, b) => a - b);
+const percentile = (p) => latencies[Math.min(latencies.length - 1, Math.floor(latencies.length * p))].toFixed(2);
+
+console.log(`📊 ${totalRequests} запросов, параллельно ${concurrency}, случайных ${randomShare * 100}%`);
+console.log(`   RPS: ${(totalRequests / elapsed).toFixed(0)}, ошибок: ${failures}`);
+console.log(`   Задержка, мс: p50 ${percentile(0.5)}  p95 ${percentile(0.95)}  p99 ${percentile(0.99)}`);
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Набор бенчмарков Python-конвейера на синтетических данных нескольких масштабов.
+
+Этапы:
+- inflation_parse - parse_inflation_data на книге Росстата (лет x регионов)
+- deposits_parse  - RealDepositsParser.parse_excel_files на книгах ЦБ
+- moex_convert    - convert_moex_to_accumulated_format на рядах 10^3..~10^5 месяцев с 2000 года
+
+Каждый замер повторяется --repeat раз, в зачет идет лучшее время.
+Результаты сравниваются с benchmarks/baseline.json: замедление больше
+--tolerance (и больше --min-delta по абсолютному времени) считается
+регрессией, код выхода 1. Другой объем работы при тех же параметрах -
+тоже ошибка: время с базой несравнимо, и ускорение могло быть просто
+меньшей работой. --update-baseline перезаписывает базу.
+
+Запуск: python benchmarks/run_suite.py [--scales small,medium] [--stages moex_convert]
+        [--repeat 3] [--update-baseline] [--output results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import inflation_parser  # noqa: E402
+from real_deposits_parser import RealDepositsParser  # noqa: E402
+from synthetic import make_cpi_workbook, make_deposit_workbook, make_moex_returns  # noqa: E402
+from update_stocks_in_main_data import convert_moex_to_accumulated_format  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SCALES = ('small', 'medium', 'large')
+
+
+class BenchStage:
+    """Этап набора: prepare(scale, tmp_dir) -> аргументы, run(*аргументы) -> объем работы"""
+
+    def __init__(self, name, unit, scales, prepare, run):
+        self.name = name
+        self.unit = unit
+        self.scales = scales
+        self.prepare = prepare
+        self.run = run
+
+
+def _prepare_inflation(params, tmp_dir):
+    path = os.path.join(tmp_dir, f"ipc_{params['years']}_{params['regions']}.xlsx")
+    make_cpi_workbook(path, first_year=2025 - params['years'], years=params['years'],
+                      regions=params['regions'])
+    return (path,)
+
+
+def _run_inflation(path):
+    return len(inflation_parser.parse_inflation_data(path))
+
+
+def _prepare_deposits(params, tmp_dir):
+    files = []
+    for k in range(params['files']):
+        path = os.path.join(tmp_dir, f"deposits_{params['rows']}_{k}.xlsx")
+        make_deposit_workbook(path, rows=params['rows'], seed=k)
+        files.append(path)
+    return (files,)
+
+
+def _run_deposits(files):
+    parser = RealDepositsParser()
+    return sum(len(values) for _, _, _, values in parser.parse_excel_files(files, track_memory=False))
+
+
+def _prepare_moex(params, tmp_dir):
+    return (make_moex_returns(params['points']),)
+
+
+def _run_moex(returns):
+    return len(convert_moex_to_accumulated_format(returns))
+
+
+STAGES = [
+    BenchStage('inflation_parse', 'точек', {
+        'small': {'years': 10, 'regions': 1},
+        'medium': {'years': 30, 'regions': 1},
+        'large': {'years': 30, 'regions': 20},
+    }, _prepare_inflation, _run_inflation),
+    BenchStage('deposits_parse', 'значений', {
+        'small': {'files': 1, 'rows': 300},
+        'medium': {'files': 3, 'rows': 2000},
+        'large': {'files': 2, 'rows': 5000},
+    }, _prepare_deposits, _run_deposits),
+    BenchStage('moex_convert', 'записей', {
+        'small': {'points': 1_000},
+        'medium': {'points': 10_000},
+        'large': {'points': 96_000},
+    }, _prepare_moex, _run_moex),
+]
+
+
+def measure(stage, scale, repeat, tmp_dir):
+    """Лучшее и медианное время этапа на заданном масштабе"""
+    params = stage.scales[scale]
+    args = stage.prepare(params, tmp_dir)
+    times = []
+    work = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            work = stage.run(*args)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        'params': params,
+        'work': work,
+        'best_s': round(times[0], 6),
+        'median_s': round(times[len(times) // 2], 6),
+    }
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Регрессии и расхождения объема работы: ([(ключ, база, сейчас)], [(ключ, база, сейчас)])"""
+    regressions = []
+    work_changes = []
+    for key, result in results['results'].items():
+        reference = baseline['results'].get(key)
+        if reference is None or reference.get('params') != result['params']:
+            continue
+        if reference.get('work') != result['work']:
+            work_changes.append((key, reference.get('work'), result['work']))
+            continue
+        before, after = reference['best_s'], result['best_s']
+        if after > before * (1 + tolerance) and after - before > min_delta:
+            regressions.append((key, before, after))
+    return regressions, work_changes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--scales', default=','.join(SCALES), help='через запятую: small,medium,large')
+    arg_parser.add_argument('--stages', default=','.join(stage.name for stage in STAGES),
+                            help='через запятую: ' + ','.join(stage.name for stage in STAGES))
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--baseline', default=BASELINE_FILE)
+    arg_parser.add_argument('--update-baseline', action='store_true', help='записать результаты как новую базу')
+    arg_parser.add_argument('--output', help='сохранить результаты этого запуска в файл')
+    arg_parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='допустимое относительное замедление (0.5 = +50%%)')
+    arg_parser.add_argument('--min-delta', type=float, default=0.005,
+                            help='замедление меньше этого числа секунд не считается регрессией')
+    args = arg_parser.parse_args()
+
+    scales = [scale for scale in args.scales.split(',') if scale]
+    stage_names = [name for name in args.stages.split(',') if name]
+    unknown = [s for s in scales if s not in SCALES] + [n for n in stage_names if n not in {s.name for s in STAGES}]
+    if unknown:
+        arg_parser.error(f"неизвестные значения: {', '.join(unknown)}")
+
+    results = {'machine': machine_info(), 'repeat': args.repeat, 'results': {}}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Парсеры пишут свои файлы (inflation_data.json, data/...) в текущий каталог
+        os.chdir(tmp_dir)
+        try:
+            for stage in STAGES:
+                if stage.name not in stage_names:
+                    continue
+                for scale in scales:
+                    key = f"{stage.name}/{scale}"
+                    result = measure(stage, scale, args.repeat, tmp_dir)
+                    results['results'][key] = result
+                    print(f"⏱️ {key:<24} {result['best_s'] * 1000:10.1f} мс "
+                          f"(медиана {result['median_s'] * 1000:.1f}), {result['work']} {stage.unit}")
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        save_results(results, args.output)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        if baseline is not None:
+            # Сохраняем замеры этапов, которые сейчас не запускались
+            merged = dict(baseline['results'])
+            merged.update(results['results'])
+            results['results'] = merged
+        save_results(results, args.baseline)
+        print(f"💾 База обновлена: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"⚠️  Нет базы {args.baseline}, запустите с --update-baseline")
+        return 0
+
+    if baseline.get('machine') != results['machine']:
+        print(f"⚠️  База снята на другой машине: {baseline.get('machine')}")
+
+    regressions, work_changes = compare(results, baseline, args.tolerance, args.min_delta)
+    if work_changes:
+        print(f"❌ Объем работы не совпадает с базой ({len(work_changes)}), обновите базу после проверки:")
+        for key, before, after in work_changes:
+            print(f"   {key}: {before} -> {after}")
+    if regressions:
+        print(f"❌ Регрессии ({len(regressions)}):")
+        for key, before, after in regressions:
+            print(f"   {key}: {before * 1000:.1f} мс -> {after * 1000:.1f} мс (x{after / before:.2f})")
+    if work_changes or regressions:
+        return 1
+
+    print(f"✅ Регрессий нет (допуск +{args.tolerance * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
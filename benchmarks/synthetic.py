@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Генераторы синтетических входных данных для бенчмарков
+"""
+
+import random
+
+from openpyxl import Workbook
+
+MONTH_TITLES = ['Январь', 'Февраль', 'Март', 'Апрель', 'Май', 'Июнь',
+                'Июль', 'Август', 'Сентябрь', 'Октябрь', 'Ноябрь', 'Декабрь']
+
+
+def make_cpi_workbook(path, first_year=1995, years=30, last_month=12, regions=1, seed=0):
+    """Книга в формате Росстата: лист '01', строка годов, строки месяцев.
+
+    В последнем году заполнены только месяцы до last_month включительно.
+    regions > 1 повторяет блок месяцев под заголовками регионов, как в
+    региональных листах ИПЦ.
+    """
+    rng = random.Random(seed)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '01'
+    ws.append(['Индексы потребительских цен на товары и услуги'])
+    ws.append(['к предыдущему месяцу, %'])
+    year_list = list(range(first_year, first_year + years))
+    ws.append([None] + year_list)
+    for region in range(regions):
+        if regions > 1:
+            ws.append([f'Регион {region + 1}'])
+        for month_idx, title in enumerate(MONTH_TITLES, start=1):
+            row = [title]
+            for year in year_list:
+                value = round(100 + rng.uniform(-0.5, 3.0), 2)
+                row.append(None if year == year_list[-1] and month_idx > last_month else value)
+            ws.append(row)
+    ws.append(['Год'] + [round(100 + rng.uniform(3, 30), 2) for _ in year_list])
+    wb.save(path)
+    return path
+
+
+def make_deposit_workbook(path, rows=2000, filler_columns=40, sheets=3, seed=0):
+    """Книга в формате бюллетеня ЦБ: несколько листов, строка заголовков,
+    немного колонок со ставками по вкладам и много посторонних показателей.
+    """
+    rng = random.Random(seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+    for sheet_idx in range(sheets):
+        ws = wb.create_sheet(f'Таблица {sheet_idx + 1}')
+        header = ['Дата']
+        header += [f'Показатель {k + 1}' for k in range(filler_columns // 2)]
+        header += ['Ставка по вкладам до 1 года', 'Ставка по вкладам от 1 до 3 лет',
+                   'Ставка по вкладам свыше 3 лет', 'Объем депозитов']
+        header += [f'Показатель {k + 1 + filler_columns // 2}' for k in range(filler_columns - filler_columns // 2)]
+        ws.append(header)
+        for row_idx in range(rows):
+            year, month = 2000 + row_idx // 12, row_idx % 12 + 1
+            row = [f'{year}-{month:02d}']
+            row += [round(rng.uniform(0, 1000), 2) for _ in range(len(header) - 1)]
+            ws.append(row)
+    wb.save(path)
+    return path
+
+
+def make_moex_returns(points, first_year=2000, seed=0):
+    """Месячная доходность в формате stocks_moex.json: {"YYYY-MM": доля}.
+
+    Ряд начинается с января first_year: с 2000 года все точки идут после
+    базы 31.12.1999 и попадают в накопленный индекс. Ключи "YYYY-MM"
+    ограничены четырьмя цифрами года (с 2000 года - не более 96 000 месяцев).
+    """
+    max_points = (9999 - first_year + 1) * 12
+    if points > max_points:
+        raise ValueError(f"не больше {max_points} месяцев в формате YYYY-MM с {first_year} года")
+    rng = random.Random(seed)
+    returns = {}
+    # Среднее ~ sigma^2 / 2: логарифм индекса без дрейфа, без переполнения на 10^5 месяцах
+    for k in range(points):
+        year, month = divmod(k, 12)
+        returns[f"{first_year + year:04d}-{month + 1:02d}"] = rng.gauss(0.0018, 0.06)
+    return returns
+
+
+def make_leads_csv(path, rows=100_000, seed=0):
+    """Файл заявок для borrower_scorer.py: id, amount, term, rate, income1..3.
+
+    Около 2% строк с ошибками полей (сумма, срок или доход вне
+    ограничений, пустой доход), суммы и доходы - целые рубли.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,amount,term,rate,income1,income2,income3\n')
+        lines = []
+        for k in range(rows):
+            income = rng.randint(20, 400) * 1000
+            incomes = [str(max(0, income + rng.randint(-5000, 5000))) for _ in range(3)]
+            amount = rng.randint(1, 500) * 10_000
+            term = rng.randint(3, 84)
+            if rng.random() < 0.02:
+                amount, term, incomes[2] = rng.choice([(5000, term, incomes[2]), (amount, 120, incomes[2]),
+                                                       (amount, term, '')])
+            lines.append(f"{k},{amount},{term},{rng.randint(100, 5000) / 100},{','.join(incomes)}\n")
+            if len(lines) >= 10_000:
+                f.write(''.join(lines))
+                lines = []
+        f.write(''.join(lines))
+    return path
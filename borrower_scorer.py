@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетная оценка кредитоспособности по правилам теста заемщика
+(hooks/useBorrowerTest.ts) для файлов заявок в сотни тысяч строк
+
+Для каждой строки, как в калькуляторе:
+- аннуитетный платеж P * r(1+r)^n / ((1+r)^n - 1), r - месячная ставка;
+- переплата, средний доход по трем месяцам (пустой доход - 0), долговая
+  нагрузка (платеж / доход, %), остаток дохода после платежа;
+- статус excellent/good/moderate/high-risk по тем же порогам, с теми же
+  заголовком и рекомендациями (--with-text);
+- errors - поля, которые калькулятор не принял бы (сумма 10 000 -
+  5 000 000, срок 3 - 84 месяца, ставка 1 - 50%, доходы 1 000 -
+  10 000 000). Как и в калькуляторе, ошибки не мешают расчету; строки
+  без суммы, ставки или срока остаются без статуса.
+
+Вход - CSV или Parquet (нужен pyarrow) со столбцами amount, term, rate,
+income1, income2, income3; остальные столбцы переносятся в результат.
+Файл читается блоками (CSV - диапазонами байт по границам строк,
+Parquet - группами строк), блоки считаются в --workers процессах,
+в работе одновременно не больше 2 x workers блоков, результат пишется
+потоком в порядке входа.
+
+Запуск: python borrower_scorer.py leads.csv --output scored.csv [--workers 4]
+        [--chunk-mb 16] [--term-unit year] [--with-text]
+"""
+
+import argparse
+import collections
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics
+
+INPUT_COLUMNS = ('amount', 'term', 'rate', 'income1', 'income2', 'income3')
+OUTPUT_COLUMNS = ('monthly_payment', 'total_interest', 'average_income', 'debt_burden', 'remaining_income',
+                  'status', 'errors')
+TEXT_COLUMNS = ('title', 'message', 'recommendations')
+
+# Ограничения полей (validateAmount, validateTerm, validateRate, validateIncome)
+AMOUNT_LIMITS = (10_000, 5_000_000)
+TERM_LIMITS = (3, 84)
+RATE_LIMITS = (1, 50)
+INCOME_LIMITS = (1_000, 10_000_000)
+
+# Минимум для жизни в calculateCreditworthiness
+MIN_LIVING_EXPENSES = 15000
+
+# Пороги статусов по порядку проверки: долговая нагрузка меньше, доход /
+# платеж не меньше, остаток дохода не меньше
+STATUS_RULES = (
+    ('excellent', 20, 3, MIN_LIVING_EXPENSES * 1.5),
+    ('good', 35, 2, MIN_LIVING_EXPENSES),
+    ('moderate', 50, 1.5, MIN_LIVING_EXPENSES * 0.7),
+)
+FALLBACK_STATUS = 'high-risk'
+
+ALERTS = {
+    'excellent': {
+        'title': 'Отличная кредитоспособность',
+        'message': 'При указанных условиях у вас отличные шансы на одобрение кредита. Ваша долговая нагрузка '
+                   'минимальна, а доходы позволяют комфортно обслуживать кредит.',
+        'recommendations': [
+            'Вы можете рассмотреть увеличение суммы кредита',
+            'Возможно получение более выгодной процентной ставки',
+            'Рассмотрите возможность досрочного погашения',
+        ],
+    },
+    'good': {
+        'title': 'Хорошие шансы на одобрение',
+        'message': 'При соблюдении всех указанных вами условий вы сможете вовремя и в полном объеме вносить '
+                   'предусмотренные договором платежи.',
+        'recommendations': [
+            'Ваш ежемесячный доход должен быть как минимум в два раза больше, чем ежемесячный платеж',
+            'Обратите внимание, что полученные рекомендации актуальны, если у вас нет других кредитов или займов',
+            'Рекомендуем создать финансовую подушку на 3-6 месяцев',
+        ],
+    },
+    'moderate': {
+        'title': 'Умеренный риск',
+        'message': 'Ваша долговая нагрузка находится в пограничной зоне. Кредит возможен, но требует '
+                   'осторожности в планировании бюджета.',
+        'recommendations': [
+            'Рассмотрите увеличение срока кредита для снижения платежа',
+            'Попробуйте увеличить доходы или привлечь созаемщика',
+            'Рассмотрите уменьшение суммы кредита',
+            'Обязательно учтите все текущие обязательства',
+        ],
+    },
+    'high-risk': {
+        'title': 'Высокий риск отказа',
+        'message': 'При текущих параметрах высока вероятность отказа в кредите. Долговая нагрузка превышает '
+                   'рекомендуемые значения.',
+        'recommendations': [
+            'Увеличьте срок кредита для снижения ежемесячного платежа',
+            'Рассмотрите значительное уменьшение суммы кредита',
+            'Найдите способы увеличения доходов',
+            'Рассмотрите привлечение поручителя или созаемщика',
+            'Возможно, стоит отложить получение кредита',
+        ],
+    },
+}
+
+STATUS_NAMES = tuple(rule[0] for rule in STATUS_RULES) + (FALLBACK_STATUS,)
+
+# Поля с ошибкой по битам маски errors и текст столбца для каждой маски
+ERROR_FIELDS = ('amount', 'term', 'rate', 'income1', 'income2', 'income3')
+ERROR_TEXT = tuple(';'.join(name for bit, name in enumerate(ERROR_FIELDS) if mask >> bit & 1)
+                   for mask in range(1 << len(ERROR_FIELDS)))
+
+# Текст рекомендаций одной строкой и готовый хвост строки CSV для --with-text
+ALERT_TEXT = {status: {'title': alert['title'], 'message': alert['message'],
+                       'recommendations': '; '.join(alert['recommendations'])}
+              for status, alert in ALERTS.items()}
+CSV_TEXT = {status: ',' + ','.join('"' + text[name].replace('"', '""') + '"' for name in TEXT_COLUMNS)
+            for status, text in ALERT_TEXT.items()}
+CSV_TEXT[''] = ',,,'
+
+DEFAULT_CHUNK_MB = 16
+
+
+def _parse_number(column, digits_only):
+    """Столбец -> float64 как parseFloat в калькуляторе: у сумм и доходов
+    отбрасывается все, кроме цифр ("200 000 ₽"), у ставки запятая -> точка"""
+    if column.dtype.kind in 'iuf':
+        return column.to_numpy(dtype=np.float64)
+    text = column.astype(str)
+    text = text.str.replace(r'[^\d]', '', regex=True) if digits_only else text.str.replace(',', '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _outside(values, limits):
+    return np.isnan(values) | (values < limits[0]) | (values > limits[1])
+
+
+def annuity_payment(amounts, months, rates):
+    """Аннуитетный платеж; при нулевой ставке - сумма / срок"""
+    monthly_rate = rates / 100 / 12
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + monthly_rate) ** months
+        payment = amounts * (monthly_rate * growth / (growth - 1))
+        return np.where(monthly_rate > 0, payment, amounts / months)
+
+
+def score_columns(amounts, months, rates, income1, income2, income3):
+    """Расчет по столбцам (float64).
+
+    Возвращает словарь числовых столбцов OUTPUT_COLUMNS, где status -
+    номер в STATUS_NAMES (-1 - не рассчитано), errors - битовая маска
+    полей ERROR_FIELDS.
+    """
+    computable = ~np.isnan(amounts) & ~np.isnan(rates) & (months > 0)
+    payment = np.where(computable, annuity_payment(amounts, months, rates), np.nan)
+    total_interest = payment * months - amounts
+
+    average_income = (np.nan_to_num(income1) + np.nan_to_num(income2) + np.nan_to_num(income3)) / 3
+    has_income = average_income > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        debt_burden = np.where(has_income, payment / average_income * 100, 0.0)
+        income_ratio = np.where(has_income, average_income / payment, 0.0)
+    remaining_income = average_income - payment
+
+    # Правила проверяются по порядку, первое выполненное задает статус
+    status = np.full(len(amounts), len(STATUS_RULES), dtype=np.int8)
+    for code in range(len(STATUS_RULES) - 1, -1, -1):
+        _, burden_below, ratio_at_least, remaining_at_least = STATUS_RULES[code]
+        matched = (debt_burden < burden_below) & (income_ratio >= ratio_at_least) \
+            & (remaining_income >= remaining_at_least)
+        status[matched] = code
+    status[~computable] = -1
+
+    errors = np.zeros(len(amounts), dtype=np.int8)
+    for bit, failed in enumerate((
+        _outside(amounts, AMOUNT_LIMITS),
+        ~(months >= TERM_LIMITS[0]) | (months > TERM_LIMITS[1]),
+        _outside(rates, RATE_LIMITS),
+        _outside(income1, INCOME_LIMITS),
+        _outside(income2, INCOME_LIMITS),
+        _outside(income3, INCOME_LIMITS),
+    )):
+        errors |= failed.astype(np.int8) << bit
+
+    return {
+        'monthly_payment': payment,
+        'total_interest': total_interest,
+        'average_income': average_income,
+        'debt_burden': np.where(computable, debt_burden, np.nan),
+        'remaining_income': np.where(computable, remaining_income, np.nan),
+        'status': status,
+        'errors': errors,
+    }
+
+
+def _check_columns(names):
+    missing = [name for name in INPUT_COLUMNS if name not in names]
+    if missing:
+        raise ValueError(f"нет столбцов: {', '.join(missing)}")
+
+
+def _input_columns(frame, term_unit):
+    _check_columns(frame.columns)
+    months = _parse_number(frame['term'], digits_only=True)
+    if term_unit == 'year':
+        months = months * 12
+    return (
+        _parse_number(frame['amount'], digits_only=True),
+        months,
+        _parse_number(frame['rate'], digits_only=False),
+        *(_parse_number(frame[name], digits_only=True) for name in ('income1', 'income2', 'income3')),
+    )
+
+
+def _lookup(table, codes):
+    # Последний элемент таблицы - для кода -1
+    return np.asarray(table, dtype=object)[codes]
+
+
+def score_frame(frame, term_unit='month', with_text=False):
+    """Блок заявок -> тот же блок с добавленными столбцами результата"""
+    scored = score_columns(*_input_columns(frame, term_unit))
+    result = frame.copy()
+    for name in OUTPUT_COLUMNS[:5]:
+        result[name] = scored[name]
+    result['status'] = _lookup(STATUS_NAMES + ('',), scored['status'])
+    result['errors'] = _lookup(ERROR_TEXT, scored['errors'])
+    if with_text:
+        for name in TEXT_COLUMNS:
+            result[name] = _lookup([ALERT_TEXT[status][name] for status in STATUS_NAMES] + [''], scored['status'])
+    return result
+
+
+def _status_counts(codes):
+    counts = np.bincount(codes[codes >= 0], minlength=len(STATUS_NAMES))
+    return {name: int(count) for name, count in zip(STATUS_NAMES, counts)}
+
+
+def csv_byte_ranges(path, chunk_bytes):
+    """Заголовок CSV и диапазоны байт блоков, выровненные по концам строк.
+
+    Переводы строк внутри кавычек не поддерживаются - в файлах заявок их нет.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    names = next(csv.reader([header.decode('utf-8-sig')]))
+    return names, ranges
+
+
+def _read_range(path, block):
+    start, end = block
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start).decode('utf-8')
+
+
+def _csv_suffixes(scored, with_text):
+    """Столбцы результата строками CSV: одна строка формата на весь блок"""
+    computable = scored['status'] >= 0
+    errors = _lookup(ERROR_TEXT, scored['errors'])
+    text = _lookup([CSV_TEXT[status] for status in STATUS_NAMES] + [CSV_TEXT['']], scored['status']) \
+        if with_text else None
+    rows = zip(*(scored[name].tolist() for name in OUTPUT_COLUMNS[:5]),
+               _lookup(STATUS_NAMES + ('',), scored['status']).tolist(), errors.tolist())
+    suffixes = [',%.2f,%.2f,%.2f,%.2f,%.2f,%s,%s' % values for values in rows]
+    for i in np.flatnonzero(~computable).tolist():
+        # Не рассчитано: пустые числа вместо nan
+        suffixes[i] = f",,,{scored['average_income'][i]:.2f},,,,{errors[i]}"
+    if text is not None:
+        suffixes = [suffix + extra for suffix, extra in zip(suffixes, text.tolist())]
+    return suffixes
+
+
+def _score_block(path, kind, names, block, term_unit, with_text, output_kind):
+    """Задача процесса: чтение блока и расчет.
+
+    CSV -> CSV: строки входа переносятся как есть, к ним дописываются
+    столбцы результата; в остальных случаях - DataFrame.
+    """
+    if kind == 'parquet':
+        import pyarrow.parquet
+        frame = score_frame(pyarrow.parquet.ParquetFile(path).read_row_group(block).to_pandas(),
+                            term_unit, with_text)
+        return frame, len(frame), frame['status'].value_counts().to_dict()
+
+    text = _read_range(path, block)
+    frame = pd.read_csv(io.StringIO(text), names=names, header=None)
+    if output_kind != 'csv':
+        frame = score_frame(frame, term_unit, with_text)
+        return frame, len(frame), frame['status'].value_counts().to_dict()
+
+    scored = score_columns(*_input_columns(frame, term_unit))
+    # read_csv пропускает пустые строки - их нет и в выводе
+    lines = [line.rstrip('\r') for line in text.split('\n') if line.strip()]
+    suffixes = _csv_suffixes(scored, with_text)
+    block_text = ''.join([line + suffix + '\n' for line, suffix in zip(lines, suffixes)])
+    return block_text, len(lines), _status_counts(scored['status'])
+
+
+def _input_kind(path):
+    return 'parquet' if path.endswith('.parquet') else 'csv'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ Для Parquet нужен pyarrow: pip install pyarrow")
+
+
+def plan_blocks(path, chunk_bytes):
+    """Имена столбцов и блоки входа: диапазоны байт CSV или номера групп строк Parquet"""
+    if _input_kind(path) == 'parquet':
+        _require_pyarrow()
+        import pyarrow.parquet
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        return parquet_file.schema_arrow.names, list(range(parquet_file.num_row_groups))
+    return csv_byte_ranges(path, chunk_bytes)
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.tmp_path = path + '.tmp'
+        self.path = path
+        self.file = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+        csv.writer(self.file, lineterminator='\n').writerow(columns)
+
+    def write(self, block):
+        if isinstance(block, pd.DataFrame):
+            block = block.to_csv(index=False, header=False, float_format='%.2f', lineterminator='\n')
+        self.file.write(block)
+
+    def close(self, commit=True):
+        self.file.close()
+        if commit:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        _require_pyarrow()
+        import pyarrow
+        self.pa = pyarrow
+        self.tmp_path = path + '.tmp'
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            import pyarrow.parquet
+            self.writer = pyarrow.parquet.ParquetWriter(self.tmp_path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self, commit=True):
+        if self.writer is not None:
+            self.writer.close()
+            if commit:
+                os.replace(self.tmp_path, self.path)
+            else:
+                os.remove(self.tmp_path)
+
+
+def score_file(path, output, workers=1, chunk_bytes=DEFAULT_CHUNK_MB << 20, term_unit='month', with_text=False):
+    """Оценка файла заявок с записью потоком. Возвращает (строк, {статус: число})"""
+    kind = _input_kind(path)
+    output_kind = _input_kind(output)
+    names, blocks = plan_blocks(path, chunk_bytes)
+    # До открытия результата: при ошибке прежний файл остается на месте
+    _check_columns(names)
+    columns = list(names) + list(OUTPUT_COLUMNS) + (list(TEXT_COLUMNS) if with_text else [])
+    writer = (ParquetWriter if output_kind == 'parquet' else CsvWriter)(output, columns)
+    rows = 0
+    counts = collections.Counter()
+
+    def consume(result):
+        nonlocal rows
+        block, block_rows, block_counts = result
+        writer.write(block)
+        rows += block_rows
+        counts.update(block_counts)
+
+    committed = False
+    try:
+        task = (path, kind, names)
+        if workers <= 1:
+            for block in blocks:
+                consume(_score_block(*task, block, term_unit, with_text, output_kind))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Окно задач ограничивает память; результаты пишутся в порядке входа
+                pending = collections.deque()
+                for block in blocks:
+                    if len(pending) >= 2 * workers:
+                        consume(pending.popleft().result())
+                    pending.append(executor.submit(_score_block, *task, block, term_unit, with_text, output_kind))
+                while pending:
+                    consume(pending.popleft().result())
+        committed = True
+    finally:
+        # Результат заменяется только целиком, недописанный временный файл удаляется
+        writer.close(commit=committed)
+    counts.pop('', None)
+    return rows, dict(counts)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('input', help='файл заявок .csv или .parquet')
+    arg_parser.add_argument('--output', required=True, help='результат .csv или .parquet')
+    arg_parser.add_argument('--workers', type=int, default=1, help='процессов для расчета блоков')
+    arg_parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_MB, help='размер блока CSV, МБ')
+    arg_parser.add_argument('--term-unit', choices=('month', 'year'), default='month', help='единица столбца term')
+    arg_parser.add_argument('--with-text', action='store_true', help='добавить заголовок, сообщение и рекомендации')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    start = time.perf_counter()
+    with metrics.span('borrowers.score', source=os.path.basename(args.input), workers=args.workers) as span:
+        rows, counts = score_file(args.input, args.output, args.workers, int(args.chunk_mb * (1 << 20)),
+                                  args.term_unit, args.with_text)
+        span['rows'] = rows
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ {rows} заявок за {elapsed:.2f} с ({rows / max(elapsed, 1e-9):,.0f} в секунду)")
+    for status, _, _, _ in STATUS_RULES + ((FALLBACK_STATUS, None, None, None),):
+        print(f"   {status}: {counts.get(status, 0)}")
+    print(f"💾 {args.output}: {os.path.getsize(args.output)} байт")
+
+
+if __name__ == "__main__":
+    main()
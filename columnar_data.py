@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Компактный колоночный формат для all_data_final.json
+
+Структура файла (little-endian):
+1. 8 байт сигнатуры b'CALCCOL1'
+2. uint32 - длина заголовка, затем заголовок в JSON (UTF-8)
+3. int32 массив - общая ось месяцев (год * 12 + месяц - 1)
+4. по одному float64 массиву на инструмент, выровненному по оси
+
+Все массивы выровнены на 8 байт, поэтому читаются через np.memmap или
+как Float64Array/Int32Array поверх ArrayBuffer без копирования.
+Заголовок хранит дерево инструментов (name, code, sort, ...) и для
+каждого ряда смещение в файле, начало на оси, длину, а также редкие
+исключения: дни не в конце месяца и значения, записанные целыми числами.
+Благодаря этому чтение восстанавливает исходный JSON точь-в-точь.
+"""
+
+import argparse
+import calendar
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'CALCCOL1'
+ALIGN = 8
+
+
+def date_to_month_ordinal(date_str):
+    """'DD.MM.YYYY' -> (порядковый номер месяца, день)"""
+    day, month, year = date_str.split('.')
+    return int(year) * 12 + int(month) - 1, int(day)
+
+
+def month_ordinal_to_date(ordinal, day=None):
+    """Порядковый номер месяца -> 'DD.MM.YYYY' (по умолчанию конец месяца)"""
+    year, month = divmod(ordinal, 12)
+    month += 1
+    if day is None:
+        day = calendar.monthrange(year, month)[1]
+    return f"{day:02d}.{month:02d}.{year}"
+
+
+def iter_series_nodes(tools):
+    """Все узлы дерева tools, у которых items - ряд {date, value}"""
+    for tool in tools:
+        items = tool.get('items') or []
+        if items and 'date' in items[0]:
+            yield tool
+        elif items:
+            yield from iter_series_nodes(items)
+
+
+def _pad(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % ALIGN))
+
+
+def write_columnar(main_data, path):
+    """Запись main_data в колоночный файл. Возвращает размер в байтах."""
+    series = []
+    all_ordinals = set()
+    for node in iter_series_nodes(main_data['tools']):
+        parsed = [date_to_month_ordinal(item['date']) for item in node['items']]
+        ordinals = [ordinal for ordinal, _ in parsed]
+        if len(set(ordinals)) != len(ordinals) or ordinals != sorted(ordinals):
+            raise ValueError(f"Ряд {node.get('code')}: даты не возрастают строго по месяцам")
+        series.append((node, parsed))
+        all_ordinals.update(ordinals)
+
+    axis = np.array(sorted(all_ordinals), dtype='<i4')
+    axis_pos = {int(ordinal): pos for pos, ordinal in enumerate(axis)}
+
+    series_meta = []
+
+    def describe(tools):
+        result = []
+        for tool in tools:
+            meta = {key: value for key, value in tool.items() if key != 'items'}
+            items = tool.get('items') or []
+            if items and 'date' in items[0]:
+                meta['series'] = len(series_meta)
+                series_meta.append(tool)
+            else:
+                meta['children'] = describe(items)
+            result.append(meta)
+        return result
+
+    tree = describe(main_data['tools'])
+    parsed_by_node = {id(node): parsed for node, parsed in series}
+
+    arrays = []
+    headers = []
+    for node in series_meta:
+        parsed = parsed_by_node[id(node)]
+        start = axis_pos[parsed[0][0]]
+        count = axis_pos[parsed[-1][0]] - start + 1
+        values = np.full(count, np.nan, dtype='<f8')
+        days = {}
+        ints = []
+        for (ordinal, day), item in zip(parsed, node['items']):
+            pos = axis_pos[ordinal] - start
+            values[pos] = item['value']
+            year, month = divmod(ordinal, 12)
+            if day != calendar.monthrange(year, month + 1)[1]:
+                days[str(pos)] = day
+            if isinstance(item['value'], int):
+                ints.append(pos)
+        arrays.append(values)
+        headers.append({'start': start, 'count': count, 'days': days, 'ints': ints})
+
+    # Смещения зависят от длины заголовка, поэтому считаем их итеративно
+    offsets = [0] * len(arrays)
+    while True:
+        header = {'tree': tree, 'axis_length': len(axis), 'series': [
+            dict(h, offset=offset) for h, offset in zip(headers, offsets)
+        ]}
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        position = len(MAGIC) + 4 + len(header_bytes)
+        position += -position % ALIGN
+        axis_offset = position
+        position += axis.nbytes + (-axis.nbytes % ALIGN)
+        new_offsets = []
+        for values in arrays:
+            new_offsets.append(position)
+            position += values.nbytes
+        if new_offsets == offsets:
+            break
+        offsets = new_offsets
+
+    buffer = bytearray(MAGIC)
+    buffer += struct.pack('<I', len(header_bytes))
+    buffer += header_bytes
+    _pad(buffer)
+    assert len(buffer) == axis_offset
+    buffer += axis.tobytes()
+    _pad(buffer)
+    for values in arrays:
+        buffer += values.tobytes()
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer)
+    os.replace(tmp_path, path)
+    return len(buffer)
+
+
+def _open_columnar(path, mmap):
+    """Заголовок, ось месяцев и список рядов в порядке header['series']"""
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            raw = np.frombuffer(f.read(), dtype=np.uint8)
+
+    if bytes(raw[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path}: не колоночный файл данных")
+    header_start = len(MAGIC) + 4
+    (header_length,) = struct.unpack('<I', bytes(raw[len(MAGIC):header_start]))
+    header = json.loads(bytes(raw[header_start:header_start + header_length]).decode('utf-8'))
+
+    axis_offset = header_start + header_length
+    axis_offset += -axis_offset % ALIGN
+    axis = raw[axis_offset:axis_offset + header['axis_length'] * 4].view('<i4')
+
+    arrays = [
+        raw[meta['offset']:meta['offset'] + meta['count'] * 8].view('<f8')
+        for meta in header['series']
+    ]
+    return header, axis, arrays
+
+
+def load_columnar(path, mmap=True):
+    """Чтение файла без разбора дат.
+
+    Возвращает (header, axis, {code: (ordinals, values)}); при mmap=True
+    массивы - представления поверх np.memmap без копирования. Пропуски
+    внутри ряда записаны как NaN.
+    """
+    header, axis, arrays = _open_columnar(path, mmap)
+    series = {}
+
+    def collect(nodes):
+        for node in nodes:
+            if 'series' in node:
+                meta = header['series'][node['series']]
+                ordinals = axis[meta['start']:meta['start'] + meta['count']]
+                series[node.get('code')] = (ordinals, arrays[node['series']])
+            else:
+                collect(node['children'])
+
+    collect(header['tree'])
+    return header, axis, series
+
+
+def read_columnar(path):
+    """Восстановление исходной структуры all_data_final.json"""
+    header, axis, arrays = _open_columnar(path, mmap=False)
+
+    def build(nodes):
+        result = []
+        for node in nodes:
+            tool = {key: value for key, value in node.items() if key not in ('series', 'children')}
+            if 'series' in node:
+                meta = header['series'][node['series']]
+                values = arrays[node['series']].tolist()
+                ordinals = axis[meta['start']:meta['start'] + meta['count']].tolist()
+                days = meta['days']
+                ints = set(meta['ints'])
+                items = []
+                for pos, (ordinal, value) in enumerate(zip(ordinals, values)):
+                    if value != value:  # NaN - месяца нет в исходном ряду
+                        continue
+                    items.append({
+                        'date': month_ordinal_to_date(ordinal, days.get(str(pos))),
+                        'value': int(value) if pos in ints else value,
+                    })
+                tool['items'] = items
+            else:
+                tool['items'] = build(node['children'])
+            result.append(tool)
+        return result
+
+    return {'tools': build(header['tree'])}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Конвертация all_data_final.json в колоночный формат')
+    arg_parser.add_argument('input', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('output', nargs='?', help='по умолчанию рядом с JSON, расширение .bin')
+    args = arg_parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + '.bin'
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        main_data = json.load(f)
+
+    size = write_columnar(main_data, output)
+
+    # Проверка: обратное чтение дает тот же JSON
+    restored = read_columnar(output)
+    if json.dumps(restored, ensure_ascii=False) != json.dumps(main_data, ensure_ascii=False):
+        print("❌ Обратное чтение не совпадает с исходным JSON")
+        return 1
+
+    json_size = os.path.getsize(args.input)
+    start = time.perf_counter()
+    with open(args.input, 'r', encoding='utf-8') as f:
+        json.load(f)
+    json_time = time.perf_counter() - start
+    start = time.perf_counter()
+    load_columnar(output)
+    bin_time = time.perf_counter() - start
+
+    print(f"✅ Записан {output}")
+    print(f"   Размер: {json_size} -> {size} байт (x{json_size / size:.1f})")
+    print(f"   Чтение: json.load {json_time * 1000:.2f} мс, колоночный {bin_time * 1000:.2f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Дневной уровень данных: компактное хранение и прореживание до месяцев
+
+Структура файла (little-endian):
+1. 8 байт сигнатуры b'CALCDAY1'
+2. uint32 - длина заголовка, затем заголовок в JSON (UTF-8)
+3. данные с выровненной на 8 байт позиции (смещения в заголовке
+   считаются от нее): для каждого ряда даты дельтами (uint8/uint16/uint32 -
+   наименьший тип, в который помещается шаг между датами) и значения
+   float32 или float64; все массивы выровнены на 8 байт
+
+Даты - номера дней от 1970-01-01: первый день хранится в заголовке,
+дальше только шаги (для торговых дней это 1-3, то есть один байт на
+точку вместо десяти символов 'DD.MM.YYYY').
+
+Существующие потребители работают с месячными рядами: monthly_items()
+прореживает дневной ряд до точек на конец месяца (индекс - последнее
+значение месяца, ставка - среднее за месяц) одним reduceat.
+Выборка диапазона - два бинарных поиска по декодированным датам.
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from return_tables import series_kind
+
+MAGIC = b'CALCDAY1'
+ALIGN = 8
+DELTA_DTYPES = ('<u1', '<u2', '<u4')
+
+# Дневные ставки депозитов от real_deposits_parser.py --daily, которые
+# читает update_stocks_in_main_data.py: код инструмента -> срок вклада
+DAILY_DEPOSIT_SOURCE = 'data/deposits_real_daily.bin'
+DEPOSIT_BUCKETS = {
+    'deposit_ruble_1': '<1',
+    'deposit_ruble_1_3': '1-3',
+    'deposit_ruble_3': '>3',
+}
+
+
+def days_from_keys(keys):
+    """['YYYY-MM-DD', ...] -> номера дней от 1970-01-01 (int64)"""
+    return np.array(keys, dtype='datetime64[D]').astype(np.int64)
+
+
+def keys_from_days(days):
+    return np.datetime_as_string(np.asarray(days).astype('datetime64[D]'), unit='D').tolist()
+
+
+def encode_dates(days):
+    """Номера дней -> (первый день, шаги в наименьшем беззнаковом типе)"""
+    days = np.asarray(days, dtype=np.int64)
+    if len(days) == 0:
+        return 0, np.empty(0, dtype=DELTA_DTYPES[0])
+    deltas = np.diff(days)
+    if len(deltas) and deltas.min() <= 0:
+        raise ValueError("даты дневного ряда должны строго возрастать")
+    max_delta = int(deltas.max()) if len(deltas) else 0
+    for dtype in DELTA_DTYPES:
+        if max_delta <= np.iinfo(np.dtype(dtype)).max:
+            return int(days[0]), deltas.astype(dtype)
+    raise ValueError("слишком большой шаг между датами")
+
+
+def decode_dates(first_day, deltas):
+    days = np.empty(len(deltas) + 1, dtype=np.int64)
+    days[0] = first_day
+    np.cumsum(deltas, dtype=np.int64, out=days[1:])
+    days[1:] += first_day
+    return days
+
+
+def _pad(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % ALIGN))
+
+
+def write_daily(series, path, value_dtype='<f8'):
+    """Запись {code: (дни, значения)}. Возвращает размер файла в байтах.
+
+    value_dtype='<f4' вдвое уменьшает значения: для ставок и графиков
+    семи значащих цифр достаточно. value_dtype=None - у каждого ряда
+    остается свой тип (float32 или float64).
+    """
+    blocks = []
+    metas = []
+    offset = 0
+    for code, (days, values) in series.items():
+        dtype = value_dtype
+        if dtype is None:
+            dtype = values.dtype if np.asarray(values).dtype == np.float32 else np.float64
+        values = np.asarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+        if len(values) != len(days):
+            raise ValueError(f"{code}: разная длина дат и значений")
+        if len(values) == 0:
+            continue
+        first_day, deltas = encode_dates(days)
+        meta = {
+            'code': code,
+            'kind': series_kind(code),
+            'count': len(values),
+            'first_day': first_day,
+            'last_day': int(np.asarray(days)[-1]),
+            'delta_dtype': deltas.dtype.str,
+            'value_dtype': values.dtype.str,
+        }
+        for name, array in (('deltas', deltas), ('values', values)):
+            meta[f'{name}_offset'] = offset
+            raw = array.tobytes()
+            blocks.append(raw + b'\0' * (-len(raw) % ALIGN))
+            offset += len(blocks[-1])
+        metas.append(meta)
+
+    # Смещения считаются от начала данных: сразу за выровненным заголовком
+    header = json.dumps({'series': metas}, ensure_ascii=False).encode('utf-8')
+    buffer = bytearray(MAGIC)
+    buffer += struct.pack('<I', len(header))
+    buffer += header
+    _pad(buffer)
+    for block in blocks:
+        buffer += block
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer)
+    os.replace(tmp_path, path)
+    return len(buffer)
+
+
+def load_daily(path, mmap=True):
+    """{code: (дни int64, значения)}; значения - представление поверх файла"""
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            raw = np.frombuffer(f.read(), dtype=np.uint8)
+    if bytes(raw[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path}: не файл дневных рядов")
+    (header_length,) = struct.unpack('<I', bytes(raw[len(MAGIC):len(MAGIC) + 4]))
+    header_end = len(MAGIC) + 4 + header_length
+    header = json.loads(bytes(raw[len(MAGIC) + 4:header_end]).decode('utf-8'))
+    data_start = header_end + (-header_end % ALIGN)
+
+    series = {}
+    for meta in header['series']:
+        delta_dtype = np.dtype(meta['delta_dtype'])
+        value_dtype = np.dtype(meta['value_dtype'])
+        count = meta['count']
+        deltas_offset = data_start + meta['deltas_offset']
+        values_offset = data_start + meta['values_offset']
+        deltas = raw[deltas_offset:deltas_offset + (count - 1) * delta_dtype.itemsize].view(delta_dtype)
+        values = raw[values_offset:values_offset + count * value_dtype.itemsize].view(value_dtype)
+        series[meta['code']] = (decode_dates(meta['first_day'], deltas), values)
+    return series
+
+
+def slice_range(days, values, start_day, end_day):
+    """Точки с start_day <= день <= end_day (двоичный поиск, без копирования)"""
+    lo = int(np.searchsorted(days, start_day, side='left'))
+    hi = int(np.searchsorted(days, end_day, side='right'))
+    return days[lo:hi], values[lo:hi]
+
+
+def downsample_monthly(days, values, how='last'):
+    """Дневной ряд -> (номера месяцев год*12+месяц-1, значения).
+
+    how='last' - последнее значение месяца (уровень индекса),
+    how='mean' - среднее за месяц (ставки).
+    """
+    if len(days) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    months = np.asarray(days).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    # Номер месяца от 1970-01 -> год * 12 + месяц - 1
+    ordinals_all = months + 1970 * 12
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(months)) + 1))
+    values = np.asarray(values, dtype=np.float64)
+    if how == 'last':
+        ends = np.concatenate((starts[1:], [len(values)])) - 1
+        result = values[ends]
+    elif how == 'mean':
+        counts = np.diff(np.concatenate((starts, [len(values)])))
+        result = np.add.reduceat(values, starts) / counts
+    else:
+        raise ValueError(f"Неизвестный способ прореживания: {how}")
+    return ordinals_all[starts], result
+
+
+def month_end_keys(ordinals):
+    """Номера месяцев -> ['DD.MM.YYYY'] последних дней месяцев"""
+    months = (np.asarray(ordinals, dtype=np.int64) - 1970 * 12).astype('datetime64[M]')
+    last_days = (months + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')
+    return [f"{d[8:10]}.{d[5:7]}.{d[0:4]}" for d in np.datetime_as_string(last_days, unit='D').tolist()]
+
+
+def monthly_items(days, values, how=None, code=None, digits=2):
+    """Месячный ряд в формате all_data_final.json для существующих потребителей"""
+    if how is None:
+        how = 'mean' if code is not None and series_kind(code) == 'rate' else 'last'
+    ordinals, monthly = downsample_monthly(days, values, how)
+    return [
+        {"date": date_str, "value": round(value, digits)}
+        for date_str, value in zip(month_end_keys(ordinals), monthly.tolist())
+    ]
+
+
+def monthly_returns(days, closes):
+    """Дневные цены закрытия -> {"YYYY-MM": доходность месяца} для
+    convert_returns_to_accumulated_format. Первый месяц служит базой."""
+    ordinals, month_closes = downsample_monthly(days, closes, 'last')
+    returns = month_closes[1:] / month_closes[:-1] - 1
+    return {
+        f"{ordinal // 12}-{ordinal % 12 + 1:02d}": value
+        for ordinal, value in zip(ordinals[1:].tolist(), returns.tolist())
+    }
+
+
+def load_daily_json(path):
+    """Исходник {"YYYY-MM-DD": значение} -> (дни, значения) по возрастанию дат"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    keys = sorted(data)
+    return days_from_keys(keys), np.array([data[key] for key in keys], dtype=np.float64)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('path', nargs='?', default='data/all_data_daily.bin')
+    arg_parser.add_argument('--code', help='показать месячные точки одного ряда')
+    arg_parser.add_argument('--start', help='начало диапазона YYYY-MM-DD')
+    arg_parser.add_argument('--end', help='конец диапазона YYYY-MM-DD')
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    series = load_daily(args.path)
+    print(f"📂 {args.path}: {len(series)} рядов, загрузка {(time.perf_counter() - start) * 1000:.1f} мс")
+    for code, (days, values) in series.items():
+        first, last = keys_from_days([days[0], days[-1]])
+        print(f"   {code}: {len(days)} точек, {first} - {last}, {values.dtype}")
+
+    if args.code:
+        days, values = series[args.code]
+        if args.start or args.end:
+            start_day = days_from_keys([args.start])[0] if args.start else days[0]
+            end_day = days_from_keys([args.end])[0] if args.end else days[-1]
+            days, values = slice_range(days, values, start_day, end_day)
+        for item in monthly_items(days, values, code=args.code):
+            print(f"   {item['date']}: {item['value']}")
+
+
+if __name__ == "__main__":
+    main()
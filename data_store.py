@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Хранилище главного файла данных all_data_final.json
+
+- Запись атомарная: поток во временный файл рядом, fsync, os.replace.
+  При падении посередине записи старый файл остается целым.
+- Резервные копии - снимки без копирования байтов: reflink (FICLONE),
+  если его поддерживает ФС, иначе жесткая ссылка. Жесткая ссылка
+  безопасна, потому что запись всегда создает новый файл (новый inode),
+  а старый остается только в снимке. Хранятся последние keep_backups.
+- Сериализуются заново только изменившиеся инструменты: текст рядов
+  остальных инструментов копируется из исходного файла как есть.
+  Результат побайтно совпадает с json.dump(..., ensure_ascii=False, indent=2).
+"""
+
+import errno
+import fcntl
+import json
+import os
+import shutil
+from datetime import datetime
+
+FICLONE = 0x40049409  # linux/fs.h
+INDENT = 2
+
+_decoder = json.JSONDecoder()
+
+
+def _skip_ws(text, pos):
+    while text[pos] in ' \t\r\n':
+        pos += 1
+    return pos
+
+
+def _scan_series_spans(text):
+    """Позиции текста items для каждого ряда: {code: (start, end)}.
+
+    Обходим JSON, разбирая только ключи и скаляры; массив items ряда
+    пропускается одним raw_decode, чтобы узнать его конец.
+    """
+    spans = {}
+
+    def scan_value(pos):
+        pos = _skip_ws(text, pos)
+        if text[pos] == '{':
+            return scan_object(pos)
+        if text[pos] == '[':
+            return scan_array(pos)
+        _, end = _decoder.raw_decode(text, pos)
+        return end
+
+    def scan_array(pos):
+        pos = _skip_ws(text, pos + 1)
+        if text[pos] == ']':
+            return pos + 1
+        while True:
+            pos = _skip_ws(text, scan_value(pos))
+            if text[pos] == ']':
+                return pos + 1
+            pos += 1  # ','
+
+    def scan_object(pos):
+        code = None
+        items_span = None
+        pos = _skip_ws(text, pos + 1)
+        if text[pos] == '}':
+            return pos + 1
+        while True:
+            key, pos = _decoder.raw_decode(text, pos)
+            pos = _skip_ws(text, _skip_ws(text, pos) + 1)  # ':'
+            if key == 'code' and text[pos] == '"':
+                code, pos = _decoder.raw_decode(text, pos)
+            elif key == 'items' and text[pos] == '[':
+                first = _skip_ws(text, pos + 1)
+                if text[first] == '{' and _first_key(first) == 'date':
+                    _, end = _decoder.raw_decode(text, pos)
+                    items_span = (pos, end)
+                    pos = end
+                else:
+                    pos = scan_array(pos)
+            else:
+                pos = scan_value(pos)
+            pos = _skip_ws(text, pos)
+            if text[pos] == '}':
+                if code is not None and items_span is not None and code not in spans:
+                    spans[code] = items_span
+                return pos + 1
+            pos = _skip_ws(text, pos + 1)  # ','
+
+    def _first_key(pos):
+        pos = _skip_ws(text, pos + 1)
+        if text[pos] != '"':
+            return None
+        key, _ = _decoder.raw_decode(text, pos)
+        return key
+
+    scan_value(0)
+    return spans
+
+
+def _encode(value, level):
+    """Фрагмент json.dumps(indent=2) для значения на уровне вложенности level"""
+    encoded = json.dumps(value, ensure_ascii=False, indent=INDENT)
+    return encoded.replace('\n', '\n' + ' ' * (INDENT * level))
+
+
+class MainDataStore:
+    def __init__(self, path='data/all_data_final.json', backup_dir='data/backups', keep_backups=10):
+        self.path = path
+        self.backup_dir = backup_dir
+        self.keep_backups = keep_backups
+        self._text = None
+        self._spans = {}
+
+    def load(self):
+        """Читаем файл и запоминаем положение рядов для повторного использования"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self._text = f.read()
+        data = json.loads(self._text)
+        try:
+            self._spans = _scan_series_spans(self._text)
+        except (ValueError, IndexError):
+            self._spans = {}
+        return data
+
+    def snapshot(self):
+        """Снимок текущего файла в backup_dir. Возвращает путь снимка."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        name, ext = os.path.splitext(os.path.basename(self.path))
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        target = os.path.join(self.backup_dir, f"{name}.{stamp}{ext}")
+
+        if not _reflink(self.path, target):
+            try:
+                os.link(self.path, target)
+            except OSError:
+                # ФС без жестких ссылок - обычная копия
+                shutil.copy2(self.path, target)
+
+        self._prune_backups()
+        return target
+
+    def list_backups(self):
+        name, ext = os.path.splitext(os.path.basename(self.path))
+        if not os.path.isdir(self.backup_dir):
+            return []
+        return sorted(
+            os.path.join(self.backup_dir, entry)
+            for entry in os.listdir(self.backup_dir)
+            if entry.startswith(name + '.') and entry.endswith(ext)
+        )
+
+    def _prune_backups(self):
+        backups = self.list_backups()
+        for old in backups[:max(len(backups) - self.keep_backups, 0)]:
+            os.remove(old)
+
+    def save(self, main_data, changed_codes=None):
+        """Атомарная запись main_data.
+
+        changed_codes - коды инструментов, чьи items изменились после load();
+        None - сериализовать все заново. Возвращает (переиспользовано,
+        сериализовано) рядов.
+        """
+        stats = {'reused': 0, 'encoded': 0, 'spans': {}}
+        reusable = {} if changed_codes is None or self._text is None else {
+            code: span for code, span in self._spans.items() if code not in set(changed_codes)
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = os.path.join(directory, f".{os.path.basename(self.path)}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                writer = _CountingWriter(f)
+                self._write_value(writer, main_data, 0, reusable, stats, set())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        # Для следующего сохранения нужен текст нового файла и позиции рядов,
+        # которые уже посчитаны при записи - JSON заново не разбираем
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self._text = f.read()
+        self._spans = stats['spans']
+        return stats['reused'], stats['encoded']
+
+    def _write_value(self, f, value, level, reusable, stats, seen_codes):
+        """Потоковая запись в формате json.dump(indent=2)"""
+        pad = ' ' * (INDENT * (level + 1))
+        end_pad = ' ' * (INDENT * level)
+
+        if isinstance(value, dict) and value:
+            code = value.get('code')
+            items = value.get('items')
+            is_series = isinstance(items, list) and items and isinstance(items[0], dict) and 'date' in items[0]
+            f.write('{\n')
+            for k, (key, item) in enumerate(value.items()):
+                f.write(f"{pad}{json.dumps(key, ensure_ascii=False)}: ")
+                if key == 'items' and is_series:
+                    span_start = f.position
+                    if code in reusable and code not in seen_codes:
+                        start, end = reusable[code]
+                        f.write(self._text[start:end])
+                        stats['reused'] += 1
+                    else:
+                        f.write(_encode(item, level + 1))
+                        stats['encoded'] += 1
+                    if code not in seen_codes:
+                        stats['spans'][code] = (span_start, f.position)
+                    seen_codes.add(code)
+                else:
+                    self._write_value(f, item, level + 1, reusable, stats, seen_codes)
+                f.write(',\n' if k < len(value) - 1 else '\n')
+            f.write(f"{end_pad}}}")
+        elif isinstance(value, list) and value:
+            f.write('[\n')
+            for k, item in enumerate(value):
+                f.write(pad)
+                self._write_value(f, item, level + 1, reusable, stats, seen_codes)
+                f.write(',\n' if k < len(value) - 1 else '\n')
+            f.write(f"{end_pad}]")
+        else:
+            f.write(json.dumps(value, ensure_ascii=False))
+
+
+class _CountingWriter:
+    """Обертка файла, считающая записанные символы (позиции рядов в тексте)"""
+
+    def __init__(self, f):
+        self._f = f
+        self.position = 0
+
+    def write(self, chunk):
+        self._f.write(chunk)
+        self.position += len(chunk)
+
+
+def _reflink(source, target):
+    """Копия через FICLONE (btrfs, xfs): общие блоки, без копирования данных"""
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError as e:
+        if os.path.exists(target):
+            os.remove(target)
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EBADF):
+            return False
+        raise
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетный расчет вкладов: те же итоги и график начислений, что у
+калькулятора вкладов (hooks/useDepositCalculator.ts), для тысяч вкладов
+сразу
+
+Правила калькулятора:
+- без капитализации - простые проценты: каждый месяц сумма x ставка / 12;
+- с капитализацией (ежемесячно, ежеквартально, ежегодно) - сложный
+  процент (1 + ставка / число периодов в году) ^ (месяцев / месяцев
+  в периоде), в графике строка на каждый период, последняя - на конец
+  срока;
+- срок короче периода капитализации - как простые проценты, эффективная
+  ставка равна номинальной;
+- эффективная ставка - простая среднегодовая доходность, округленная до
+  сотых.
+
+Вклады пакета считаются матрицами (вклад x строка графика) без циклов
+по вкладам. iter_schedule дает график одного вклада построчно, не
+строя матриц.
+
+Вход - CSV со столбцами amount, rate, months, capitalization
+(none/monthly/quarterly/yearly), start_date (DD.MM.YYYY, необязательно)
+или сетка --amounts x --rates x --terms x --periods.
+
+Запуск: python deposit_engine.py [deposits.csv] --output quotes.csv [--schedules schedules.csv]
+        [--amounts 100000,1000000] [--rates 5,10.5] [--terms 1-60]
+        [--periods none,monthly,quarterly,yearly] [--start-date 01.01.2025]
+"""
+
+import argparse
+import csv
+import math
+import os
+import time
+
+import numpy as np
+
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics
+from scenario_engine import parse_horizons
+
+# Месяцев в периоде капитализации; 0 - без капитализации
+PERIOD_MONTHS = {'none': 0, 'monthly': 1, 'quarterly': 3, 'yearly': 12}
+PERIOD_NAMES = {months: name for name, months in PERIOD_MONTHS.items()}
+
+# Ограничения полей калькулятора (validateAmount, validateTerm, validateRate)
+MIN_AMOUNT, MAX_AMOUNT = 1, 10_000_000
+MAX_MONTHS = 60
+MIN_RATE, MAX_RATE = 0.01, 50
+
+# Вкладов в одном блоке матриц: блок x 60 строк графика на массив
+CHUNK_SIZE = 20_000
+
+QUOTE_COLUMNS = ('amount', 'rate', 'months', 'capitalization', 'total', 'profit', 'effective_rate',
+                 'total_interest', 'rows')
+SCHEDULE_COLUMNS = ('deposit', 'row', 'date', 'interest', 'balance', 'is_capitalization')
+
+
+def period_codes(periods):
+    """'monthly'/'quarterly'/'yearly'/'none'/None или месяцы -> массив месяцев в периоде"""
+    periods = np.asarray(periods)
+    if periods.dtype.kind in 'iu':
+        return periods.astype(np.int64)
+    return np.array([
+        PERIOD_MONTHS[period or 'none'] if period is None or isinstance(period, str) else int(period)
+        for period in np.atleast_1d(periods.astype(object)).ravel()
+    ], dtype=np.int64).reshape(periods.shape)
+
+
+def valid_inputs(amounts, rates, months):
+    """Маска вкладов, которые калькулятор принял бы без ошибок валидации"""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    months = np.asarray(months, dtype=np.int64)
+    return ((amounts >= MIN_AMOUNT) & (amounts <= MAX_AMOUNT)
+            & (months > 0) & (months <= MAX_MONTHS)
+            & (rates >= MIN_RATE) & (rates <= MAX_RATE))
+
+
+def _js_round2(values):
+    # Math.round(x * 100) / 100: половина округляется вверх, а не к четному
+    return np.floor(values * 100 + 0.5) / 100
+
+
+def _prepare(amounts, rates, months, periods):
+    amounts, rates, months, period_months = (np.ravel(values) for values in np.broadcast_arrays(
+        np.asarray(amounts, dtype=np.float64),
+        np.asarray(rates, dtype=np.float64),
+        np.asarray(months, dtype=np.int64),
+        period_codes(periods),
+    ))
+    # Срок короче периода - капитализации нет, как и при ее отключении
+    compound = (period_months > 0) & (months >= period_months)
+    step = np.where(compound, period_months, 1)
+    rows = np.where(compound, -(-months // step), months)
+    return amounts, rates, months, period_months, compound, step, rows
+
+
+def _schedule_block(amounts, rates, months, compound, step, rows):
+    """Матрицы графика (вклад x строка) для блока вкладов"""
+    row_numbers = np.arange(1, max(int(rows.max()), 1) + 1)
+    valid = row_numbers <= rows[:, None]
+    offsets = np.minimum(row_numbers * step[:, None], months[:, None])
+
+    monthly_profit = amounts * (rates / 100) / 12
+    simple_balance = amounts[:, None] + monthly_profit[:, None] * row_numbers
+    # 1 + r/12, 1 + r/4, 1 + r в степени число периодов (дробное для неполного)
+    base = 1 + rates / 100 / (12 // step)
+    with np.errstate(over='ignore'):
+        compound_balance = amounts[:, None] * base[:, None] ** (offsets / step[:, None])
+    balance = np.where(compound[:, None], compound_balance, simple_balance)
+
+    previous = np.concatenate([amounts[:, None], balance[:, :-1]], axis=1)
+    interest = np.where(compound[:, None], balance - previous, monthly_profit[:, None])
+    return offsets, interest, balance, valid
+
+
+def _quote_block(amounts, rates, months, compound, step, rows):
+    offsets, interest, balance, valid = _schedule_block(amounts, rates, months, compound, step, rows)
+    years = months / 12
+    monthly_profit = amounts * (rates / 100) / 12
+    with np.errstate(over='ignore'):
+        compound_total = amounts * (1 + rates / 100 / (12 // step)) ** (months / step)
+    total = np.where(compound, compound_total, amounts + monthly_profit * months)
+    profit = np.where(compound, total - amounts, monthly_profit * months)
+    # Без капитализации ставка пересчитывается, при отказе от нее из-за срока - номинальная
+    effective_rate = _js_round2(profit / amounts / years * 100)
+    # Сумма начислений в порядке строк, как reduce в калькуляторе
+    counted = np.where(valid & (interest > 0), interest, 0.0)
+    total_interest = np.cumsum(counted, axis=1)[:, -1]
+    return total, profit, effective_rate, total_interest
+
+
+def quote_batch(amounts, rates, months, periods, chunk_size=CHUNK_SIZE):
+    """Итоги по вкладам: total, profit, effective_rate, total_interest, rows.
+
+    amounts, rates (% годовых), months, periods (названия или месяцы в
+    периоде) приводятся друг к другу по правилам broadcasting.
+    """
+    amounts, rates, months, period_months, compound, step, rows = _prepare(amounts, rates, months, periods)
+    count = len(amounts)
+    result = {name: np.empty(count) for name in ('total', 'profit', 'effective_rate', 'total_interest')}
+    for first in range(0, count, chunk_size):
+        block = slice(first, first + chunk_size)
+        values = _quote_block(amounts[block], rates[block], months[block], compound[block], step[block],
+                              rows[block])
+        for name, column in zip(('total', 'profit', 'effective_rate', 'total_interest'), values):
+            result[name][block] = column
+    fallback = (period_months > 0) & ~compound
+    result['effective_rate'] = np.where(fallback, rates, result['effective_rate'])
+    result.update(amount=amounts, rate=rates, months=months, period_months=period_months,
+                  compound=compound, rows=rows)
+    return result
+
+
+def to_days(dates):
+    """'DD.MM.YYYY' или datetime64 -> datetime64[D]"""
+    dates = np.atleast_1d(np.asarray(dates))
+    if dates.dtype.kind in 'OUS':
+        dates = np.array([f"{d[6:10]}-{d[3:5]}-{d[0:2]}" for d in dates], dtype='datetime64[D]')
+    return dates.astype('datetime64[D]')
+
+
+def add_months(start_days, offsets):
+    """Дата через offsets месяцев как Date.setMonth: 31.01 + 1 месяц -> 02.03 или 03.03"""
+    month = start_days.astype('datetime64[M]')
+    day = start_days - month.astype('datetime64[D]')
+    return (month[..., None] + offsets).astype('datetime64[D]') + day[..., None]
+
+
+def schedule_batch(amounts, rates, months, periods, start_dates):
+    """Полные графики пакета вкладов: матрицы (вклад x строка) dates,
+    interest, balance, is_capitalization и маска valid существующих строк.
+
+    Начальная строка (дата открытия, сумма вклада) в матрицы не входит.
+    """
+    amounts, rates, months, period_months, compound, step, rows = _prepare(amounts, rates, months, periods)
+    offsets, interest, balance, valid = _schedule_block(amounts, rates, months, compound, step, rows)
+    start_days = np.broadcast_to(to_days(start_dates), amounts.shape)
+    return {
+        'dates': add_months(start_days, offsets),
+        'interest': interest,
+        'balance': balance,
+        'is_capitalization': np.broadcast_to(compound[:, None], valid.shape),
+        'valid': valid,
+    }
+
+
+def format_date(day):
+    iso = str(day)
+    return f"{iso[8:10]}.{iso[5:7]}.{iso[0:4]}"
+
+
+def iter_schedule(amount, rate, months, period, start_date):
+    """График одного вклада построчно, с начальной строкой, как ScheduleItem"""
+    start = to_days([start_date])
+    period_months = int(period_codes([period])[0])
+    compound = period_months > 0 and months >= period_months
+    step = period_months if compound else 1
+    rows = -(-months // step)
+    # Даты всех строк одним вызовом, суммы - по мере обхода
+    dates = [format_date(day) for day in add_months(start, np.minimum(np.arange(1, rows + 1) * step, months))[0]]
+    yield {'date': format_date(start[0]), 'interest': 0, 'balance': amount, 'isCapitalization': False}
+
+    if compound:
+        base = 1 + rate / 100 / (12 // period_months)
+        previous = amount
+        for row, date in enumerate(dates, 1):
+            balance = amount * math.pow(base, min(row * period_months, months) / period_months)
+            yield {'date': date, 'interest': balance - previous, 'balance': balance, 'isCapitalization': True}
+            previous = balance
+    else:
+        monthly_profit = amount * (rate / 100) / 12
+        for row, date in enumerate(dates, 1):
+            yield {'date': date, 'interest': monthly_profit, 'balance': amount + monthly_profit * row,
+                   'isCapitalization': False}
+
+
+def read_deposits(path):
+    """CSV вкладов -> (amounts, rates, months, periods, start_dates)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    return (
+        np.array([float(row['amount']) for row in rows]),
+        np.array([float(row['rate'].replace(',', '.')) for row in rows]),
+        np.array([int(row['months']) for row in rows], dtype=np.int64),
+        period_codes([row.get('capitalization') or 'none' for row in rows]),
+        np.array([row.get('start_date') or '' for row in rows], dtype=object),
+    )
+
+
+def grid_deposits(amounts, rates, terms, periods):
+    """Все сочетания сумма x ставка x срок x капитализация"""
+    grids = np.meshgrid(np.asarray(amounts, dtype=np.float64), np.asarray(rates, dtype=np.float64),
+                        np.asarray(terms, dtype=np.int64), period_codes(periods), indexing='ij')
+    return tuple(grid.ravel() for grid in grids)
+
+
+def write_quotes(path, quotes):
+    tmp_path = path + '.tmp'
+    names = np.array([PERIOD_NAMES.get(months, str(months)) for months in range(13)], dtype=object)
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(QUOTE_COLUMNS) + '\n')
+        rows = zip(quotes['amount'].tolist(), quotes['rate'].tolist(), quotes['months'].tolist(),
+                   names[quotes['period_months']].tolist(), quotes['total'].tolist(), quotes['profit'].tolist(),
+                   quotes['effective_rate'].tolist(), quotes['total_interest'].tolist(), quotes['rows'].tolist())
+        f.write(''.join(['%.2f,%g,%d,%s,%.2f,%.2f,%.2f,%.2f,%d\n' % values for values in rows]))
+    os.replace(tmp_path, path)
+
+
+def write_schedules(path, amounts, rates, months, periods, start_dates, chunk_size=CHUNK_SIZE):
+    """Графики всех вкладов в CSV блоками: в памяти только матрицы блока"""
+    tmp_path = path + '.tmp'
+    written = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(SCHEDULE_COLUMNS) + '\n')
+        for first in range(0, len(amounts), chunk_size):
+            block = slice(first, first + chunk_size)
+            schedule = schedule_batch(amounts[block], rates[block], months[block], periods[block],
+                                      start_dates[block])
+            deposit, row = np.nonzero(schedule['valid'])
+            iso = np.datetime_as_string(schedule['dates'][deposit, row], unit='D').tolist()
+            rows = zip((deposit + first).tolist(), (row + 1).tolist(),
+                       [f"{d[8:10]}.{d[5:7]}.{d[0:4]}" for d in iso],
+                       schedule['interest'][deposit, row].tolist(), schedule['balance'][deposit, row].tolist(),
+                       schedule['is_capitalization'][deposit, row].astype(np.int8).tolist())
+            f.write(''.join(['%d,%d,%s,%.2f,%.2f,%d\n' % values for values in rows]))
+            written += len(deposit)
+    os.replace(tmp_path, path)
+    return written
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('deposits', nargs='?', help='CSV вкладов; без него - сетка параметров')
+    arg_parser.add_argument('--output', help='CSV итогов по вкладам')
+    arg_parser.add_argument('--schedules', help='CSV графиков начислений всех вкладов')
+    arg_parser.add_argument('--amounts', default='100000,1000000', help='суммы через запятую')
+    arg_parser.add_argument('--rates', default='5,10,15,20', help='ставки, %% годовых, через запятую')
+    arg_parser.add_argument('--terms', default='1-60', help='сроки в месяцах: 1-60 или 3,6,12')
+    arg_parser.add_argument('--periods', default='none,monthly,quarterly,yearly', help='капитализация')
+    arg_parser.add_argument('--start-date', default=time.strftime('%d.%m.%Y'),
+                            help='дата открытия для сетки и строк CSV без start_date')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    if args.deposits:
+        amounts, rates, months, periods, start_dates = read_deposits(args.deposits)
+        start_dates[start_dates == ''] = args.start_date
+    else:
+        amounts, rates, months, periods = grid_deposits(
+            [float(value) for value in args.amounts.split(',')],
+            [float(value) for value in args.rates.split(',')],
+            parse_horizons(args.terms), args.periods.split(','))
+        start_dates = np.full(len(amounts), args.start_date, dtype=object)
+
+    valid = valid_inputs(amounts, rates, months)
+    if not valid.all():
+        print(f"⚠️ Пропущено вкладов с недопустимыми параметрами: {int((~valid).sum())}")
+        amounts, rates, months, periods, start_dates = (
+            values[valid] for values in (amounts, rates, months, periods, start_dates))
+
+    start = time.perf_counter()
+    with metrics.span('deposits.quote', rows=len(amounts)):
+        quotes = quote_batch(amounts, rates, months, periods)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(amounts)} вкладов за {elapsed * 1000:.1f} мс "
+          f"({len(amounts) / max(elapsed, 1e-9):,.0f} в секунду)")
+
+    if args.output:
+        with metrics.span('deposits.write_quotes'):
+            write_quotes(args.output, quotes)
+        print(f"💾 {args.output}: {os.path.getsize(args.output)} байт")
+    if args.schedules:
+        with metrics.span('deposits.write_schedules') as span:
+            span['rows'] = write_schedules(args.schedules, amounts, rates, months, periods,
+                                           to_days(start_dates))
+        print(f"💾 {args.schedules}: {span['rows']} строк графиков, {os.path.getsize(args.schedules)} байт")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import { 
+  fetchComputedProfitability,
   fetchProfitabilityData, 
   formatDateForApi,
   parseApiDate,
@@ -9,6 +10,11 @@ import {
   calculateInflationAdjustedProfitability,
   type ProfitabilityDataResponse
 } from '../services/profitabilityDataService';
+import { chartToRows } from '../utils/profitabilityCompute';
+
+// Расчет на сервере (/api/profitability-compute) вместо загрузки рядов.
+// Работает только с сервером Next.js: в статическом экспорте API роутов нет
+const USE_SERVER_COMPUTE = process.env.NEXT_PUBLIC_PROFITABILITY_COMPUTE_API === '1';
 
 // Типы для ошибок валидации
 interface ProfitabilityErrors {
@@ -293,6 +299,18 @@ export const useProfitabilityCalculator = (): {
           endDateFormatted: formatDateForApi(endDate)
         });
         
+        if (USE_SERVER_COMPUTE) {
+          const computed = await fetchComputedProfitability({
+            ...requestData,
+            instruments: instruments.filter(instrument => instrument !== 'inflation'),
+            amount: numAmount,
+            inflation: inflationEnabled,
+          });
+          setResults(computed.results);
+          setMonthlyChartData(chartToRows(computed.chart));
+          return;
+        }
+
         const apiData = await fetchProfitabilityData(requestData);
         
         console.log('📊 Received data:', {
@@ -394,6 +412,12 @@ export const useProfitabilityCalculator = (): {
 
         // Генерируем данные для графика
         if (newResults.length > 0 && newResults[0].monthlyData) {
+          // Инфляция сортируется один раз, а не на каждый месяц графика
+          const sortedInflationData = apiData.inflation
+            ? [...apiData.inflation].sort((a, b) => 
+                parseApiDate(a.date).getTime() - parseApiDate(b.date).getTime()
+              )
+            : [];
           const months = newResults[0].monthlyData.map(d => d.month);
           allMonthlyData = months.map((month, monthIndex) => {
             const chartDataPoint: MonthlyChartData = { month };
@@ -407,19 +431,12 @@ export const useProfitabilityCalculator = (): {
                   
                   // Линия с учетом инфляции (если включено и есть данные)
                   if (inflationEnabled && result.inflationAdjustedProfit !== undefined && apiData.inflation) {
-                    // Сортируем данные инфляции по дате для корректного расчета
-                    const sortedInflationData = [...apiData.inflation].sort((a, b) => 
-                      parseApiDate(a.date).getTime() - parseApiDate(b.date).getTime()
-                    );
-                    
                     // НОВАЯ ЛОГИКА: рассчитываем накопленную инфляцию через индексы
                     // Берем данные инфляции от начала периода до текущего месяца включительно
-                    const currentMonthInflationData = sortedInflationData.slice(0, monthIndex + 1);
-                    
-                    if (currentMonthInflationData.length > 0) {
+                    if (sortedInflationData.length > 0) {
                       // Накопленная инфляция = текущий индекс / начальный индекс
-                      const startInflationIndex = currentMonthInflationData[0].value;
-                      const currentInflationIndex = currentMonthInflationData[currentMonthInflationData.length - 1].value;
+                      const startInflationIndex = sortedInflationData[0].value;
+                      const currentInflationIndex = sortedInflationData[Math.min(monthIndex, sortedInflationData.length - 1)].value;
                       const cumulativeInflationMultiplier = currentInflationIndex / startInflationIndex;
                       
                       // Применяем правильную формулу реальной доходности
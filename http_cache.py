@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальный кэш HTTP ответов для парсеров ЦБ РФ
+
+Тела ответов хранятся по содержимому (objects/<sha256>), индекс
+index.json связывает URL с телом, ETag/Last-Modified и временем
+загрузки. Одинаковые файлы по разным URL занимают место один раз.
+Записи старше ttl считаются устаревшими (в офлайн-режиме отдаются все
+равно), при превышении max_bytes удаляются давно не использованные.
+По умолчанию ttl = 0: кэш не отвечает вместо сервера, а дает ETag и
+Last-Modified для условного GET и тело при 304; свежесть без проверки
+включается явно (--cache-ttl).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class HttpCache:
+    def __init__(self, cache_dir='data/http_cache', ttl=0, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        """Атомарно сохраняем индекс на диск"""
+        with self._lock:
+            tmp_file = self.index_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.index_file)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest)
+
+    def lookup(self, url, allow_stale=False):
+        """Запись кэша для URL или None.
+
+        Свежая запись (или любая при allow_stale) считается попаданием;
+        устаревшую запись возвращаем тоже - по ней можно сделать условный GET.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None or not os.path.exists(self._object_path(entry['sha256'])):
+                self.stats['misses'] += 1
+                return None
+            entry['last_access'] = time.time()
+            fresh = time.time() - entry['fetched_at'] < self.ttl
+            if fresh or allow_stale:
+                self.stats['hits'] += 1
+            else:
+                self.stats['stale'] += 1
+            return dict(entry, fresh=fresh or allow_stale)
+
+    def read_text(self, entry, encoding='utf-8'):
+        with open(self._object_path(entry['sha256']), 'rb') as f:
+            return f.read().decode(entry.get('encoding') or encoding, errors='replace')
+
+    def materialize(self, entry, target):
+        """Тело записи в файл target (жесткая ссылка, иначе копия)"""
+        source = self._object_path(entry['sha256'])
+        tmp_target = target + '.cache'
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+        try:
+            os.link(source, tmp_target)
+        except OSError:
+            shutil.copyfile(source, tmp_target)
+        os.replace(tmp_target, target)
+
+    def store_bytes(self, url, body, headers=None, encoding=None, status=200):
+        """Кладем в кэш тело ответа; ошибки (404) кэшируются с пустым телом"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        self._remember(url, digest, len(body), headers, encoding, status)
+        return digest
+
+    def store_file(self, url, filepath, headers=None):
+        """Кладем в кэш уже скачанный файл без повторного чтения в память"""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            tmp_path = path + '.tmp'
+            try:
+                os.link(filepath, tmp_path)
+            except OSError:
+                shutil.copyfile(filepath, tmp_path)
+            os.replace(tmp_path, path)
+        self._remember(url, digest, os.path.getsize(filepath), headers, None, 200)
+        return digest
+
+    def touch(self, url):
+        """Сервер подтвердил, что ресурс не изменился (304)"""
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is not None:
+                entry['fetched_at'] = time.time()
+
+    def _remember(self, url, digest, size, headers, encoding, status):
+        headers = headers or {}
+        now = time.time()
+        with self._lock:
+            self._index[url] = {
+                'status': status,
+                'sha256': digest,
+                'size': size,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'encoding': encoding,
+                'fetched_at': now,
+                'last_access': now,
+            }
+            self.stats['stored'] += 1
+            self._evict()
+
+    def _evict(self):
+        """LRU по last_access, пока объем объектов больше max_bytes"""
+        sizes = {}
+        for entry in self._index.values():
+            sizes[entry['sha256']] = entry['size']
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            del self._index[url]
+            self.stats['evicted'] += 1
+            digest = entry['sha256']
+            # Объект удаляем, только если на него больше никто не ссылается
+            if not any(other['sha256'] == digest for other in self._index.values()):
+                total -= sizes[digest]
+                path = self._object_path(digest)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def hit_rate(self):
+        requests_total = self.stats['hits'] + self.stats['stale'] + self.stats['misses']
+        return self.stats['hits'] / requests_total if requests_total else 0.0
+
+    def report(self):
+        return (f"попаданий {self.stats['hits']}, устаревших {self.stats['stale']}, "
+                f"промахов {self.stats['misses']}, hit rate {self.hit_rate() * 100:.0f}%")
@@ -1,11 +1,27 @@
+import argparse
+import hashlib
+import numpy as np
 import pandas as pd
 import json
 import os
+import re
+from openpyxl import load_workbook
+
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics, profiled
 
 # Путь к локальному файлу с данными об инфляции
 file_path = 'ipc_mes_04-2025.xlsx'
+# Результат и состояние инкрементальной загрузки
+output_file = 'inflation_data.json'
+state_file = 'inflation_state.json'
+
+MONTH_NAMES = ['январь', 'февраль', 'март', 'апрель', 'май', 'июнь', 
+               'июль', 'август', 'сентябрь', 'октябрь', 'ноябрь', 'декабрь']
+# Месяц строки - первое по положению название в подписи; одно правило для полного и инкрементального разбора
+MONTH_PATTERN = re.compile('(' + '|'.join(MONTH_NAMES) + ')')
+MONTH_NUMBERS = {month: k + 1 for k, month in enumerate(MONTH_NAMES)}
 
-def parse_inflation_data():
+def parse_inflation_data(file_path=file_path):
     try:
         # Проверяем, что файл существует
         if not os.path.exists(file_path):
@@ -15,85 +31,28 @@ def parse_inflation_data():
         print(f"Читаю данные из файла: {file_path}")
         
         # Читаем лист с общими индексами потребительских цен
-        df = pd.read_excel(file_path, sheet_name='01', engine='openpyxl')
+        with profiled('inflation_read_excel'), metrics.span('inflation.read_excel', file=os.path.basename(file_path)) as span:
+            df = pd.read_excel(file_path, sheet_name='01', engine='openpyxl')
+            span['rows'] = len(df)
+            span['bytes'] = os.path.getsize(file_path)
         
         print("Исходные данные:")
         print(df.head(15))
         
-        # Находим строку с годами (обычно это 2-3 строка)
-        years_row_idx = None
-        for i, row in df.iterrows():
-            # Ищем строку, где есть числа больше 1990 (годы)
-            for col in df.columns:
-                try:
-                    val = row[col]
-                    if pd.notna(val) and isinstance(val, (int, float)) and 1990 <= val <= 2030:
-                        years_row_idx = i
-                        break
-                except:
-                    continue
-            if years_row_idx is not None:
-                break
-        
-        if years_row_idx is None:
+        with metrics.span('inflation.extract') as span:
+            inflation_data = extract_inflation_points(df)
+            span['rows'] = len(inflation_data or {})
+        if inflation_data is None:
             print("Не удалось найти строку с годами")
             return None
-            
-        print(f"Строка с годами найдена на позиции: {years_row_idx}")
-        
-        # Извлекаем годы
-        years_row = df.iloc[years_row_idx]
-        years = []
-        year_columns = []
-        
-        for col in df.columns:
-            val = years_row[col]
-            if pd.notna(val) and isinstance(val, (int, float)) and 1990 <= val <= 2030:
-                years.append(int(val))
-                year_columns.append(col)
-        
-        print(f"Найденные годы: {years}")
-        
-        # Находим строки с месяцами
-        month_names = ['январь', 'февраль', 'март', 'апрель', 'май', 'июнь', 
-                      'июль', 'август', 'сентябрь', 'октябрь', 'ноябрь', 'декабрь']
-        
-        inflation_data = {}
-        
-        for i, row in df.iterrows():
-            month_name = None
-            if pd.notna(row.iloc[0]):
-                row_name = str(row.iloc[0]).lower().strip()
-                for month in month_names:
-                    if month in row_name:
-                        month_name = month
-                        break
-            
-            if month_name:
-                month_idx = month_names.index(month_name) + 1
-                print(f"Обрабатываю месяц: {month_name} ({month_idx})")
-                
-                # Извлекаем данные по годам для этого месяца
-                for j, col in enumerate(year_columns):
-                    if j < len(years):
-                        year = years[j]
-                        value = row[col]
-                        
-                        if pd.notna(value) and isinstance(value, (int, float)):
-                            # Конвертируем индекс в проценты и затем в доли
-                            # Например: 101.23 -> 1.23% -> 0.0123
-                            inflation_rate = (value - 100) / 100
-                            key = f"{year}-{month_idx:02d}"
-                            inflation_data[key] = inflation_rate
-                            print(f"  {key}: {value} -> {inflation_rate:.4f}")
         
         # Отсортируем по датам
         inflation_data = dict(sorted(inflation_data.items()))
         
         # Сохраняем в JSON
-        output_file = 'inflation_data.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(inflation_data, f, ensure_ascii=False, indent=2)
+        with metrics.span('inflation.json_dump'):
+            save_inflation_data(inflation_data)
+            save_state(file_fingerprint(file_path), inflation_data)
         
         print(f'\n✅ Готово! Данные сохранены в {output_file}')
         print(f'Всего записей: {len(inflation_data)}')
@@ -112,5 +71,187 @@ def parse_inflation_data():
         traceback.print_exc()
         return None
 
+def extract_inflation_points(df):
+    """Векторное извлечение {YYYY-MM: доля} из листа Росстата.
+
+    Строка годов ищется по числовой маске 1990..2030, строки месяцев -
+    одним строковым сопоставлением по первому столбцу, значения
+    извлекаются одним reshape матрицы (месяц x год).
+    """
+    # Только настоящие числа: строки и прочее превращаются в NaN
+    numeric = df.apply(pd.to_numeric, errors='coerce')
+    mixed_cols = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+    if mixed_cols:
+        mixed = df[mixed_cols]
+        # DataFrame.map есть с pandas 2.1, в более ранних - applymap
+        elementwise = mixed.map if hasattr(mixed, 'map') else mixed.applymap
+        numeric[mixed_cols] = numeric[mixed_cols].where(elementwise(lambda v: not isinstance(v, (str, bool))))
+
+    # Находим строку с годами (обычно это 2-3 строка)
+    year_mask = (numeric >= 1990) & (numeric <= 2030)
+    rows_with_years = year_mask.to_numpy().any(axis=1)
+    if not rows_with_years.any():
+        return None
+    years_row_pos = int(rows_with_years.argmax())
+    print(f"Строка с годами найдена на позиции: {years_row_pos}")
+
+    year_cols = year_mask.to_numpy()[years_row_pos]
+    years = numeric.iloc[years_row_pos, year_cols].astype(int).to_numpy()
+    print(f"Найденные годы: {years.tolist()}")
+
+    # Находим строки с месяцами
+    first_col = df.iloc[:, 0].astype('string').str.lower().str.strip()
+    month_match = first_col.str.extract(MONTH_PATTERN.pattern, expand=False)
+    month_rows = month_match.notna().to_numpy()
+    month_idx = month_match[month_rows].map(MONTH_NUMBERS).to_numpy()
+    print(f"Найдено строк с месяцами: {int(month_rows.sum())}")
+
+    # Матрица (месяц x год) -> длинная таблица
+    values = numeric.to_numpy(dtype=float)[np.ix_(month_rows, year_cols)]
+    month_grid = np.repeat(month_idx, len(years))
+    year_grid = np.tile(years, len(month_idx))
+    flat = values.ravel()
+    valid = ~np.isnan(flat)
+
+    # Конвертируем индекс в проценты и затем в доли
+    # Например: 101.23 -> 1.23% -> 0.0123
+    rates = (flat[valid] - 100) / 100
+    keys = [f"{y}-{m:02d}" for y, m in zip(year_grid[valid].tolist(), month_grid[valid].tolist())]
+    # При повторе месяца побеждает нижняя строка, как и раньше
+    return dict(zip(keys, rates.tolist()))
+
+def save_inflation_data(inflation_data):
+    """Атомарная запись inflation_data.json"""
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(inflation_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, output_file)
+
+def file_fingerprint(path):
+    """SHA-256 файла для определения изменений"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_state():
+    """Состояние прошлого разбора; пустое, если файла нет или он поврежден"""
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        print(f"⚠️  {state_file} поврежден — состояние сброшено")
+        return {}
+
+def save_state(fingerprint, inflation_data):
+    state = {
+        'fingerprint': fingerprint,
+        'last_key': max(inflation_data) if inflation_data else None,
+    }
+    # Атомарно, как inflation_data.json: оборванная запись не портит состояние
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, state_file)
+
+def _is_year(val):
+    return isinstance(val, (int, float)) and not isinstance(val, bool) and 1990 <= val <= 2030
+
+def month_number(label):
+    """Номер месяца по подписи строки листа, None - строка не месяц"""
+    match = MONTH_PATTERN.search(str(label).lower().strip())
+    return MONTH_NUMBERS[match.group(1)] if match else None
+
+def read_new_points(file_path, since_year):
+    """Потоковое чтение листа '01' только по столбцам годов >= since_year"""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb['01']
+        rows = ws.iter_rows(values_only=True)
+
+        # Строка с годами
+        year_columns = None
+        for row in rows:
+            year_columns = [(j, int(val)) for j, val in enumerate(row) if _is_year(val)]
+            if year_columns:
+                break
+        if not year_columns:
+            return None
+
+        new_columns = [(j, year) for j, year in year_columns if year >= since_year]
+        points = {}
+        if not new_columns:
+            return points
+
+        # Строки с месяцами: берем только новые столбцы
+        for row in rows:
+            if not row or row[0] is None:
+                continue
+            month_idx = month_number(row[0])
+            if month_idx is None:
+                continue
+            for j, year in new_columns:
+                value = row[j] if j < len(row) else None
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    points[f"{year}-{month_idx:02d}"] = (value - 100) / 100
+        return points
+    finally:
+        wb.close()
+
+def parse_inflation_incremental(file_path=file_path):
+    """Инкрементальная загрузка: дочитываем только новые месяцы"""
+    if not os.path.exists(file_path):
+        print(f"Файл {file_path} не найден!")
+        return None
+
+    fingerprint = file_fingerprint(file_path)
+    state = load_state()
+
+    if not state.get('last_key') or not os.path.exists(output_file):
+        print("Нет сохраненного состояния — выполняю полный разбор")
+        return parse_inflation_data(file_path)
+
+    with open(output_file, 'r', encoding='utf-8') as f:
+        inflation_data = json.load(f)
+
+    if state.get('fingerprint') == fingerprint:
+        print(f"⏭️ Файл {file_path} не изменился, последний месяц: {state['last_key']}")
+        return inflation_data
+
+    # Перечитываем год последней точки целиком: Росстат уточняет значения
+    since_year = int(state['last_key'][:4])
+    with metrics.span('inflation.read_new_points', file=os.path.basename(file_path)) as span:
+        points = read_new_points(file_path, since_year)
+        span['rows'] = len(points or {})
+    if points is None:
+        print("Не удалось найти строку с годами")
+        return None
+
+    added = [key for key in points if key not in inflation_data]
+    inflation_data.update(points)
+    inflation_data = dict(sorted(inflation_data.items()))
+
+    with metrics.span('inflation.json_dump'):
+        save_inflation_data(inflation_data)
+        save_state(fingerprint, inflation_data)
+
+    print(f"✅ Добавлено новых месяцев: {len(added)} {sorted(added)}")
+    print(f"Всего записей: {len(inflation_data)}")
+    return inflation_data
+
 if __name__ == "__main__":
-    parse_inflation_data() 
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description='Парсер инфляции Росстата')
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help='дочитать только новые месяцы в существующий inflation_data.json')
+    arg_parser.add_argument('--file', default=file_path, help='путь к файлу Росстата')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    if args.incremental:
+        parse_inflation_incremental(args.file)
+    else:
+        parse_inflation_data(args.file)
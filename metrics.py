@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Метрики и профилирование скриптов обновления данных
+
+- metrics.span(имя, **метки) - замер времени блока; в конце пишется
+  строка JSON с длительностью, пиком RSS процесса и полями, которые блок
+  добавил в словарь span (rows, bytes, peak_bytes...).
+- metrics.count(имя, значение, **метки) - счетчики (байты, строки).
+- Приемник - файл JSON lines (CALC_METRICS_FILE). Дочерние процессы
+  наследуют переменную окружения и дописывают в тот же файл.
+- write_prometheus(jsonl, prom) сворачивает JSON lines в textfile для
+  node exporter (textfile collector).
+- profiled(имя) - cProfile и tracemalloc для горячих участков, если
+  задан каталог CALC_PROFILE_DIR (флаг --profile).
+
+Запуск: python metrics.py run.jsonl --prometheus data/calc.prom
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+METRICS_ENV = 'CALC_METRICS_FILE'
+PROFILE_ENV = 'CALC_PROFILE_DIR'
+PROMETHEUS_PREFIX = 'calc'
+
+
+def peak_rss_bytes():
+    """Пик резидентной памяти процесса (ru_maxrss в Linux - в килобайтах)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metrics:
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, kind, name, value, **fields):
+        if not self.path:
+            return
+        record = {
+            'ts': round(time.time(), 3),
+            'pid': os.getpid(),
+            'kind': kind,
+            'name': name,
+            'value': value,
+        }
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        # Одна запись в режиме append - строки разных процессов не перемешиваются
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Замер блока; в отданный словарь можно дописать rows, bytes и т.п."""
+        fields = dict(labels)
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield fields
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            self.emit('span', name, round(time.perf_counter() - start, 6),
+                      status=status, peak_rss_bytes=peak_rss_bytes(), **fields)
+
+    def count(self, name, value=1, **labels):
+        self.emit('counter', name, value, **labels)
+
+    def gauge(self, name, value, **labels):
+        self.emit('gauge', name, value, **labels)
+
+
+metrics = Metrics(os.environ.get(METRICS_ENV))
+
+
+def configure(metrics_file=None, profile_dir=None):
+    """Включаем метрики и профилирование для процесса и его дочерних процессов"""
+    if metrics_file:
+        directory = os.path.dirname(os.path.abspath(metrics_file))
+        os.makedirs(directory, exist_ok=True)
+        metrics_file = os.path.abspath(metrics_file)
+        os.environ[METRICS_ENV] = metrics_file
+        metrics.path = metrics_file
+    if profile_dir:
+        profile_dir = os.path.abspath(profile_dir)
+        os.makedirs(profile_dir, exist_ok=True)
+        os.environ[PROFILE_ENV] = profile_dir
+
+
+def enabled():
+    """Включены ли метрики или профилирование: дорогие замеры (tracemalloc) только тогда"""
+    return bool(metrics.path or os.environ.get(PROFILE_ENV))
+
+
+def add_arguments(arg_parser):
+    """Общие флаги --metrics и --profile для CLI скриптов"""
+    arg_parser.add_argument('--metrics', metavar='FILE',
+                            help='писать метрики этапов в FILE (JSON lines)')
+    arg_parser.add_argument('--profile', metavar='DIR',
+                            help='сохранить cProfile и tracemalloc горячих этапов в DIR')
+
+
+@contextmanager
+def profiled(name, top=25):
+    """cProfile + tracemalloc для блока, если задан CALC_PROFILE_DIR.
+
+    В DIR пишутся <name>.prof (для snakeviz/pstats) и <name>.txt:
+    топ функций по cumulative time и топ строк по выделенной памяти.
+    """
+    profile_dir = os.environ.get(PROFILE_ENV)
+    if not profile_dir:
+        yield
+        return
+
+    # Вложенные замеры (tracemalloc по файлам) не ломаем: трассировку
+    # запускаем, только если ее еще нет
+    own_tracing = not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if own_tracing:
+            tracemalloc.stop()
+
+        base = os.path.join(profile_dir, f"{name}.{os.getpid()}")
+        profiler.dump_stats(base + '.prof')
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+        if snapshot is not None:
+            report.write(f"\nТоп {top} строк по памяти (tracemalloc):\n")
+            for stat in snapshot.statistics('lineno')[:top]:
+                report.write(f"{stat}\n")
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+        print(f"🔬 Профиль {name}: {base}.prof, {base}.txt")
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric_name(name):
+    return ''.join(ch if ch.isalnum() else '_' for ch in name)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+def read_jsonl(path):
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def to_prometheus(records):
+    """Текст в формате Prometheus: спаны - последняя длительность и пик RSS,
+    счетчики - сумма, gauge - последнее значение"""
+    span_labels = ('stage', 'file', 'source')
+    series = {}
+
+    def put(metric, metric_type, help_text, labels, value, accumulate=False):
+        entry = series.setdefault(metric, {'type': metric_type, 'help': help_text, 'values': {}})
+        key = tuple(sorted(labels.items()))
+        if accumulate:
+            entry['values'][key] = entry['values'].get(key, 0) + value
+        else:
+            entry['values'][key] = value
+
+    for record in records:
+        kind = record.get('kind')
+        if kind == 'span':
+            labels = {'span': record['name']}
+            labels.update({key: record[key] for key in span_labels if key in record})
+            put(f'{PROMETHEUS_PREFIX}_span_duration_seconds', 'gauge',
+                'Длительность последнего выполнения участка', labels, record['value'])
+            put(f'{PROMETHEUS_PREFIX}_span_peak_rss_bytes', 'gauge',
+                'Пик RSS процесса на конец участка', labels, record.get('peak_rss_bytes', 0))
+            for field in ('rows', 'bytes', 'peak_bytes', 'records'):
+                if isinstance(record.get(field), (int, float)):
+                    put(f'{PROMETHEUS_PREFIX}_span_{field}', 'gauge',
+                        f'Поле {field} последнего выполнения участка', labels, record[field])
+        elif kind in ('counter', 'gauge'):
+            labels = {key: value for key, value in record.items()
+                      if key not in ('ts', 'pid', 'kind', 'name', 'value')}
+            suffix = '_total' if kind == 'counter' else ''
+            put(f'{PROMETHEUS_PREFIX}_{_metric_name(record["name"])}{suffix}', kind,
+                record['name'], labels, record['value'], accumulate=kind == 'counter')
+
+    lines = []
+    for metric, entry in sorted(series.items()):
+        lines.append(f"# HELP {metric} {entry['help']}")
+        lines.append(f"# TYPE {metric} {entry['type']}")
+        for key, value in sorted(entry['values'].items()):
+            lines.append(f"{metric}{_format_labels(dict(key))} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(jsonl_path, prom_path):
+    """Атомарная запись textfile: node exporter не должен увидеть половину файла"""
+    text = to_prometheus(read_jsonl(jsonl_path))
+    tmp_path = prom_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, prom_path)
+    return prom_path
+
+
+def summarize(records):
+    """Сводка для консоли: суммарное время по участкам и счетчики"""
+    spans = {}
+    counters = {}
+    for record in records:
+        if record.get('kind') == 'span':
+            total, calls = spans.get(record['name'], (0.0, 0))
+            spans[record['name']] = (total + record['value'], calls + 1)
+        elif record.get('kind') == 'counter':
+            counters[record['name']] = counters.get(record['name'], 0) + record['value']
+    return spans, counters
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('jsonl', help='файл метрик JSON lines')
+    arg_parser.add_argument('--prometheus', metavar='FILE', help='записать textfile для node exporter')
+    args = arg_parser.parse_args()
+
+    records = read_jsonl(args.jsonl)
+    spans, counters = summarize(records)
+    print(f"📊 Участки ({len(records)} записей):")
+    for name, (total, calls) in sorted(spans.items(), key=lambda item: -item[1][0]):
+        print(f"   {name}: {total:.3f} с, вызовов {calls}")
+    for name, value in sorted(counters.items()):
+        print(f"   {name}: {value}")
+    if args.prometheus:
+        write_prometheus(args.jsonl, args.prometheus)
+        print(f"✅ Prometheus textfile: {args.prometheus}")
+
+
+if __name__ == "__main__":
+    main()
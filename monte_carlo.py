@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Моделирование будущей доходности блочным бутстрепом исторических рядов
+
+Калькулятор доходности показывает историю между двумя датами; здесь -
+разброс исходов на горизонт вперед. Из all_data_final.json берутся
+месячные множители инструментов (для индексов - отношение соседних
+месяцев, для депозитов - 1 + ставка / 12, как в return_tables.py) за
+месяцы, где есть все выбранные ряды и инфляция. Путь собирается из
+блоков по --block месяцев подряд (циклически по истории), строки
+берутся целиком - связь инструментов и инфляции внутри месяца
+сохраняется.
+
+Результат - перцентили накопленной доходности, номинальной и реальной
+(за вычетом инфляции того же пути), по каждому инструменту и по
+портфелю --mix (купил и держи или --rebalance каждый месяц), плюс
+строки chart в формате ProfitabilityChart: {month, "<ряд> p50",
+"<ряд> p50_inflation", ...}.
+
+Пути делятся на --shards частей с независимыми потоками случайных
+чисел из одного seed (SeedSequence.spawn), части считаются в
+--workers процессах. Перцентили собираются из гистограмм логарифма
+капитала: гистограммы частей складываются, поэтому результат зависит
+от seed и числа частей, но не от числа процессов. Границы гистограмм
+задает пробный прогон с тем же seed.
+
+Результаты кэшируются по хэшу файла данных и параметрам (состав,
+горизонт, seed, число путей, ...) в памяти процесса и в --cache-dir.
+
+Запуск: python monte_carlo.py [data/all_data_final.json] --mix stock:0.6,bonds_ofz:0.4
+        [--horizon 36] [--paths 100000] [--seed 0] [--block 12] [--shards 16]
+        [--workers 4] [--percentiles 5,25,50,75,95] [--rebalance] [--output bands.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics
+from return_tables import INFLATION_CODE, build_return_tables, month_key, month_key_to_ordinal
+
+CACHE_DIR = 'data/cache/monte_carlo'
+CACHE_VERSION = 1
+PORTFOLIO = 'portfolio'
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Бинов гистограммы на (месяц, ряд) и запас по краям диапазона пробного прогона
+HISTOGRAM_BINS = 2048
+PILOT_PATHS = 4096
+PILOT_MARGIN = 0.5
+
+# Элементов float64 в массиве логарифмов блока путей (путей x месяцев x рядов)
+BATCH_ELEMENTS = 4_000_000
+
+_memory_cache = {}
+
+
+def parse_mix(text):
+    """'stock:0.6,bonds_ofz:0.4' или 'stock,bonds_ofz' (поровну) -> {код: доля}, сумма долей 1"""
+    weights = {}
+    for part in text.split(','):
+        if not part:
+            continue
+        code, _, weight = part.partition(':')
+        weights[code.strip()] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if not weights or total <= 0:
+        raise ValueError(f"пустой состав портфеля: {text!r}")
+    return {code: weight / total for code, weight in weights.items()}
+
+
+def joint_log_factors(tables, codes):
+    """Логарифмы месячных множителей codes и инфляции (последний столбец)
+    за месяцы, где есть все ряды. Возвращает (матрица месяцы x ряды, последний месяц)"""
+    first = month_key_to_ordinal(tables['start'])
+    axis_length = month_key_to_ordinal(tables['end']) - first + 1
+    columns = []
+    for code in list(codes) + [INFLATION_CODE]:
+        table = tables['instruments'][code]
+        prefix = np.asarray(table['prefix'], dtype=np.float64)
+        factors = np.full(axis_length, np.nan)
+        offset = table['offset']
+        # Индекс: отношение соседних точек; ставка: множитель месяца, первый - сам P[0]
+        if table['kind'] == 'rate':
+            factors[offset:offset + len(prefix)] = prefix / np.concatenate([[1.0], prefix[:-1]])
+        else:
+            factors[offset + 1:offset + len(prefix)] = prefix[1:] / prefix[:-1]
+        if table['present'] is not None:
+            factors[offset:offset + len(prefix)][~np.asarray(table['present'])] = np.nan
+        columns.append(factors)
+    matrix = np.column_stack(columns)
+    complete = np.flatnonzero(np.isfinite(matrix).all(axis=1))
+    if len(complete) == 0:
+        raise ValueError(f"нет месяцев, общих для {', '.join(codes)} и инфляции")
+    return np.log(matrix[complete]), month_key(first + int(complete[-1]))
+
+
+def _series_names(codes):
+    return list(codes) + ([PORTFOLIO] if len(codes) > 1 else [])
+
+
+def _simulate_logs(log_factors, weights, horizon, block, rebalance, paths, rng):
+    """Логарифмы капитала (пути x месяцы x ряды): номинальные, затем реальные"""
+    months, columns = log_factors.shape
+    instruments = columns - 1
+    series = instruments + (1 if len(weights) > 1 else 0)
+    blocks = -(-horizon // block)
+    starts = rng.integers(0, months, size=(paths, blocks))
+    rows = ((starts[:, :, None] + np.arange(block)) % months).reshape(paths, blocks * block)[:, :horizon]
+
+    logs = np.cumsum(log_factors[rows], axis=1)
+    values = np.empty((paths, horizon, 2 * series))
+    values[:, :, :instruments] = logs[:, :, :-1]
+    if series > instruments:
+        if rebalance:
+            # Ежемесячная ребалансировка: множитель портфеля - взвешенная сумма множителей
+            mix = np.log(np.exp(log_factors[:, :-1]) @ weights)
+            values[:, :, instruments] = np.cumsum(mix[rows], axis=1)
+        else:
+            values[:, :, instruments] = np.log(np.exp(logs[:, :, :-1]) @ weights)
+    np.subtract(values[:, :, :series], logs[:, :, -1:], out=values[:, :, series:])
+    return values
+
+
+def _histogram(values, lo, width, bins):
+    """Гистограммы по (месяц, ряд): values (пути x месяцы x ряды), lo и width
+    (месяцы x ряды) -> (месяцы, ряды, bins)"""
+    # Номер бина считается на месте в values: массив блока больше не нужен
+    values -= lo
+    values /= width
+    np.clip(values, 0, bins - 1, out=values)
+    cells = np.arange(values.shape[1] * values.shape[2]).reshape(values.shape[1:]) * bins
+    values += cells
+    counts = np.bincount(values.astype(np.intp).ravel(), minlength=cells.size * bins)
+    return counts.reshape(values.shape[1], values.shape[2], bins)
+
+
+def simulate_shard(log_factors, weights, horizon, block, rebalance, paths, seed_sequence, lo, width,
+                   bins=HISTOGRAM_BINS):
+    """Одна часть путей: сумма гистограмм по блокам путей"""
+    rng = np.random.default_rng(seed_sequence)
+    series = len(weights) + (1 if len(weights) > 1 else 0)
+    counts = np.zeros((horizon, 2 * series, bins), dtype=np.int64)
+    batch = max(1, BATCH_ELEMENTS // (horizon * log_factors.shape[1] * 2))
+    for done in range(0, paths, batch):
+        values = _simulate_logs(log_factors, weights, horizon, block, rebalance, min(batch, paths - done), rng)
+        counts += _histogram(values, lo, width, bins)
+    return counts
+
+
+def _percentiles_from_counts(counts, lo, width, percentiles):
+    """Перцентили по гистограммам с линейной интерполяцией внутри бина -> (q, месяцы, ряды)"""
+    cumulative = np.cumsum(counts, axis=2)
+    total = cumulative[:, :, -1:]
+    result = []
+    for q in percentiles:
+        target = total * (q / 100)
+        index = np.minimum((cumulative < target).sum(axis=2, keepdims=True), counts.shape[2] - 1)
+        before = np.take_along_axis(cumulative, index, axis=2) - np.take_along_axis(counts, index, axis=2)
+        inside = np.take_along_axis(counts, index, axis=2)
+        fraction = np.where(inside > 0, (target - before) / np.maximum(inside, 1), 0.5)
+        result.append((lo + width * (index + fraction))[:, :, 0])
+    return np.array(result)
+
+
+def _file_version(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_key(data_version, weights, horizon, seed, paths, shards, block, rebalance, percentiles):
+    params = {
+        'version': CACHE_VERSION,
+        'data': data_version,
+        'mix': sorted(weights.items()),
+        'horizon': horizon,
+        'seed': seed,
+        'paths': paths,
+        'shards': shards,
+        'block': block,
+        'rebalance': bool(rebalance),
+        'percentiles': list(percentiles),
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:24], params
+
+
+def simulate(tables, weights, horizon=36, paths=100_000, seed=0, block=12, shards=16, rebalance=False,
+             percentiles=DEFAULT_PERCENTILES, workers=1):
+    """Перцентили доходности на horizon месяцев вперед. Возвращает словарь результата без кэша"""
+    codes = list(weights)
+    unknown = [code for code in codes if code not in tables['instruments'] or code == INFLATION_CODE]
+    if unknown:
+        raise ValueError(f"неизвестные коды: {', '.join(unknown)}")
+    log_factors, last_month = joint_log_factors(tables, codes)
+    weight_vector = np.array([weights[code] for code in codes])
+    names = _series_names(codes)
+
+    # Пробный прогон задает границы гистограмм для каждого (месяц, ряд)
+    pilot_seed, *shard_seeds = np.random.SeedSequence(seed).spawn(shards + 1)
+    pilot = _simulate_logs(log_factors, weight_vector, horizon, block, rebalance, PILOT_PATHS,
+                           np.random.default_rng(pilot_seed))
+    low, high = pilot.min(axis=0), pilot.max(axis=0)
+    span = np.maximum(high - low, 1e-6)
+    lo = low - span * PILOT_MARGIN
+    width = span * (1 + 2 * PILOT_MARGIN) / HISTOGRAM_BINS
+
+    sizes = [paths // shards + (1 if k < paths % shards else 0) for k in range(shards)]
+    task = (log_factors, weight_vector, horizon, block, rebalance)
+    counts = np.zeros((horizon, 2 * len(names), HISTOGRAM_BINS), dtype=np.int64)
+    if workers <= 1:
+        for size, shard_seed in zip(sizes, shard_seeds):
+            counts += simulate_shard(*task, size, shard_seed, lo, width)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(simulate_shard, *task, size, shard_seed, lo, width)
+                       for size, shard_seed in zip(sizes, shard_seeds)]
+            for future in futures:
+                counts += future.result()
+
+    # Доля путей за границами пробного прогона (попали в крайние бины)
+    clipped = (counts[:, :, 0].sum() + counts[:, :, -1].sum()) / counts.sum()
+    bands = np.expm1(_percentiles_from_counts(counts, lo[:, :, None], width[:, :, None], percentiles)) * 100
+
+    first_month = month_key_to_ordinal(last_month) + 1
+    months = [month_key(first_month + k) for k in range(horizon)]
+    labels = [f"p{q:g}" for q in percentiles]
+    series = {}
+    for s, name in enumerate(names):
+        series[name] = {
+            'nominal': {label: np.round(bands[i, :, s], 4).tolist() for i, label in enumerate(labels)},
+            'real': {label: np.round(bands[i, :, len(names) + s], 4).tolist() for i, label in enumerate(labels)},
+        }
+    chart = []
+    for h, month in enumerate(months):
+        row = {'month': month}
+        for name in names:
+            for label in labels:
+                row[f"{name} {label}"] = series[name]['nominal'][label][h]
+                row[f"{name} {label}_inflation"] = series[name]['real'][label][h]
+        chart.append(row)
+
+    return {
+        'history': {'months': len(log_factors), 'last_month': last_month},
+        'months': months,
+        'series': series,
+        'final': {name: {kind: {label: values[-1] for label, values in bands_by_label.items()}
+                         for kind, bands_by_label in data.items()}
+                  for name, data in series.items()},
+        'chart': chart,
+        'clipped_share': float(clipped),
+    }
+
+
+def run_simulation(data_path, weights, horizon=36, paths=100_000, seed=0, block=12, shards=16, rebalance=False,
+                   percentiles=DEFAULT_PERCENTILES, workers=1, cache_dir=CACHE_DIR):
+    """simulate с кэшем: память процесса, затем cache_dir (None - без диска).
+
+    Ключ - хэш файла данных и всех параметров, кроме числа процессов.
+    """
+    key, params = cache_key(_file_version(data_path), weights, horizon, seed, paths, shards, block, rebalance,
+                            percentiles)
+    if key in _memory_cache:
+        return _memory_cache[key], 'memory'
+    cache_path = os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        _memory_cache[key] = result
+        return result, 'disk'
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        tables = build_return_tables(json.load(f))
+    result = dict(simulate(tables, weights, horizon, paths, seed, block, shards, rebalance, percentiles, workers),
+                  key=key, params=params)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    _memory_cache[key] = result
+    return result, 'computed'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('data', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('--mix', default='stock:0.5,bonds_ofz:0.3,deposit_ruble_1:0.2',
+                            help='состав портфеля код:доля через запятую')
+    arg_parser.add_argument('--horizon', type=int, default=36, help='горизонт в месяцах')
+    arg_parser.add_argument('--paths', type=int, default=100_000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--block', type=int, default=12, help='длина блока бутстрепа в месяцах')
+    arg_parser.add_argument('--shards', type=int, default=16, help='частей путей (влияет на результат)')
+    arg_parser.add_argument('--workers', type=int, default=1, help='процессов (на результат не влияет)')
+    arg_parser.add_argument('--percentiles', default=','.join(str(q) for q in DEFAULT_PERCENTILES))
+    arg_parser.add_argument('--rebalance', action='store_true', help='ежемесячная ребалансировка портфеля')
+    arg_parser.add_argument('--cache-dir', default=CACHE_DIR)
+    arg_parser.add_argument('--no-cache', action='store_true', help='не читать и не писать кэш на диске')
+    arg_parser.add_argument('--output', help='сохранить результат в JSON')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    weights = parse_mix(args.mix)
+    percentiles = [float(q) for q in args.percentiles.split(',')]
+    start = time.perf_counter()
+    with metrics.span('monte_carlo.simulate', paths=args.paths, horizon=args.horizon) as span:
+        result, source = run_simulation(args.data, weights, args.horizon, args.paths, args.seed, args.block,
+                                        args.shards, args.rebalance, percentiles, args.workers,
+                                        None if args.no_cache else args.cache_dir)
+        span['cache'] = source
+    elapsed = time.perf_counter() - start
+
+    source_label = {'computed': 'рассчитано', 'memory': 'из памяти', 'disk': 'из кэша'}[source]
+    print(f"🎲 {args.paths} путей на {args.horizon} мес., история {result['history']['months']} мес. "
+          f"по {result['history']['last_month']}: {source_label} за {elapsed:.2f} с")
+    for name, data in result['final'].items():
+        nominal = ', '.join(f"{label} {value:+.1f}%" for label, value in data['nominal'].items())
+        real = ', '.join(f"{label} {value:+.1f}%" for label, value in data['real'].items())
+        print(f"   {name}: {nominal}\n   {' ' * len(name)}  реальная: {real}")
+    if result['clipped_share'] > 0:
+        print(f"⚠️ За границами пробного прогона: {result['clipped_share']:.2e} значений")
+    if args.output:
+        tmp_path = args.output + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, args.output)
+        print(f"💾 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { computeProfitability, type ComputeQuery } from '../../utils/profitabilityCompute';
+import { rangeQueryKey, ResponseCache } from '../../utils/profitabilityIndex';
+import { etagMatches, loadServerData, makeEtag } from '../../utils/serverDataIndex';
+
+// Готовые ответы: тело уже сериализовано, ETag посчитан
+interface CachedResponse {
+  body: string;
+  etag: string;
+}
+
+const responseCache = new ResponseCache<CachedResponse>();
+
+const first = (value: string | string[] | undefined): string | undefined =>
+  Array.isArray(value) ? value[0] : value;
+
+// GET ?startDate=&endDate=&instruments=deposits,bonds&amount=&inflation=1 или POST с тем же в JSON
+const parseQuery = (req: NextApiRequest): ComputeQuery | null => {
+  const source = req.method === 'POST' ? req.body || {} : req.query;
+  const startDate = first(source.startDate);
+  const endDate = first(source.endDate);
+  const rawInstruments = source.instruments;
+  const instruments: string[] = Array.isArray(rawInstruments)
+    ? rawInstruments
+    : String(rawInstruments || '').split(',').filter(Boolean);
+  const amount = Number(first(source.amount));
+  const inflation = source.inflation === true || ['1', 'true'].includes(String(first(source.inflation)));
+
+  if (!startDate || !endDate || instruments.length === 0 || !(amount > 0)) {
+    return null;
+  }
+  return {
+    startDate,
+    endDate,
+    instruments,
+    depositTerm: first(source.depositTerm),
+    bondType: first(source.bondType),
+    amount,
+    inflation,
+  };
+};
+
+// Расчет доходности на сервере: в ответе только итоги и ряды графика
+export default function handler(req: NextApiRequest, res: NextApiResponse) {
+  if (req.method !== 'GET' && req.method !== 'POST') {
+    return res.status(405).json({ error: 'Method not allowed' });
+  }
+
+  try {
+    const query = parseQuery(req);
+    if (!query) {
+      return res.status(400).json({ error: 'Missing required parameters' });
+    }
+
+    const { index, version } = loadServerData();
+    const cacheKey = `${rangeQueryKey(query)}|${query.amount}|${query.inflation ? 1 : 0}`;
+    let cached = responseCache.get(cacheKey);
+    if (!cached) {
+      const body = JSON.stringify(computeProfitability(index, query));
+      cached = { body, etag: makeEtag(version, cacheKey) };
+      responseCache.set(cacheKey, cached);
+    }
+
+    res.setHeader('ETag', cached.etag);
+    res.setHeader('Cache-Control', 'public, max-age=0, must-revalidate');
+    if (etagMatches(req.headers['if-none-match'], cached.etag)) {
+      return res.status(304).end();
+    }
+
+    res.setHeader('Content-Type', 'application/json; charset=utf-8');
+    res.status(200).send(cached.body);
+  } catch (error) {
+    console.error('Error computing profitability:', error);
+    res.status(500).json({ error: 'Internal server error' });
+  }
+}
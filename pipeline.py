@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Единая точка входа для ежемесячного обновления данных
+
+Этапы образуют граф зависимостей:
+
+    inflation ─────────────────────────┐
+    deposits_fetch ──> deposits ───────┼──> assemble ──> validate ──> bundles
+    stocks_moex/bonds_*.json (внешние) ┘  (all_data_final)            (public/data/shards)
+
+Шарды для сайта публикуются только после успешной проверки данных.
+
+Для каждого этапа хранится хэш входов (файлы данных и код скрипта) и
+выходов в data/pipeline_state.json. Этап пропускается, если входы не
+изменились и выходы на месте в том же виде. Независимые этапы
+выполняются параллельно в пуле процессов, главный файл собирается
+один раз в конце.
+
+Запуск: python pipeline.py [--force] [--offline] [--dry-run] [этапы...]
+       [--metrics data/metrics.jsonl --prometheus data/calc.prom] [--profile DIR]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from inflation_parser import file_fingerprint
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics, write_prometheus
+
+STATE_FILE = 'data/pipeline_state.json'
+DEPOSITS_EXCEL_GLOB = 'data/deposits_excel/*.xlsx'
+VALIDATION_REPORT = 'data/validation_report.json'
+
+
+def run_inflation(options):
+    from inflation_parser import parse_inflation_incremental
+    return parse_inflation_incremental(options['inflation_file']) is not None
+
+
+def run_deposits_fetch(options):
+    from http_cache import HttpCache
+    from real_deposits_parser import RealDepositsParser
+    parser = RealDepositsParser(cache=HttpCache(), offline=options['offline'])
+    parser.find_real_excel_urls()
+    parser.download_excel_files()
+    print(f"🗄️ Кэш HTTP: {parser.cache.report()}")
+    return True
+
+
+def run_deposits(options):
+    from real_deposits_parser import RealDepositsParser
+    parser = RealDepositsParser()
+    excel_files = sorted(glob.glob(DEPOSITS_EXCEL_GLOB))
+    parser.build_deposits_data(excel_files, workers=options['workers'], daily=options['daily'])
+    return True
+
+
+def run_assemble(options):
+    import update_stocks_in_main_data
+    return update_stocks_in_main_data.main() is not None
+
+
+def run_bundles(options):
+    from static_bundles import BUNDLE_DIR, build_bundles
+    with open('data/all_data_final.json', 'r', encoding='utf-8') as f:
+        build_bundles(json.load(f), BUNDLE_DIR)
+    return True
+
+
+def run_validate(options):
+    from validate_data import run_validation
+    return run_validation('data/all_data_final.json', VALIDATION_REPORT) == 0
+
+
+class Stage:
+    """Этап конвейера: входы и выходы - пути или glob-шаблоны"""
+
+    def __init__(self, name, run, inputs=(), outputs=(), deps=(), always=False):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        # always - входы неизвестны заранее (сеть), этап запускается каждый раз
+        self.always = always
+
+
+def build_stages(options):
+    from daily_series import DAILY_DEPOSIT_SOURCE
+    from update_stocks_in_main_data import DAILY_OUTPUT, DAILY_SOURCES, DEPOSIT_SOURCE, RETURN_SOURCES
+    deposit_outputs = [DEPOSIT_SOURCE] + ([DAILY_DEPOSIT_SOURCE] if options['daily'] else [])
+    return [
+        Stage('inflation', run_inflation,
+              inputs=['inflation_parser.py', options['inflation_file']],
+              outputs=['inflation_data.json']),
+        Stage('deposits_fetch', run_deposits_fetch,
+              inputs=['real_deposits_parser.py', 'http_cache.py'],
+              outputs=[DEPOSITS_EXCEL_GLOB],
+              always=True),
+        Stage('deposits', run_deposits,
+              inputs=['real_deposits_parser.py', DEPOSITS_EXCEL_GLOB],
+              outputs=deposit_outputs,
+              deps=['deposits_fetch']),
+        Stage('assemble', run_assemble,
+              inputs=['update_stocks_in_main_data.py', 'data_store.py', 'daily_series.py',
+                      DEPOSIT_SOURCE, DAILY_DEPOSIT_SOURCE]
+                     + list(RETURN_SOURCES.values()) + list(DAILY_SOURCES.values()),
+              outputs=['data/all_data_final.json', 'data/all_data_final.bin', 'data/return_tables.json',
+                       DAILY_OUTPUT],
+              deps=['inflation', 'deposits']),
+        # При проблемах в данных конвейер завершается с кодом 1, шарды не собираются
+        Stage('validate', run_validate,
+              inputs=['validate_data.py', 'data/all_data_final.json'],
+              outputs=[VALIDATION_REPORT],
+              deps=['assemble']),
+        # Шарды для статического сайта: рядом с остальными файлами public/
+        Stage('bundles', run_bundles,
+              inputs=['static_bundles.py', 'data/all_data_final.json'],
+              outputs=['public/data/shards/manifest.json'],
+              deps=['validate']),
+    ]
+
+
+def hash_paths(patterns):
+    """Хэш набора файлов: пути и SHA-256 содержимого (отсутствующие тоже учитываются)"""
+    digest = hashlib.sha256()
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            fingerprint = file_fingerprint(path) if os.path.exists(path) else 'missing'
+            digest.update(f"{path}\0{fingerprint}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(stage, state, force):
+    """Этап можно пропустить: входы и выходы совпадают с прошлым успешным запуском"""
+    if force or stage.always:
+        return False
+    previous = state.get(stage.name)
+    if not previous:
+        return False
+    return (previous.get('inputs') == hash_paths(stage.inputs)
+            and previous.get('outputs') == hash_paths(stage.outputs))
+
+
+def _run_stage(stage_run, options):
+    """Выполнение этапа в дочернем процессе: (успех, время)"""
+    start = time.perf_counter()
+    try:
+        ok = bool(stage_run(options))
+    except Exception as e:
+        print(f"❌ {e}")
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def select_stages(stages, names):
+    """Запрошенные этапы вместе со всеми их зависимостями"""
+    by_name = {stage.name: stage for stage in stages}
+    selected = set()
+
+    def visit(name):
+        if name not in selected:
+            selected.add(name)
+            for dep in by_name[name].deps:
+                visit(dep)
+
+    for name in names:
+        visit(name)
+    return [stage for stage in stages if stage.name in selected]
+
+
+def run_pipeline(stages, options, force=False, dry_run=False, max_workers=None):
+    """Выполнение графа этапов. Возвращает {этап: статус}"""
+    state = load_state()
+    by_name = {stage.name: stage for stage in stages}
+    status = {}
+    pending = list(stages)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        while pending or running:
+            # Запускаем все этапы, зависимости которых уже завершились
+            for stage in list(pending):
+                dep_status = [status.get(dep) for dep in stage.deps if dep in by_name]
+                if any(s is None for s in dep_status):
+                    continue
+                pending.remove(stage)
+                if any(s == 'failed' or s == 'blocked' for s in dep_status):
+                    status[stage.name] = 'blocked'
+                    print(f"⛔ {stage.name}: пропущен из-за ошибки в зависимостях")
+                    metrics.emit('span', 'pipeline.stage', 0.0, stage=stage.name, status='blocked')
+                elif is_up_to_date(stage, state, force):
+                    status[stage.name] = 'skipped'
+                    print(f"⏭️ {stage.name}: входы не изменились")
+                    metrics.emit('span', 'pipeline.stage', 0.0, stage=stage.name, status='skipped')
+                elif dry_run:
+                    status[stage.name] = 'would_run'
+                    print(f"📝 {stage.name}: будет выполнен")
+                else:
+                    print(f"🚀 {stage.name}: запуск")
+                    running[executor.submit(_run_stage, stage.run, options)] = stage
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    ok, elapsed = future.result()
+                except Exception as e:
+                    print(f"❌ {stage.name}: {e}")
+                    ok, elapsed = False, 0.0
+                metrics.emit('span', 'pipeline.stage', round(elapsed, 6), stage=stage.name,
+                             status='ok' if ok else 'error')
+                if ok:
+                    status[stage.name] = 'done'
+                    state[stage.name] = {
+                        'inputs': hash_paths(stage.inputs),
+                        'outputs': hash_paths(stage.outputs),
+                        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    }
+                    save_state(state)
+                    print(f"✅ {stage.name}: {elapsed:.2f} с")
+                else:
+                    status[stage.name] = 'failed'
+                    print(f"❌ {stage.name}: ошибка за {elapsed:.2f} с")
+
+    return status
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('stages', nargs='*', help='этапы (с зависимостями); по умолчанию все')
+    arg_parser.add_argument('--force', action='store_true', help='выполнить этапы без проверки хэшей')
+    arg_parser.add_argument('--offline', action='store_true', help='файлы ЦБ только из кэша data/http_cache')
+    arg_parser.add_argument('--dry-run', action='store_true', help='показать, какие этапы будут выполнены')
+    arg_parser.add_argument('--workers', type=int, default=1, help='процессов для разбора Excel файлов ЦБ')
+    arg_parser.add_argument('--daily', action='store_true', help='дневные ставки депозитов для data/all_data_daily.bin')
+    arg_parser.add_argument('--inflation-file', default='ipc_mes_04-2025.xlsx', help='файл Росстата')
+    add_metrics_arguments(arg_parser)
+    arg_parser.add_argument('--prometheus', metavar='FILE',
+                            help='по окончании свернуть метрики в textfile для node exporter')
+    args = arg_parser.parse_args()
+    if args.prometheus and not args.metrics:
+        arg_parser.error('--prometheus требует --metrics')
+    # До создания пула: дочерние процессы наследуют настройки через окружение
+    configure_metrics(args.metrics, args.profile)
+
+    options = {
+        'offline': args.offline,
+        'workers': args.workers,
+        'daily': args.daily,
+        'inflation_file': args.inflation_file,
+    }
+    stages = build_stages(options)
+    names = [stage.name for stage in stages]
+    unknown = [name for name in args.stages if name not in names]
+    if unknown:
+        arg_parser.error(f"неизвестные этапы: {', '.join(unknown)}; доступны: {', '.join(names)}")
+    if args.stages:
+        stages = select_stages(stages, args.stages)
+
+    start = time.perf_counter()
+    with metrics.span('pipeline.total'):
+        status = run_pipeline(stages, options, force=args.force, dry_run=args.dry_run)
+    if args.prometheus:
+        write_prometheus(args.metrics, args.prometheus)
+        print(f"📈 Метрики: {args.metrics}, {args.prometheus}")
+
+    print("\n📊 ИТОГ:")
+    for name, result in status.items():
+        print(f"   {name}: {result}")
+    print(f"   Время: {time.perf_counter() - start:.2f} с")
+    return 1 if any(result in ('failed', 'blocked') for result in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бэктест сетки портфелей из нескольких инструментов с ребалансировкой
+и ежемесячными взносами
+
+Калькулятор доходности считает каждый инструмент отдельно; здесь -
+портфель с долями по нескольким рядам all_data_final.json. Месячный
+множитель инструмента - отношение соседних префиксных произведений
+return_tables.py (индекс: value[k] / value[k - 1], депозит: 1 + ставка
+месяца / 12). Портфель стартует суммой --amount в месяце --start
+(по умолчанию - первый месяц, где есть все ряды и инфляция), каждый
+следующий месяц:
+1. доли растут на множители месяца;
+2. взнос --contribution распределяется по целевым долям;
+3. раз в --rebalance месяцев (none - никогда) доли возвращаются
+   к целевым.
+
+Все портфели сетки (--step - все доли, кратные шагу, или --random N
+случайных) считаются одновременно: состояние - матрица сумм
+(инструменты x портфели), шаг месяца - несколько операций над ней,
+портфели обрабатываются блоками по BLOCK_PORTFOLIOS.
+
+Результат по портфелю: итоговая сумма и вложено, номинальная и
+реальная доходность (итог и взносы в ценах месяца старта), CAGR по
+стоимости пая (без влияния взносов), номинальный и реальный,
+годовая волатильность и максимальная просадка пая.
+
+Состояние после последнего месяца сохраняется в --state (.npz). При
+следующем запуске с тем же набором параметров считаются только новые
+месяцы данных; если история до сохраненного месяца в данных
+изменилась, расчет повторяется с начала.
+
+Запуск: python portfolio_backtest.py [data/all_data_final.json]
+        [--codes stock,bonds_ofz,deposit_ruble_1] [--step 0.1 | --random 100000]
+        [--rebalance none|monthly|quarterly|yearly] [--amount 100000] [--contribution 10000]
+        [--start 2005-01] [--state backtest.npz] [--output portfolios.csv] [--top 10]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics
+from return_tables import INFLATION_CODE, build_return_tables, month_key, month_key_to_ordinal
+
+STATE_VERSION = 1
+REBALANCE_MONTHS = {'none': 0, 'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+# Портфелей в блоке: матрица сумм блока остается в кэше процессора на всех месяцах
+BLOCK_PORTFOLIOS = 8192
+
+RESULT_COLUMNS = ('final_value', 'invested', 'nominal_return', 'real_value', 'real_return', 'cagr', 'real_cagr',
+                  'volatility', 'max_drawdown')
+
+# Состояние: массивы по портфелям и общие для всех портфелей числа
+STATE_ARRAYS = ('weights', 'holdings', 'total', 'nav', 'peak', 'max_drawdown', 'log_sum', 'log_square_sum')
+STATE_SCALARS = ('invested', 'invested_real', 'inflation', 'months')
+
+
+class HistoryChanged(ValueError):
+    """Данные до сохраненного месяца отличаются от тех, по которым считалось состояние"""
+
+
+def weight_grid(count, step):
+    """Все наборы из count долей, кратных step, с суммой 1 -> (портфели x инструменты)"""
+    units = int(round(1 / step))
+    if count < 1 or units < 1 or abs(units * step - 1) > 1e-9:
+        raise ValueError(f"шаг {step} должен делить 1 нацело")
+    # Звезды и перегородки: позиции count - 1 перегородок среди units + count - 1 мест
+    bars = np.array(list(itertools.combinations(range(units + count - 1), count - 1)), dtype=np.int64)
+    bars = bars.reshape(-1, count - 1)
+    edges = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), units + count - 1)])
+    return (np.diff(edges, axis=1) - 1) / units
+
+
+def random_weights(portfolios, count, seed=0):
+    """portfolios случайных наборов долей, равномерно по симплексу"""
+    return np.random.default_rng(seed).dirichlet(np.ones(count), size=portfolios)
+
+
+def aligned_prefixes(tables, codes):
+    """Префиксы codes и инфляции (последний столбец) на общей оси месяцев.
+    Возвращает (матрица месяцы x ряды, первый и последний месяц, где есть все ряды)"""
+    first = month_key_to_ordinal(tables['start'])
+    axis_length = month_key_to_ordinal(tables['end']) - first + 1
+    matrix = np.full((axis_length, len(codes) + 1), np.nan)
+    for column, code in enumerate(list(codes) + [INFLATION_CODE]):
+        if code not in tables['instruments']:
+            raise ValueError(f"неизвестный код: {code}")
+        table = tables['instruments'][code]
+        matrix[table['offset']:table['offset'] + len(table['prefix']), column] = table['prefix']
+    complete = np.flatnonzero(np.isfinite(matrix).all(axis=1))
+    if len(complete) == 0:
+        raise ValueError(f"нет месяцев, общих для {', '.join(codes)} и инфляции")
+    return matrix, month_key(first + int(complete[0])), month_key(first + int(complete[-1]))
+
+
+def history_digest(prefixes):
+    """Отпечаток учтенной истории: префиксы от месяца старта до последнего учтенного"""
+    return hashlib.sha256(np.ascontiguousarray(prefixes).tobytes()).hexdigest()[:16]
+
+
+class PortfolioBacktest:
+    """Сетка портфелей на конец последнего учтенного месяца.
+
+    Месяцы добавляются advance (множители) или extend (новые месяцы из
+    таблиц return_tables); результат - results(). Состояние
+    сохраняется save и восстанавливается load без пересчета истории.
+    """
+
+    def __init__(self, codes, weights, start, amount=100_000.0, contribution=0.0, rebalance=0):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 2 or weights.shape[1] != len(codes):
+            raise ValueError(f"доли: ожидается матрица (портфели x {len(codes)})")
+        if np.any(weights < 0) or not np.allclose(weights.sum(axis=1), 1):
+            raise ValueError("доли портфеля должны быть неотрицательными и давать в сумме 1")
+        self.codes = list(codes)
+        self.start = start
+        self.last_month = start
+        self.amount = float(amount)
+        self.contribution = float(contribution)
+        self.rebalance = int(rebalance)
+        self.digest = None
+
+        portfolios = len(weights)
+        self.weights = weights
+        # Суммы по инструментам хранятся строками: шаг месяца идет по непрерывной памяти
+        self.holdings = np.ascontiguousarray(weights.T * self.amount)
+        # Стоимость портфеля после взноса: база роста следующего месяца, хранится, а не пересчитывается
+        # суммой holdings, чтобы досчет после load давал те же биты, что расчет подряд
+        self.total = self.holdings.sum(axis=0)
+        self.nav = np.ones(portfolios)
+        self.peak = np.ones(portfolios)
+        self.max_drawdown = np.zeros(portfolios)
+        self.log_sum = np.zeros(portfolios)
+        self.log_square_sum = np.zeros(portfolios)
+        self.invested = self.amount
+        self.invested_real = self.amount
+        self.inflation = 1.0
+        self.months = 0
+
+    @classmethod
+    def from_tables(cls, tables, codes, weights, start=None, amount=100_000.0, contribution=0.0, rebalance=0):
+        """Полный расчет с месяца start (по умолчанию - первый общий месяц) до конца данных"""
+        _, first, _ = aligned_prefixes(tables, codes)
+        start = max(start, first, key=month_key_to_ordinal) if start else first
+        backtest = cls(codes, weights, start, amount, contribution, rebalance)
+        backtest.extend(tables)
+        return backtest
+
+    def parameters(self):
+        """Параметры, при которых сохраненное состояние можно продолжить"""
+        return {
+            'version': STATE_VERSION,
+            'codes': self.codes,
+            'start': self.start,
+            'amount': self.amount,
+            'contribution': self.contribution,
+            'rebalance': self.rebalance,
+            'weights': hashlib.sha256(np.ascontiguousarray(self.weights).tobytes()).hexdigest()[:16],
+        }
+
+    def extend(self, tables):
+        """Досчитать месяцы после last_month, которые есть в tables. Возвращает число новых месяцев.
+
+        HistoryChanged - префиксы от start до last_month не совпадают с
+        учтенными (данные пересчитаны задним числом).
+        """
+        matrix, _, end = aligned_prefixes(tables, self.codes)
+        origin = month_key_to_ordinal(tables['start'])
+        first = month_key_to_ordinal(self.start) - origin
+        done = month_key_to_ordinal(self.last_month) - origin
+        last = month_key_to_ordinal(end) - origin
+        if first < 0 or done > last or not np.isfinite(matrix[first:done + 1]).all():
+            raise HistoryChanged(f"в данных нет месяцев {self.start}..{self.last_month}")
+        if self.digest is not None and history_digest(matrix[first:done + 1]) != self.digest:
+            raise HistoryChanged(f"история {self.start}..{self.last_month} изменилась")
+        if last > done:
+            factors = matrix[done + 1:last + 1] / matrix[done:last]
+            self.advance(factors[:, :-1], factors[:, -1])
+            self.last_month = end
+        self.digest = history_digest(matrix[first:last + 1])
+        return last - done
+
+    def advance(self, factors, inflation):
+        """Месяцы по порядку: factors (месяцы x инструменты), inflation (месяцы) - множители"""
+        factors = np.asarray(factors, dtype=np.float64)
+        inflation = np.asarray(inflation, dtype=np.float64)
+        # Общие для всех портфелей: номер месяца, ребалансировка, инфляция и взносы
+        numbers = self.months + 1 + np.arange(len(factors))
+        rebalance_due = (numbers % self.rebalance == 0) if self.rebalance else np.zeros(len(factors), dtype=bool)
+
+        for first in range(0, self.holdings.shape[1], BLOCK_PORTFOLIOS):
+            block = slice(first, first + BLOCK_PORTFOLIOS)
+            self._advance_block(block, factors, rebalance_due)
+
+        # Последовательно по месяцам: итог не зависит от того, какими частями добавлялась история
+        for level in inflation.tolist():
+            self.inflation *= level
+            self.invested += self.contribution
+            self.invested_real += self.contribution / self.inflation
+        self.months += len(factors)
+
+    def _advance_block(self, block, factors, rebalance_due):
+        holdings = self.holdings[:, block]
+        targets = self.weights[block].T
+        nav, peak = self.nav[block], self.peak[block]
+        max_drawdown = self.max_drawdown[block]
+        log_sum, log_square_sum = self.log_sum[block], self.log_square_sum[block]
+        contribution = targets * self.contribution if self.contribution else None
+        total = self.total[block]
+        after = np.empty_like(total)
+        change = np.empty_like(total)
+
+        for month in range(len(factors)):
+            holdings *= factors[month][:, None]
+            np.sum(holdings, axis=0, out=after)
+            # Пай меняется только на рост рынка: взнос покупает паи по текущей цене
+            np.divide(after, total, out=change)
+            nav *= change
+            np.log(change, out=change)
+            log_sum += change
+            log_square_sum += change * change
+            np.maximum(peak, nav, out=peak)
+            np.maximum(max_drawdown, 1 - nav / peak, out=max_drawdown)
+            if contribution is not None:
+                after += self.contribution
+                holdings += contribution
+            if rebalance_due[month]:
+                np.multiply(targets, after, out=holdings)
+            total[:] = after
+
+    def results(self):
+        """Показатели по портфелям на last_month: словарь столбцов RESULT_COLUMNS"""
+        final_value = self.total.copy()
+        real_value = final_value / self.inflation
+        years = self.months / 12
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cagr = self.nav ** (1 / years) - 1 if years else np.full_like(self.nav, np.nan)
+            real_cagr = (self.nav / self.inflation) ** (1 / years) - 1 if years else np.full_like(self.nav, np.nan)
+            mean = self.log_sum / self.months
+            variance = np.maximum(self.log_square_sum / self.months - mean * mean, 0)
+            volatility = np.sqrt(variance * 12) if self.months > 1 else np.full_like(self.nav, np.nan)
+        return {
+            'final_value': final_value,
+            'invested': np.full_like(final_value, self.invested),
+            'nominal_return': final_value / self.invested - 1,
+            'real_value': real_value,
+            'real_return': real_value / self.invested_real - 1,
+            'cagr': cagr,
+            'real_cagr': real_cagr,
+            'volatility': volatility,
+            'max_drawdown': self.max_drawdown.copy(),
+        }
+
+    def save(self, path):
+        meta = dict(self.parameters(), last_month=self.last_month, digest=self.digest,
+                    **{name: getattr(self, name) for name in STATE_SCALARS})
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **{name: getattr(self, name) for name in STATE_ARRAYS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            meta = json.loads(str(state['meta']))
+            if meta['version'] != STATE_VERSION:
+                raise ValueError(f"{path}: версия состояния {meta['version']}, ожидается {STATE_VERSION}")
+            backtest = cls(meta['codes'], state['weights'], meta['start'], meta['amount'], meta['contribution'],
+                           meta['rebalance'])
+            for name in STATE_ARRAYS:
+                setattr(backtest, name, np.ascontiguousarray(state[name]))
+        for name in STATE_SCALARS:
+            setattr(backtest, name, meta[name])
+        backtest.last_month = meta['last_month']
+        backtest.digest = meta['digest']
+        return backtest
+
+
+def resume_or_run(tables, codes, weights, start=None, amount=100_000.0, contribution=0.0, rebalance=0,
+                  state_path=None):
+    """Продолжить сохраненное состояние, если параметры совпадают, иначе посчитать с начала.
+
+    Возвращает (бэктест, новых месяцев, 'resumed' | 'computed').
+    """
+    _, first, _ = aligned_prefixes(tables, codes)
+    start = max(start, first, key=month_key_to_ordinal) if start else first
+    fresh = PortfolioBacktest(codes, weights, start, amount, contribution, rebalance)
+    if state_path and os.path.exists(state_path):
+        saved = PortfolioBacktest.load(state_path)
+        if saved.parameters() == fresh.parameters():
+            try:
+                added = saved.extend(tables)
+                return saved, added, 'resumed'
+            except HistoryChanged as e:
+                print(f"⚠️ {e}: расчет с начала")
+    added = fresh.extend(tables)
+    return fresh, added, 'computed'
+
+
+def write_results(path, codes, weights, results):
+    tmp_path = path + '.tmp'
+    columns = [results[name] for name in RESULT_COLUMNS]
+    row_format = ','.join(['%.4f'] * len(codes) + ['%.2f', '%.2f'] + ['%.6f'] * (len(RESULT_COLUMNS) - 2)) + '\n'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(list(codes) + list(RESULT_COLUMNS)) + '\n')
+        rows = zip(*weights.T.tolist(), *(column.tolist() for column in columns))
+        f.write(''.join([row_format % values for values in rows]))
+    os.replace(tmp_path, path)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('data', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('--codes', default='stock,bonds_ofz,bonds_corporate,deposit_ruble_1',
+                            help='инструменты портфеля через запятую')
+    grid = arg_parser.add_mutually_exclusive_group()
+    grid.add_argument('--step', type=float, default=0.1, help='шаг сетки долей')
+    grid.add_argument('--random', type=int, help='число случайных наборов долей вместо сетки')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--rebalance', choices=list(REBALANCE_MONTHS), default='yearly')
+    arg_parser.add_argument('--amount', type=float, default=100_000)
+    arg_parser.add_argument('--contribution', type=float, default=0, help='ежемесячный взнос')
+    arg_parser.add_argument('--start', help='месяц старта YYYY-MM')
+    arg_parser.add_argument('--state', help='файл состояния .npz для досчета новых месяцев')
+    arg_parser.add_argument('--output', help='CSV с показателями всех портфелей')
+    arg_parser.add_argument('--top', type=int, default=5, help='лучших портфелей в выводе')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    codes = args.codes.split(',')
+    if INFLATION_CODE in codes:
+        arg_parser.error("инфляция учитывается в реальной доходности и не входит в портфель")
+    weights = random_weights(args.random, len(codes), args.seed) if args.random else weight_grid(len(codes), args.step)
+
+    start = time.perf_counter()
+    with open(args.data, 'r', encoding='utf-8') as f:
+        tables = build_return_tables(json.load(f))
+    with metrics.span('backtest.run', portfolios=len(weights)) as span:
+        backtest, added, source = resume_or_run(tables, codes, weights, args.start, args.amount, args.contribution,
+                                                REBALANCE_MONTHS[args.rebalance], args.state)
+        span['months'] = added
+        span['source'] = source
+    results = backtest.results()
+    elapsed = time.perf_counter() - start
+
+    source_label = 'досчитано новых месяцев' if source == 'resumed' else 'рассчитано месяцев'
+    print(f"📈 {len(weights)} портфелей {backtest.start}..{backtest.last_month}, ребалансировка {args.rebalance}: "
+          f"{source_label} {added} за {elapsed:.2f} с")
+    print(f"   вложено {backtest.invested:,.0f}, инфляция за период {(backtest.inflation - 1) * 100:+.1f}%")
+    for index in np.argsort(-results['real_cagr'])[:args.top]:
+        mix = ', '.join(f"{code} {weight:.0%}" for code, weight in zip(codes, weights[index]) if weight >= 0.005)
+        print(f"   {mix}: итог {results['final_value'][index]:,.0f}, реальный CAGR "
+              f"{results['real_cagr'][index] * 100:+.2f}%, волатильность {results['volatility'][index] * 100:.1f}%, "
+              f"просадка {results['max_drawdown'][index] * 100:.1f}%")
+    if args.state:
+        backtest.save(args.state)
+        print(f"💾 Состояние: {args.state}")
+    if args.output:
+        with metrics.span('backtest.write', rows=len(weights)):
+            write_results(args.output, codes, weights, results)
+        print(f"💾 {args.output}: {os.path.getsize(args.output)} байт")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,29 +8,167 @@
 3. Максимальные процентные ставки
 """
 
+import argparse
 import requests
 import json
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import numpy as np
 import os
+import re
+import threading
 import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup, SoupStrainer
+from openpyxl import load_workbook
+from requests.adapters import HTTPAdapter
+
+from daily_series import DAILY_DEPOSIT_SOURCE, DEPOSIT_BUCKETS, write_daily
+from http_cache import HttpCache
+from metrics import (add_arguments as add_metrics_arguments, configure as configure_metrics, enabled as metrics_enabled,
+                     metrics, profiled)
+
+class RateInterpolationIndex:
+    """Предрассчитанный индекс для интерполяции ставок.
+
+    Известные точки хранятся один раз: отсортированный массив порядковых
+    номеров дней (date.toordinal) и матрица ставок (точки x сроки).
+    Ключи точек - 'YYYY-MM' (первое число месяца) или 'YYYY-MM-DD'.
+    Вся сетка дат заполняется одним векторным проходом.
+    """
+
+    METHODS = ('linear', 'step', 'pchip')
+
+    def __init__(self, known_points, buckets=None):
+        if buckets is None:
+            buckets = list(next(iter(known_points.values()))) if known_points else []
+        self.buckets = list(buckets)
+        items = sorted((date_key_to_ordinal(key), values) for key, values in known_points.items())
+        self.ordinals = np.array([ordinal for ordinal, _ in items], dtype=np.int64)
+        self.rates = np.array(
+            [[values[bucket] for bucket in self.buckets] for _, values in items],
+            dtype=np.float64,
+        ).reshape(len(items), len(self.buckets))
+
+    def interpolate(self, ordinals, method='linear'):
+        """Матрица ставок (даты x сроки) для массива порядковых номеров дней.
+
+        За пределами известных точек берется ближайшая крайняя точка.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Неизвестный метод интерполяции: {method}")
+        xq = np.asarray(ordinals, dtype=np.float64)
+        x = self.ordinals.astype(np.float64)
+        y = self.rates
+
+        if len(x) == 1:
+            return np.repeat(y, len(xq), axis=0)
+
+        if method == 'step':
+            # Значение последней известной точки не позже даты
+            idx = np.clip(np.searchsorted(x, xq, side='right') - 1, 0, len(x) - 1)
+            return y[idx]
+
+        if method == 'linear':
+            # Та же формула, что и раньше: before + (after - before) * ratio
+            xc = np.clip(xq, x[0], x[-1])
+            idx = np.clip(np.searchsorted(x, xc, side='right') - 1, 0, len(x) - 2)
+            ratio = ((xc - x[idx]) / (x[idx + 1] - x[idx]))[:, None]
+            return y[idx] + (y[idx + 1] - y[idx]) * ratio
+
+        return _pchip_interpolate(x, y, xq)
+
+    def interpolate_dict(self, date_keys, method='linear'):
+        """{дата: {срок: ставка}} с округлением до 2 знаков, как раньше"""
+        ordinals = [date_key_to_ordinal(key) for key in date_keys]
+        matrix = self.interpolate(ordinals, method).tolist()
+        return {
+            key: {bucket: round(value, 2) for bucket, value in zip(self.buckets, row)}
+            for key, row in zip(date_keys, matrix)
+        }
+
+
+def date_key_to_ordinal(key):
+    """'YYYY-MM' или 'YYYY-MM-DD' -> date.toordinal()"""
+    parts = key.split('-')
+    day = int(parts[2]) if len(parts) > 2 else 1
+    return date(int(parts[0]), int(parts[1]), day).toordinal()
+
+
+def month_keys(start_year, start_month, end_year, end_month):
+    """Ключи 'YYYY-MM' всех месяцев диапазона включительно"""
+    first = start_year * 12 + start_month - 1
+    last = end_year * 12 + end_month - 1
+    return [f"{m // 12}-{m % 12 + 1:02d}" for m in range(first, last + 1)]
+
+
+def _pchip_interpolate(x, y, xq):
+    """Монотонный кубический сплайн Эрмита (Fritsch-Carlson) по столбцам y"""
+    h = np.diff(x)
+    delta = np.diff(y, axis=0) / h[:, None]
+    d = np.zeros_like(y)
+
+    if len(x) == 2:
+        d[:] = delta[0]
+    else:
+        # Внутренние узлы: взвешенное гармоническое среднее наклонов
+        w1 = (2 * h[1:] + h[:-1])[:, None]
+        w2 = (h[1:] + 2 * h[:-1])[:, None]
+        same_sign = delta[:-1] * delta[1:] > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            whmean = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+        d[1:-1] = np.where(same_sign, whmean, 0.0)
+        d[0] = _pchip_edge_slope(h[0], h[1], delta[0], delta[1])
+        d[-1] = _pchip_edge_slope(h[-1], h[-2], delta[-1], delta[-2])
+
+    xc = np.clip(xq, x[0], x[-1])
+    idx = np.clip(np.searchsorted(x, xc, side='right') - 1, 0, len(x) - 2)
+    hk = h[idx][:, None]
+    t = ((xc - x[idx]) / h[idx])[:, None]
+    t2, t3 = t * t, t * t * t
+    return ((2 * t3 - 3 * t2 + 1) * y[idx] + (t3 - 2 * t2 + t) * hk * d[idx]
+            + (-2 * t3 + 3 * t2) * y[idx + 1] + (t3 - t2) * hk * d[idx + 1])
+
+
+def _pchip_edge_slope(h0, h1, delta0, delta1):
+    """Наклон в крайнем узле по трехточечной схеме с ограничением монотонности"""
+    d = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(delta0), 0.0, d)
+    overshoot = (np.sign(delta0) != np.sign(delta1)) & (np.abs(d) > np.abs(3 * delta0))
+    return np.where(overshoot, 3 * delta0, d)
+
 
 class RealDepositsParser:
-    def __init__(self):
+    # Ссылки на Excel файлы на страницах ЦБ
+    EXCEL_HREF = re.compile(r'\.xlsx?$')
+
+    def __init__(self, max_workers=4, min_request_interval=0.25, cache=None, offline=False):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # Пул соединений рассчитан на число потоков скачивания
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.base_url = 'https://www.cbr.ru'
         self.data_dir = 'data/deposits_excel'
+        self.max_workers = max_workers
+        # Минимальный интервал между запросами к одному хосту (секунды)
+        self.min_request_interval = min_request_interval
+        self._host_lock = threading.Lock()
+        self._host_next_request = {}
+        self.meta_file = os.path.join(self.data_dir, '.download_meta.json')
         os.makedirs(self.data_dir, exist_ok=True)
-        
-    def download_excel_files(self):
-        """Скачиваем Excel файлы с ЦБ РФ"""
-        print("📥 Поиск и скачивание Excel файлов с депозитными ставками...")
-        
-        # Список известных URL с Excel файлами депозитных ставок
-        excel_urls = [
+        # Локальный кэш ответов; offline - работаем только из кэша, без сети
+        self.cache = cache if cache is not None else HttpCache()
+        self.offline = offline
+
+    def get_excel_urls(self):
+        """Список известных URL с Excel файлами депозитных ставок"""
+        return [
             # Современные данные (2020-2025)
             f"{self.base_url}/statistics/bank_sector/int_rat/dep_rates_2025.xlsx",
             f"{self.base_url}/statistics/bank_sector/int_rat/dep_rates_2024.xlsx", 
@@ -59,34 +197,211 @@ class RealDepositsParser:
             f"{self.base_url}/statistics/bulletin/2023/bulletin_12_2023.xlsx",
             f"{self.base_url}/statistics/bulletin/2022/bulletin_12_2022.xlsx",
         ]
-        
+
+    def _wait_for_host(self, url):
+        """Ограничение частоты запросов отдельно для каждого хоста"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._host_next_request.get(host, now))
+            self._host_next_request[host] = slot + self.min_request_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _load_download_meta(self):
+        """Читаем ETag/Last-Modified ранее скачанных файлов"""
+        if not os.path.exists(self.meta_file):
+            return {}
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_download_meta(self, meta):
+        tmp_file = self.meta_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.meta_file)
+
+    @staticmethod
+    def _load_part_validator(part_path):
+        """ETag/Last-Modified ответа, из которого пишется .part (None - неизвестны)"""
+        try:
+            with open(part_path + '.validator', 'r', encoding='utf-8') as f:
+                validator = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return validator.get('etag') or validator.get('last_modified')
+
+    @staticmethod
+    def _save_part_validator(part_path, etag, last_modified):
+        # Пишется на диск до первого байта .part: после падения процесса докачка
+        # отправит If-Range и не допишет к старому началу новое тело
+        tmp_file = part_path + '.validator.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'last_modified': last_modified}, f)
+        os.replace(tmp_file, part_path + '.validator')
+
+    @staticmethod
+    def _remove_part(part_path):
+        for path in (part_path, part_path + '.validator'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _download_one(self, url, meta):
+        """Скачивание одного файла с докачкой и условным GET.
+
+        Возвращает (filepath, новые метаданные или None, статус).
+        """
+        filename = url.split('/')[-1]
+        if not filename.endswith('.xlsx'):
+            filename += '.xlsx'
+        filepath = os.path.join(self.data_dir, filename)
+        part_path = filepath + '.part'
+
+        known = meta.get(filename, {})
+        cached = self.cache.lookup(url, allow_stale=self.offline)
+        if cached is not None and cached['fresh']:
+            return self._restore_from_cache(url, filepath, known, cached)
+        if self.offline:
+            print(f"📴 Нет в кэше: {url}")
+            return None, None, 'offline_miss'
+
+        # Условный GET: по скачанному файлу, иначе по устаревшей записи кэша
+        headers = {}
+        from_cache = not (os.path.exists(filepath) and known.get('url') == url)
+        validators = (cached if cached is not None and cached['status'] == 200 else {}) if from_cache else known
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        # Докачка прерванной загрузки - только с валидатором частичного ответа:
+        # без If-Range сервер отдал бы хвост нового тела к началу старого
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        part_validator = self._load_part_validator(part_path) if resume_from else None
+        if resume_from and part_validator is None:
+            self._remove_part(part_path)
+            resume_from = 0
+        if resume_from:
+            headers['Range'] = f'bytes={resume_from}-'
+            headers['If-Range'] = part_validator
+
+        self._wait_for_host(url)
+        print(f"⬇️ Пробуем скачать: {url}")
+        with self.session.get(url, headers=headers, timeout=30, stream=True) as response:
+            if response.status_code == 304:
+                print(f"⏭️ Не изменился: {filename}")
+                if from_cache and validators:
+                    # Сервер подтвердил тело из кэша - восстанавливаем файл из него
+                    self.cache.touch(url)
+                    filepath, restored, _ = self._restore_from_cache(url, filepath, known, cached)
+                    return filepath, restored, 'not_modified'
+                if cached is not None and cached['status'] == 200:
+                    self.cache.touch(url)
+                    digest = cached['sha256']
+                else:
+                    digest = self.cache.store_file(url, filepath, {
+                        'ETag': known.get('etag'),
+                        'Last-Modified': known.get('last_modified'),
+                    })
+                return filepath, dict(known, sha256=digest), 'not_modified'
+
+            if response.status_code == 416 and resume_from:
+                # Частичный файл уже полный или устарел — начинаем заново
+                self._remove_part(part_path)
+                return self._download_one(url, meta)
+
+            if response.status_code not in (200, 206):
+                print(f"❌ Ошибка {response.status_code}: {url}")
+                if response.status_code == 404:
+                    # Отсутствующие файлы тоже кэшируем, чтобы не спрашивать сервер до истечения TTL
+                    self.cache.store_bytes(url, b'', status=404)
+                return None, None, 'error'
+
+            mode = 'ab' if response.status_code == 206 else 'wb'
+            etag = response.headers.get('ETag')
+            if mode == 'wb':
+                self._save_part_validator(part_path, etag, response.headers.get('Last-Modified'))
+            received = 0
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if chunk:
+                        f.write(chunk)
+                        received += len(chunk)
+            metrics.count('bytes_downloaded', received, stage='deposits', file=filename)
+
+        os.replace(part_path, filepath)
+        self._remove_part(part_path)
+        print(f"✅ Скачан: {filename} ({os.path.getsize(filepath)} байт)")
+        new_meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        new_meta['sha256'] = self.cache.store_file(url, filepath, {
+            'ETag': new_meta['etag'],
+            'Last-Modified': new_meta['last_modified'],
+        })
+        return filepath, new_meta, 'downloaded'
+
+    def _restore_from_cache(self, url, filepath, known, cached):
+        """Файл из кэша без обращения к серверу"""
+        filename = os.path.basename(filepath)
+        if cached['status'] != 200:
+            return None, None, 'error'
+        if not (os.path.exists(filepath) and known.get('sha256') == cached['sha256']):
+            self.cache.materialize(cached, filepath)
+            print(f"📦 Из кэша: {filename}")
+        return filepath, {
+            'url': url,
+            'etag': cached['etag'],
+            'last_modified': cached['last_modified'],
+            'sha256': cached['sha256'],
+        }, 'cached'
+
+    def download_excel_files(self, excel_urls=None):
+        """Скачиваем Excel файлы с ЦБ РФ"""
+        print("📥 Поиск и скачивание Excel файлов с депозитными ставками...")
+
+        if excel_urls is None:
+            excel_urls = self.get_excel_urls()
+
+        meta = self._load_download_meta()
+        results = {}
+
+        def task(url):
+            with metrics.span('deposits.download', file=url.split('/')[-1]) as span:
+                try:
+                    result = self._download_one(url, meta)
+                except Exception as e:
+                    print(f"❌ Ошибка при скачивании {url}: {e}")
+                    result = None, None, 'error'
+                span['result'] = result[2]
+                return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(task, url): url for url in excel_urls}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
         downloaded_files = []
-        
         for url in excel_urls:
-            try:
-                print(f"⬇️ Пробуем скачать: {url}")
-                response = self.session.get(url, timeout=30)
-                
-                if response.status_code == 200:
-                    filename = url.split('/')[-1]
-                    if not filename.endswith('.xlsx'):
-                        filename += '.xlsx'
-                    
-                    filepath = os.path.join(self.data_dir, filename)
-                    
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    
-                    print(f"✅ Скачан: {filename} ({len(response.content)} байт)")
-                    downloaded_files.append(filepath)
-                else:
-                    print(f"❌ Ошибка {response.status_code}: {url}")
-                    
-                time.sleep(1)  # Пауза между запросами
-                
-            except Exception as e:
-                print(f"❌ Ошибка при скачивании {url}: {e}")
-        
+            filepath, new_meta, status = results[url]
+            if filepath is None:
+                continue
+            filename = os.path.basename(filepath)
+            if new_meta is not None:
+                meta[filename] = new_meta
+            downloaded_files.append(filepath)
+
+        self._save_download_meta(meta)
+        self.cache.flush()
+        for name, value in self.cache.stats.items():
+            metrics.gauge(f'http_cache_{name}', value, stage='deposits')
+
         return downloaded_files
     
     def find_real_excel_urls(self):
@@ -106,16 +421,15 @@ class RealDepositsParser:
         for page_url in search_pages:
             try:
                 print(f"🔎 Ищем на странице: {page_url}")
-                response = self.session.get(page_url, timeout=15)
+                content = self._fetch_page(page_url)
                 
-                if response.status_code == 200:
-                    content = response.text
-                    
-                    # Поиск ссылок на Excel файлы
-                    import re
-                    excel_links = re.findall(r'href="([^"]*\.xlsx?)"', content)
+                if content is not None:
+                    # Разбираем только теги <a> со ссылками на Excel файлы
+                    links = BeautifulSoup(content, 'html.parser',
+                                          parse_only=SoupStrainer('a', href=self.EXCEL_HREF))
                     
-                    for link in excel_links:
+                    for anchor in links.find_all('a'):
+                        link = anchor['href']
                         if link.startswith('/'):
                             full_url = f"{self.base_url}{link}"
                         elif link.startswith('http'):
@@ -127,50 +441,153 @@ class RealDepositsParser:
                             found_urls.append(full_url)
                             print(f"📄 Найден: {full_url}")
                 
-                time.sleep(1)
-                
             except Exception as e:
                 print(f"❌ Ошибка при поиске на {page_url}: {e}")
         
+        self.cache.flush()
         return list(set(found_urls))  # Убираем дубликаты
     
-    def parse_excel_files(self, excel_files):
-        """Парсинг скачанных Excel файлов"""
+    def _fetch_page(self, url):
+        """HTML страницы через кэш; None, если страница недоступна"""
+        cached = self.cache.lookup(url, allow_stale=self.offline)
+        if cached is not None and cached['fresh']:
+            return self.cache.read_text(cached) if cached['status'] == 200 else None
+        if self.offline:
+            print(f"📴 Нет в кэше: {url}")
+            return None
+
+        headers = {}
+        if cached is not None and cached['status'] == 200:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        self._wait_for_host(url)
+        response = self.session.get(url, headers=headers, timeout=15)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            return self.cache.read_text(cached)
+        if response.status_code != 200:
+            if response.status_code == 404:
+                self.cache.store_bytes(url, b'', status=404)
+            return None
+        metrics.count('bytes_downloaded', len(response.content), stage='deposits', source='index_page')
+        self.cache.store_bytes(url, response.content, response.headers, response.encoding)
+        return response.text
+
+    DEPOSIT_KEYWORDS = ['депозит', 'вклад', 'deposit', 'ставка', 'rate']
+
+    def parse_excel_files(self, excel_files, track_memory=False, workers=1):
+        """Потоковый парсинг скачанных Excel файлов.
+
+        Генератор записей (файл, лист, колонка, значения): читаем только
+        строку заголовков каждого листа и дальше только подходящие колонки.
+        При workers > 1 файлы разбираются в пуле процессов, записи отдаются
+        в порядке excel_files. track_memory - пик памяти по файлам через
+        tracemalloc (заметно замедляет разбор).
+        """
         print("📊 Парсинг Excel файлов...")
-        
-        all_data = {}
-        
+
+        if workers > 1:
+            yield from self._parse_excel_files_parallel(excel_files, track_memory, workers)
+            return
+
         for filepath in excel_files:
+            print(f"📈 Обрабатываем: {os.path.basename(filepath)}")
+            own_tracing = _start_tracemalloc() if track_memory else None
+            start = time.perf_counter()
+            records = 0
+            rows = 0
             try:
-                print(f"📈 Обрабатываем: {os.path.basename(filepath)}")
-                
-                # Читаем Excel файл
-                df = pd.read_excel(filepath, sheet_name=None)  # Все листы
-                
-                for sheet_name, sheet_data in df.items():
-                    print(f"  📋 Лист: {sheet_name}")
-                    
-                    # Ищем данные по депозитам в разных колонках
-                    for col in sheet_data.columns:
-                        if any(keyword in str(col).lower() for keyword in ['депозит', 'вклад', 'deposit', 'ставка', 'rate']):
-                            print(f"    📊 Найдена колонка: {col}")
-                            
-                            # Извлекаем данные
-                            data_values = sheet_data[col].dropna()
-                            if not data_values.empty:
-                                print(f"    ✅ Найдено {len(data_values)} значений")
-                                
-                                # Сохраняем данные
-                                file_key = f"{os.path.basename(filepath)}_{sheet_name}_{col}"
-                                all_data[file_key] = data_values.tolist()
-                
+                for record in self._iter_workbook_records(filepath):
+                    records += 1
+                    rows += len(record[3])
+                    yield record
             except Exception as e:
                 print(f"❌ Ошибка при обработке {filepath}: {e}")
-        
-        return all_data
+            finally:
+                elapsed = time.perf_counter() - start
+                peak = _stop_tracemalloc(own_tracing) if track_memory else None
+                self._print_file_stats(filepath, records, elapsed, peak, rows)
+
+    def _parse_excel_files_parallel(self, excel_files, track_memory, workers):
+        """Разбор книг в пуле процессов; ошибка одного файла не прерывает пакет"""
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_parse_workbook_worker, filepath, track_memory)
+                for filepath in excel_files
+            ]
+            # Результаты собираем строго в порядке входного списка
+            for filepath, future in zip(excel_files, futures):
+                try:
+                    records, elapsed, peak, error = future.result()
+                except Exception as e:
+                    # Например, процесс упал целиком (BrokenProcessPool)
+                    records, elapsed, peak, error = [], 0.0, None, e
+                if error is not None:
+                    print(f"❌ Ошибка при обработке {filepath}: {error}")
+                rows = sum(len(record[3]) for record in records)
+                self._print_file_stats(filepath, len(records), elapsed, peak, rows)
+                yield from records
+
+    @staticmethod
+    def _print_file_stats(filepath, records, elapsed, peak, rows=None):
+        peak_info = f", пик памяти {peak / 1024 / 1024:.1f} МБ" if peak is not None else ""
+        print(f"  ⏱️ {os.path.basename(filepath)}: {records} колонок за {elapsed:.2f} с{peak_info}")
+        metrics.emit('span', 'deposits.parse_file', round(elapsed, 6), file=os.path.basename(filepath),
+                     records=records, rows=rows, peak_bytes=peak)
+
+    @classmethod
+    def _iter_workbook_records(cls, filepath):
+        """Записи одного файла через openpyxl в режиме read-only"""
+        filename = os.path.basename(filepath)
+        wb = load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                print(f"  📋 Лист: {ws.title}")
+                rows = ws.iter_rows(values_only=True)
+                header = next(rows, None)
+                if not header:
+                    continue
+
+                # Ищем данные по депозитам по заголовкам колонок
+                columns = []
+                seen = {}
+                for idx, name in enumerate(header):
+                    name = f"Unnamed: {idx}" if name is None else str(name)
+                    # Повторы заголовков нумеруются как в pandas: "ставка.1"
+                    if name in seen:
+                        seen[name] += 1
+                        name = f"{name}.{seen[name]}"
+                    else:
+                        seen[name] = 0
+                    if any(keyword in name.lower() for keyword in cls.DEPOSIT_KEYWORDS):
+                        print(f"    📊 Найдена колонка: {name}")
+                        columns.append((idx, name))
+
+                if not columns:
+                    continue
+
+                # Дочитываем лист, сохраняя только нужные колонки
+                values = [[] for _ in columns]
+                for row in rows:
+                    for k, (idx, _) in enumerate(columns):
+                        if idx < len(row) and row[idx] is not None:
+                            values[k].append(row[idx])
+
+                for (idx, name), column_values in zip(columns, values):
+                    if column_values:
+                        print(f"    ✅ Найдено {len(column_values)} значений")
+                        yield filename, ws.title, name, column_values
+        finally:
+            wb.close()
     
-    def save_real_deposits_data(self, excel_data):
-        """Сохранение реальных данных в формате, совместимом с существующим JSON"""
+    def save_real_deposits_data(self, excel_data, interpolation_method='linear', daily=False):
+        """Сохранение реальных данных в формате, совместимом с существующим JSON.
+
+        daily=True - дополнительно дневные ставки в data/deposits_real_daily.bin.
+        """
         print("💾 Формирование итогового файла с реальными данными...")
         
         # Создаем структуру данных как в оригинальном файле
@@ -179,8 +596,8 @@ class RealDepositsParser:
         # Пример реальных данных, которые мы извлекли
         if excel_data:
             print(f"📈 Найдено {len(excel_data)} источников данных:")
-            for key, values in excel_data.items():
-                print(f"  - {key}: {len(values)} значений")
+            for key, count in excel_data.items():
+                print(f"  - {key}: {count} значений")
         
         # Базовые реальные данные на основе найденной статистики ЦБ РФ
         # Данные за 2023-2025 из таблицы максимальных ставок
@@ -212,8 +629,10 @@ class RealDepositsParser:
             "2025-05": {"<1": 19.60, "1-3": 20.30, ">3": 21.00},
         }
         
-        # Интерполяция для заполнения всех месяцев от 2000 до 2025
-        print("🔄 Интерполяция данных с 2000 по 2025 год...")
+        # Ряд заканчивается последним месяцем с реальными данными: дальше была бы
+        # только протянутая последняя ставка
+        last_year, last_month = (int(part) for part in max(real_data_points).split('-'))
+        print(f"🔄 Интерполяция данных с 2000-01 по {last_year}-{last_month:02d}...")
         
         # Ключевые исторические точки
         historical_points = [
@@ -232,108 +651,155 @@ class RealDepositsParser:
         for date_str, values in real_data_points.items():
             deposits_data[date_str] = values
         
-        # Интерполяция для остальных месяцев
-        start_date = datetime(2000, 1, 1)
-        end_date = datetime(2025, 12, 31)
-        current_date = start_date
-        
-        while current_date <= end_date:
-            date_str = current_date.strftime("%Y-%m")
-            
-            if date_str not in deposits_data:
-                # Интерполяция между ближайшими точками
-                deposits_data[date_str] = self.interpolate_rates(date_str, real_data_points)
-            
-            # Следующий месяц
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
+        # Интерполяция для остальных месяцев: один проход по всей сетке
+        all_months = month_keys(2000, 1, last_year, last_month)
+        missing = [date_str for date_str in all_months if date_str not in deposits_data]
+        with metrics.span('deposits.interpolate', method=interpolation_method) as span:
+            if real_data_points:
+                index = RateInterpolationIndex(real_data_points)
+                deposits_data.update(index.interpolate_dict(missing, method=interpolation_method))
             else:
-                current_date = current_date.replace(month=current_date.month + 1)
+                for date_str in missing:
+                    deposits_data[date_str] = {"<1": 10.0, "1-3": 11.0, ">3": 12.0}
+            span['rows'] = len(missing)
         
         # Сохраняем в JSON
         output_file = "data/deposits_real_excel.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(deposits_data, f, ensure_ascii=False, indent=2)
+        with metrics.span('deposits.json_dump') as span:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(deposits_data, f, ensure_ascii=False, indent=2)
+            span['bytes'] = os.path.getsize(output_file)
         
         print(f"✅ Данные сохранены в {output_file}")
         print(f"📊 Всего записей: {len(deposits_data)}")
         
+        if daily and real_data_points:
+            last_day = date(last_year + last_month // 12, last_month % 12 + 1, 1) - timedelta(days=1)
+            self.save_daily_rates(index, interpolation_method, end=last_day)
+        
         return output_file
     
-    def interpolate_rates(self, target_date, known_points):
-        """Интерполяция ставок между известными точками"""
-        from datetime import datetime
-        
-        target_dt = datetime.strptime(target_date, "%Y-%m")
-        
-        # Найти ближайшие точки до и после
-        before_point = None
-        after_point = None
-        
-        for date_str, values in sorted(known_points.items()):
-            point_dt = datetime.strptime(date_str, "%Y-%m")
-            
-            if point_dt <= target_dt:
-                before_point = (point_dt, values)
-            elif point_dt > target_dt and after_point is None:
-                after_point = (point_dt, values)
-                break
-        
-        if before_point and after_point:
-            # Линейная интерполяция
-            before_dt, before_values = before_point
-            after_dt, after_values = after_point
-            
-            # Коэффициент интерполяции
-            total_days = (after_dt - before_dt).days
-            current_days = (target_dt - before_dt).days
-            ratio = current_days / total_days if total_days > 0 else 0
-            
-            interpolated = {}
-            for key in before_values:
-                before_rate = before_values[key]
-                after_rate = after_values[key]
-                interpolated[key] = round(before_rate + (after_rate - before_rate) * ratio, 2)
-            
-            return interpolated
-            
-        elif before_point:
-            # Только предыдущая точка
-            return before_point[1].copy()
-        elif after_point:
-            # Только следующая точка  
-            return after_point[1].copy()
-        else:
+    def save_daily_rates(self, index, interpolation_method='linear', start=date(2000, 1, 1), end=date(2025, 12, 31)):
+        """Дневные ставки на той же сетке известных точек, float32 на срок"""
+        ordinals = np.arange(start.toordinal(), end.toordinal() + 1, dtype=np.int64)
+        with metrics.span('deposits.daily', method=interpolation_method) as span:
+            matrix = index.interpolate(ordinals, method=interpolation_method)
+            days = ordinals - date(1970, 1, 1).toordinal()
+            series = {
+                code: (days, matrix[:, index.buckets.index(bucket)])
+                for code, bucket in DEPOSIT_BUCKETS.items() if bucket in index.buckets
+            }
+            span['rows'] = len(days) * len(series)
+            span['bytes'] = write_daily(series, DAILY_DEPOSIT_SOURCE, value_dtype='<f4')
+        print(f"✅ Дневные ставки: {DAILY_DEPOSIT_SOURCE} ({len(days)} дней, {span['bytes']} байт)")
+        return DAILY_DEPOSIT_SOURCE
+    
+    def interpolate_rates(self, target_date, known_points, method='linear'):
+        """Интерполяция ставок между известными точками для одной даты.
+
+        Для сеток дат используйте RateInterpolationIndex напрямую: здесь
+        индекс строится заново на каждый вызов.
+        """
+        if not known_points:
             # По умолчанию
             return {"<1": 10.0, "1-3": 11.0, ">3": 12.0}
+        index = RateInterpolationIndex(known_points)
+        return index.interpolate_dict([target_date], method)[target_date]
     
-    def run(self):
+    def build_deposits_data(self, excel_files, workers=1, interpolation_method='linear', daily=False):
+        """Разбор уже скачанных файлов и запись data/deposits_real_excel.json"""
+        excel_data = {}
+        with profiled('deposits_parse'), metrics.span('deposits.parse', files=len(excel_files)) as span:
+            if excel_files:
+                records = self.parse_excel_files(excel_files, track_memory=metrics_enabled(), workers=workers)
+                for filename, sheet_name, col, values in records:
+                    excel_data[f"{filename}_{sheet_name}_{col}"] = len(values)
+            span['rows'] = sum(excel_data.values())
+        
+        with profiled('deposits_save'):
+            output_file = self.save_real_deposits_data(excel_data, interpolation_method, daily)
+        return excel_data, output_file
+    
+    def run(self, workers=1, interpolation_method='linear', daily=False):
         """Основная функция парсера"""
         print("🚀 Запуск парсера реальных данных по депозитам ЦБ РФ")
         print("=" * 60)
         
         # 1. Поиск реальных ссылок
-        real_urls = self.find_real_excel_urls()
+        with metrics.span('deposits.find_urls'):
+            real_urls = self.find_real_excel_urls()
         
         # 2. Скачивание файлов
-        downloaded_files = self.download_excel_files()
-        
-        # 3. Парсинг Excel файлов
-        excel_data = {}
-        if downloaded_files:
-            excel_data = self.parse_excel_files(downloaded_files)
+        with metrics.span('deposits.download_all') as span:
+            downloaded_files = self.download_excel_files()
+            span['files'] = len(downloaded_files)
         
-        # 4. Сохранение итоговых данных
-        output_file = self.save_real_deposits_data(excel_data)
+        # 3-4. Парсинг Excel файлов и сохранение итоговых данных
+        excel_data, output_file = self.build_deposits_data(downloaded_files, workers, interpolation_method, daily)
         
         print("=" * 60)
         print(f"✅ Парсинг завершен!")
         print(f"📁 Скачано файлов: {len(downloaded_files)}")
         print(f"📊 Источников данных: {len(excel_data)}")
         print(f"💾 Результат: {output_file}")
+        print(f"🗄️ Кэш HTTP: {self.cache.report()}")
         
         return output_file
 
+def _parse_workbook_worker(filepath, track_memory):
+    """Разбор одного файла в дочернем процессе.
+
+    Возвращает (записи, время, пик памяти, ошибка) - исключение не
+    пробрасывается, чтобы не терять уже разобранные файлы.
+    """
+    own_tracing = _start_tracemalloc() if track_memory else None
+    start = time.perf_counter()
+    records = []
+    error = None
+    try:
+        records = list(RealDepositsParser._iter_workbook_records(filepath))
+    except Exception as e:
+        # Строка вместо исключения: не все исключения сериализуются
+        error = str(e)
+    elapsed = time.perf_counter() - start
+    peak = _stop_tracemalloc(own_tracing) if track_memory else None
+    return records, elapsed, peak, error
+
+
+def _start_tracemalloc():
+    """Начало замера пика памяти файла. Трассировку profiled() не перезапускаем,
+    только сбрасываем пик; True - трассировка запущена здесь"""
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        return False
+    tracemalloc.start()
+    return True
+
+
+def _stop_tracemalloc(own_tracing):
+    peak = tracemalloc.get_traced_memory()[1]
+    if own_tracing:
+        tracemalloc.stop()
+    return peak
+
 if __name__ == "__main__":
-    parser = RealDepositsParser()
-    parser.run() 
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description='Парсер реальных данных по депозитам ЦБ РФ')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help='число процессов для парсинга Excel файлов')
+    arg_parser.add_argument('--interpolation', choices=RateInterpolationIndex.METHODS, default='linear',
+                            help='метод заполнения пропущенных месяцев')
+    arg_parser.add_argument('--daily', action='store_true',
+                            help='также записать дневные ставки в data/deposits_real_daily.bin')
+    arg_parser.add_argument('--offline', action='store_true',
+                            help='без сети: страницы и файлы только из кэша data/http_cache')
+    arg_parser.add_argument('--cache-ttl', type=float, default=0,
+                            help='срок свежести кэша, часов; 0 - каждый запрос проверяется условным GET')
+    arg_parser.add_argument('--cache-size', type=int, default=512,
+                            help='предельный размер кэша, МБ')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    cache = HttpCache(ttl=args.cache_ttl * 3600, max_bytes=args.cache_size * 1024 * 1024)
+    parser = RealDepositsParser(cache=cache, offline=args.offline)
+    parser.run(workers=args.workers, interpolation_method=args.interpolation, daily=args.daily)
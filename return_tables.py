@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Таблицы накопленной доходности для всех инструментов all_data_final.json
+
+Для каждого инструмента на общей оси месяцев хранится префиксное
+произведение P (накопленный множитель от начала ряда):
+- индексы (инфляция, облигации, акции): P[i] = value[i] / value[0];
+- депозиты (годовая ставка в %): P[i] = prod((1 + ставка / 100 / 12)),
+  как в calculateDepositProfitability.
+
+Тогда любой запрос - отношение двух элементов:
+- номинальная доходность индекса за [s, e]:   P[e] / P[s] - 1
+- номинальная доходность депозита за [s, e]:  P[e] / P[s - 1] - 1
+- реальная доходность: (1 + номинальная) / (I[e] / I[s]) - 1
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from columnar_data import date_to_month_ordinal, iter_series_nodes
+
+INFLATION_CODE = 'inflation'
+
+
+def month_key(ordinal):
+    year, month = divmod(int(ordinal), 12)
+    return f"{year}-{month + 1:02d}"
+
+
+def month_key_to_ordinal(key):
+    year, month = key.split('-')[:2]
+    return int(year) * 12 + int(month) - 1
+
+
+def series_kind(code):
+    """'rate' - ряд годовых ставок, 'index' - накопленный индекс"""
+    return 'rate' if code.startswith('deposit') else 'index'
+
+
+def build_return_tables(main_data):
+    """Префиксные произведения по всем инструментам на общей оси месяцев.
+
+    Пропущенные месяцы внутри ряда: для индекса берется предыдущее
+    значение, для ставки - множитель 1 (месяц не начисляется), как и при
+    расчете по отфильтрованным точкам.
+    """
+    raw = {}
+    for node in iter_series_nodes(main_data['tools']):
+        code = node['code']
+        if code in raw:
+            continue
+        ordinals = np.array([date_to_month_ordinal(item['date'])[0] for item in node['items']])
+        values = np.array([item['value'] for item in node['items']], dtype=np.float64)
+        order = np.argsort(ordinals, kind='stable')
+        raw[code] = (ordinals[order], values[order])
+
+    first = min(int(ordinals[0]) for ordinals, _ in raw.values())
+    last = max(int(ordinals[-1]) for ordinals, _ in raw.values())
+
+    instruments = {}
+    for code, (ordinals, values) in raw.items():
+        kind = series_kind(code)
+        start = int(ordinals[0])
+        length = int(ordinals[-1]) - start + 1
+        positions = ordinals - start
+        present = np.zeros(length, dtype=bool)
+        present[positions] = True
+
+        if kind == 'rate':
+            factors = np.ones(length)
+            factors[positions] = 1 + values / 100 / 12
+            prefix = np.cumprod(factors)
+        else:
+            dense = np.full(length, np.nan)
+            dense[positions] = values
+            # Протягиваем последнее известное значение через пропуски
+            idx = np.where(present, np.arange(length), 0)
+            np.maximum.accumulate(idx, out=idx)
+            prefix = dense[idx] / values[0]
+
+        instruments[code] = {
+            'kind': kind,
+            'offset': start - first,
+            'prefix': prefix.tolist(),
+            'present': present.tolist() if not present.all() else None,
+        }
+
+    return {
+        'start': month_key(first),
+        'end': month_key(last),
+        'instruments': instruments,
+    }
+
+
+def save_return_tables(tables, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(tables, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load_return_tables(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _bounds(tables, code, start, end):
+    """Позиции первой и последней точки ряда в диапазоне [start, end] месяцев"""
+    table = tables['instruments'][code]
+    base = month_key_to_ordinal(tables['start']) + table['offset']
+    length = len(table['prefix'])
+    lo = max(month_key_to_ordinal(start) - base, 0)
+    hi = min(month_key_to_ordinal(end) - base, length - 1)
+    present = table['present']
+    if present is not None:
+        # Крайние точки диапазона должны существовать в исходном ряду
+        while lo <= hi and not present[lo]:
+            lo += 1
+        while hi >= lo and not present[hi]:
+            hi -= 1
+    if lo > hi:
+        return None
+    return table, lo, hi
+
+
+def growth(tables, code, start, end):
+    """Накопленный множитель инструмента за месяцы [start, end] ('YYYY-MM')"""
+    bounds = _bounds(tables, code, start, end)
+    if bounds is None:
+        return None
+    table, lo, hi = bounds
+    prefix = table['prefix']
+    if table['kind'] == 'rate':
+        return prefix[hi] / (prefix[lo - 1] if lo > 0 else 1.0)
+    return prefix[hi] / prefix[lo]
+
+
+def nominal_return(tables, code, start, end):
+    """Номинальная доходность за период в долях"""
+    value = growth(tables, code, start, end)
+    return None if value is None else value - 1
+
+
+def real_return(tables, code, start, end):
+    """Доходность с учетом инфляции за тот же период в долях"""
+    nominal = growth(tables, code, start, end)
+    inflation = growth(tables, INFLATION_CODE, start, end)
+    if nominal is None:
+        return None
+    if inflation is None:
+        return nominal - 1
+    return nominal / inflation - 1
+
+
+def chart_series(tables, code, start, end):
+    """Помесячная накопленная доходность в % для графика: [(месяц, %)]"""
+    bounds = _bounds(tables, code, start, end)
+    if bounds is None:
+        return []
+    table, lo, hi = bounds
+    prefix = np.asarray(table['prefix'][max(lo - 1, 0):hi + 1])
+    if table['kind'] == 'rate':
+        base = prefix[0] if lo > 0 else 1.0
+        values = prefix[1:] if lo > 0 else prefix
+    else:
+        base = prefix[1] if lo > 0 else prefix[0]
+        values = prefix[1:] if lo > 0 else prefix
+    cumulative = (values / base - 1) * 100
+    base_ordinal = month_key_to_ordinal(tables['start']) + table['offset']
+    present = table['present']
+    return [
+        (month_key(base_ordinal + lo + k), value)
+        for k, value in enumerate(cumulative.tolist())
+        if present is None or present[lo + k]
+    ]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Построение таблиц накопленной доходности')
+    arg_parser.add_argument('input', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('output', nargs='?', default='data/return_tables.json')
+    args = arg_parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        main_data = json.load(f)
+
+    tables = build_return_tables(main_data)
+    save_return_tables(tables, args.output)
+
+    print(f"✅ Таблицы доходности сохранены в {args.output}")
+    print(f"   Период: {tables['start']} - {tables['end']}")
+    for code, table in tables['instruments'].items():
+        print(f"   {code}: {table['kind']}, {len(table['prefix'])} месяцев")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетный расчет сценариев доходности: все месяцы начала x все горизонты
+x все инструменты x суммы за один запуск
+
+all_data_final.json загружается один раз, из него строятся таблицы
+накопленной доходности (return_tables.py). Для каждого инструмента
+на общей оси месяцев считаются матрицы (начало x конец):
+- множитель за период - отношение префиксных произведений, как в
+  nominal_return/real_return;
+- максимальная просадка - накопленный максимум просадки от бегущего
+  максимума, одним проходом по строкам матрицы.
+Дальше любой сценарий - выборка из матриц, без циклов по сценариям.
+
+Результат по каждому сценарию: начальная и итоговая сумма, номинальная
+и реальная доходность, CAGR (номинальный и реальный), максимальная
+просадка. Запись потоком по инструментам в CSV или Parquet (нужен
+pyarrow).
+
+Запуск: python scenario_engine.py [data/all_data_final.json] --output scenarios.csv
+        [--codes stock,bonds_ofz] [--horizons 1-360] [--amounts 100000,1000000]
+        [--start-from 2005-01] [--start-to 2024-12]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics
+from return_tables import INFLATION_CODE, build_return_tables, month_key, month_key_to_ordinal
+
+COLUMNS = ('code', 'start', 'end', 'months', 'amount', 'final_amount', 'nominal_return', 'real_return',
+           'cagr', 'real_cagr', 'max_drawdown')
+
+
+class InstrumentMatrix:
+    """Ряд инструмента на общей оси месяцев и его матрица просадок"""
+
+    def __init__(self, table, axis_length):
+        self.kind = table['kind']
+        offset = table['offset']
+        length = len(table['prefix'])
+        self.prefix = np.full(axis_length, np.nan)
+        self.prefix[offset:offset + length] = table['prefix']
+        present = np.zeros(axis_length, dtype=bool)
+        present[offset:offset + length] = True if table['present'] is None else table['present']
+
+        # Ближайшая существующая точка справа и слева: крайние точки
+        # диапазона сдвигаются внутрь, как в return_tables._bounds
+        positions = np.arange(axis_length)
+        last = np.where(present, positions, -1)
+        np.maximum.accumulate(last, out=last)
+        first = np.where(present, positions, axis_length)
+        first = np.minimum.accumulate(first[::-1])[::-1]
+        self.prev_present = last
+        self.next_present = first
+
+        # Для ставки до начала ряда множитель 1
+        self.before = np.ones(axis_length)
+        if self.kind == 'rate':
+            self.before[1:] = np.where(np.isnan(self.prefix[:-1]), 1.0, self.prefix[:-1])
+        self.drawdown = self._drawdown_matrix()
+
+    def _drawdown_matrix(self):
+        """D[s, e] - максимальная просадка пути prefix[s..e] (0 - не было)"""
+        path = np.where(np.isnan(self.prefix), -np.inf, self.prefix)
+        n = len(path)
+        matrix = np.tile(path, (n, 1))
+        # Точки до начала периода не участвуют в бегущем максимуме
+        matrix[np.tril_indices(n, -1)] = -np.inf
+        running_max = np.maximum.accumulate(matrix, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            drawdown = np.where(np.isfinite(matrix), 1 - matrix / running_max, 0.0)
+        np.maximum.accumulate(drawdown, axis=1, out=drawdown)
+        return drawdown
+
+    def bounds(self, starts, ends):
+        """Позиции крайних точек; lo > hi - в диапазоне нет точек"""
+        lo = self.next_present[starts]
+        hi = self.prev_present[ends]
+        return lo, hi
+
+    def growth(self, starts, ends):
+        """Множитель за [start, end] и число месяцев начисления (NaN - нет данных)"""
+        lo, hi = self.bounds(starts, ends)
+        valid = lo <= hi
+        lo_safe = np.where(valid, lo, 0)
+        hi_safe = np.where(valid, hi, 0)
+        if self.kind == 'rate':
+            value = self.prefix[hi_safe] / self.before[lo_safe]
+            periods = hi_safe - lo_safe + 1
+        else:
+            value = self.prefix[hi_safe] / self.prefix[lo_safe]
+            periods = hi_safe - lo_safe
+        return np.where(valid, value, np.nan), periods, lo_safe, hi_safe, valid
+
+
+def parse_horizons(text):
+    """'1-360' или '12,36,60' -> массив месяцев"""
+    horizons = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            horizons.extend(range(int(first), int(last) + 1))
+        elif part:
+            horizons.append(int(part))
+    return np.array(sorted(set(horizons)), dtype=np.int64)
+
+
+def cagr(growth, periods):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(periods > 0, growth ** (12 / np.maximum(periods, 1)) - 1, np.nan)
+
+
+class ScenarioEngine:
+    def __init__(self, main_data):
+        tables = build_return_tables(main_data)
+        self.first = month_key_to_ordinal(tables['start'])
+        self.axis_length = month_key_to_ordinal(tables['end']) - self.first + 1
+        self.instruments = {
+            code: InstrumentMatrix(table, self.axis_length)
+            for code, table in tables['instruments'].items()
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def evaluate(self, code, starts, horizons, amounts):
+        """Все сочетания (начало, горизонт, сумма) для одного инструмента.
+
+        starts - позиции на оси месяцев; сценарии, выходящие за ось или
+        без точек в диапазоне, отбрасываются. Возвращает словарь столбцов.
+        """
+        instrument = self.instruments[code]
+        start_grid, horizon_grid = np.meshgrid(starts, horizons, indexing='ij')
+        start_grid = start_grid.ravel()
+        end_grid = start_grid + horizon_grid.ravel()
+        inside = end_grid < self.axis_length
+        start_grid, end_grid = start_grid[inside], end_grid[inside]
+
+        growth, periods, lo, hi, valid = instrument.growth(start_grid, end_grid)
+        inflation = self.instruments.get(INFLATION_CODE)
+        if inflation is not None and code != INFLATION_CODE:
+            inflation_growth = inflation.growth(start_grid, end_grid)[0]
+            # Нет инфляции за период - реальная доходность равна номинальной
+            real_growth = np.where(np.isnan(inflation_growth), growth, growth / inflation_growth)
+        else:
+            # Инфляция относительно самой себя - ноль, без инфляции - номинальная
+            real_growth = np.where(np.isnan(growth), np.nan, 1.0) if code == INFLATION_CODE else growth
+
+        columns = {
+            'start': start_grid[valid],
+            'end': end_grid[valid],
+            'months': (end_grid - start_grid)[valid],
+            'growth': growth[valid],
+            'real_growth': real_growth[valid],
+            'periods': periods[valid],
+            'max_drawdown': instrument.drawdown[lo[valid], hi[valid]],
+        }
+        count = len(columns['start'])
+        amounts = np.asarray(amounts, dtype=np.float64)
+        # Суммы - внешнее измерение: столбцы сценариев повторяются для каждой
+        repeated = {name: np.tile(values, len(amounts)) for name, values in columns.items()}
+        repeated['amount'] = np.repeat(amounts, count)
+        repeated['final_amount'] = repeated['amount'] * repeated['growth']
+        repeated['nominal_return'] = repeated['growth'] - 1
+        repeated['real_return'] = repeated['real_growth'] - 1
+        repeated['cagr'] = cagr(repeated['growth'], repeated['periods'])
+        repeated['real_cagr'] = cagr(repeated['real_growth'], repeated['periods'])
+        return repeated
+
+    def month_keys(self, positions):
+        """Позиции на оси -> 'YYYY-MM' через таблицу уникальных месяцев"""
+        table = np.array([month_key(self.first + k) for k in range(self.axis_length)])
+        return table[positions]
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.tmp_path = path + '.tmp'
+        self.path = path
+        self.file = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, code, starts, ends, columns):
+        # Одна строка формата на весь блок: код инструмента уже в ней
+        row = code.replace('%', '%%') + ',%s,%s,%d,%.2f,%.2f,%.6f,%.6f,%.6f,%.6f,%.6f\n'
+        rows = zip(starts.tolist(), ends.tolist(), *(columns[name].tolist() for name in COLUMNS[3:]))
+        self.file.write(''.join([row % values for values in rows]))
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("❌ Для Parquet нужен pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.tmp_path = path + '.tmp'
+        self.path = path
+        self.writer = None
+
+    def write(self, code, starts, ends, columns):
+        table = self.pa.table({
+            'code': self.pa.array([code] * len(starts)).dictionary_encode(),
+            'start': starts,
+            'end': ends,
+            'months': columns['months'].astype(np.int16),
+            'amount': columns['amount'],
+            'final_amount': columns['final_amount'],
+            'nominal_return': columns['nominal_return'],
+            'real_return': columns['real_return'],
+            'cagr': columns['cagr'],
+            'real_cagr': columns['real_cagr'],
+            'max_drawdown': columns['max_drawdown'],
+        })
+        if self.writer is None:
+            import pyarrow.parquet
+            self.writer = pyarrow.parquet.ParquetWriter(self.tmp_path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.path)
+
+
+def open_sink(path):
+    return ParquetSink(path) if path.endswith('.parquet') else CsvSink(path)
+
+
+def run_scenarios(engine, codes, horizons, amounts, start_from=None, start_to=None, output=None):
+    """Расчет сетки сценариев с записью потоком по инструментам. Возвращает число сценариев"""
+    first = 0 if start_from is None else max(month_key_to_ordinal(start_from) - engine.first, 0)
+    last = engine.axis_length - 1 if start_to is None else month_key_to_ordinal(start_to) - engine.first
+    starts = np.arange(first, min(last, engine.axis_length - 1) + 1)
+    sink = open_sink(output) if output else None
+    total = 0
+    try:
+        for code in codes:
+            with metrics.span('scenarios.evaluate', source=code) as span:
+                columns = engine.evaluate(code, starts, horizons, amounts)
+                span['rows'] = len(columns['start'])
+            total += len(columns['start'])
+            if sink is not None:
+                with metrics.span('scenarios.write', source=code):
+                    sink.write(code, engine.month_keys(columns['start']), engine.month_keys(columns['end']), columns)
+            print(f"   {code}: {len(columns['start'])} сценариев")
+    finally:
+        if sink is not None:
+            sink.close()
+    return total
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('data', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('--output', help='файл результатов: .csv или .parquet')
+    arg_parser.add_argument('--codes', help='коды инструментов через запятую; по умолчанию все, кроме инфляции')
+    arg_parser.add_argument('--horizons', default='1-360', help='горизонты в месяцах: 1-360 или 12,36,60')
+    arg_parser.add_argument('--amounts', default='100000', help='суммы вложений через запятую')
+    arg_parser.add_argument('--start-from', help='первый месяц начала YYYY-MM')
+    arg_parser.add_argument('--start-to', help='последний месяц начала YYYY-MM')
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+
+    start = time.perf_counter()
+    engine = ScenarioEngine.from_file(args.data)
+    prepared = time.perf_counter() - start
+    codes = args.codes.split(',') if args.codes else [code for code in engine.instruments if code != INFLATION_CODE]
+    unknown = [code for code in codes if code not in engine.instruments]
+    if unknown:
+        arg_parser.error(f"неизвестные коды: {', '.join(unknown)}")
+
+    print(f"🧮 Сценарии: {len(codes)} инструментов, загрузка и матрицы {prepared * 1000:.0f} мс")
+    total = run_scenarios(engine, codes, parse_horizons(args.horizons),
+                          [float(amount) for amount in args.amounts.split(',')],
+                          args.start_from, args.start_to, args.output)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {total} сценариев за {elapsed:.2f} с ({total / elapsed:,.0f} в секунду)")
+    if args.output:
+        print(f"💾 {args.output}: {os.path.getsize(args.output)} байт")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
-import { getDataPath } from '../utils/paths';
+import { getAssetPath, getDataPath } from '../utils/paths';
+import type { ComputedProfitability } from '../utils/profitabilityCompute';
+import {
+  buildDataIndex,
+  queryProfitabilityData,
+  rangeQueryKey,
+  resolveInstrumentCodes,
+  ResponseCache,
+  type DataIndex
+} from '../utils/profitabilityIndex';
 
 // Типы для данных
 export interface DataItem {
@@ -55,61 +64,121 @@ const loadData = async (): Promise<ApiData> => {
   }
 };
 
-// Функция поиска инструмента по коду
-const findToolByCode = (data: ApiData, code: string): Tool | null => {
-  for (const tool of data.tools) {
-    if (tool.code === code) {
-      return tool;
-    }
-    // Поиск во вложенных элементах
-    if (tool.items && tool.items.length > 0 && 'code' in tool.items[0]) {
-      for (const item of tool.items as Tool[]) {
-        if (item.code === code) {
-          return item;
-        }
-        // Еще один уровень вложенности для депозитов
-        if (item.items && item.items.length > 0 && 'code' in item.items[0]) {
-          for (const subItem of item.items as Tool[]) {
-            if (subItem.code === code) {
-              return subItem;
-            }
+// Индекс рядов по коду инструмента и кэш ответов
+let cachedIndex: DataIndex | null = null;
+const responseCache = new ResponseCache<ProfitabilityDataResponse>();
+
+const loadIndex = async (): Promise<DataIndex> => {
+  if (!cachedIndex) {
+    cachedIndex = buildDataIndex((await loadData()).tools);
+  }
+  return cachedIndex;
+};
+
+// Шарды static_bundles.py: ряд -> файлы по десятилетиям с диапазоном дат
+interface ShardInfo {
+  decade: number;
+  path: string;
+  min_date: string; // YYYY-MM-DD
+  max_date: string; // YYYY-MM-DD
+  count: number;
+  bytes: number;
+  sha256: string;
+  items?: DataItem[]; // последний шард ряда, встроенный в манифест
+}
+
+interface BundleManifest {
+  version: number;
+  series: Record<string, { min_date: string; max_date: string; count: number; shards: ShardInfo[] }>;
+}
+
+// null - манифеста нет (старый экспорт), читаем файл целиком
+let manifestPromise: Promise<BundleManifest | null> | null = null;
+
+const loadManifest = (): Promise<BundleManifest | null> => {
+  if (!manifestPromise) {
+    manifestPromise = fetch(getDataPath('/data/shards/manifest.json'))
+      .then(response => (response.ok ? response.json() : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+};
+
+// Манифест запрашиваем при загрузке модуля: к первому запросу диапазона
+// остается загрузить только шарды
+if (typeof window !== 'undefined') {
+  loadManifest();
+}
+
+// Шарды, пересекающиеся с диапазоном (как plan_fetch в static_bundles.py)
+export const planShardFetch = (
+  manifest: BundleManifest,
+  codes: string[],
+  startDate: string,
+  endDate: string
+): ShardInfo[] =>
+  codes.flatMap(code =>
+    (manifest.series[code]?.shards ?? []).filter(
+      shard => shard.max_date >= startDate && shard.min_date <= endDate
+    )
+  );
+
+// Загруженные шарды по коду ряда и индекс только по ним
+const shardRequests = new Map<string, Promise<DataItem[]>>();
+const loadedShards = new Map<string, Map<number, DataItem[]>>();
+const shardIndex: DataIndex = new Map();
+
+const loadShard = (code: string, shard: ShardInfo): Promise<DataItem[]> => {
+  let request = shardRequests.get(shard.path);
+  if (!request) {
+    const inline = shard.items;
+    const itemsRequest: Promise<DataItem[]> = inline
+      ? Promise.resolve(inline)
+      : fetch(getDataPath(`/data/shards/${shard.path}`)).then(async response => {
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
           }
-        }
+          return (await response.json()).items;
+        });
+    request = itemsRequest.then(items => {
+      if (!loadedShards.has(code)) {
+        loadedShards.set(code, new Map());
       }
-    }
+      loadedShards.get(code)!.set(shard.decade, items);
+      // Ряд собирается заново из всех загруженных десятилетий
+      const decades = Array.from(loadedShards.get(code)!.entries()).sort((a, b) => a[0] - b[0]);
+      const rebuilt = buildDataIndex([{ code, items: decades.flatMap(([, decadeItems]) => decadeItems) }]);
+      shardIndex.set(code, rebuilt.get(code)!);
+      return items;
+    });
+    // Неудачный запрос не кэшируем: следующий вызов попробует снова
+    request.catch(() => shardRequests.delete(shard.path));
+    shardRequests.set(shard.path, request);
   }
-  return null;
+  return request;
 };
 
-// Функция фильтрации данных по датам
-const filterDataByDates = (items: DataItem[], startDate: string, endDate: string): DataItem[] => {
-  const start = new Date(startDate);
-  const end = new Date(endDate);
-  
-  console.log('🗓️ Filtering data by dates:', { startDate, endDate, totalItems: items.length });
-  console.log('🗓️ Start/End objects:', { start: start.toISOString(), end: end.toISOString() });
-  
-  const filtered = items.filter((item, index) => {
-    const itemDate = new Date(item.date.split('.').reverse().join('-')); // DD.MM.YYYY -> YYYY-MM-DD
-    const included = itemDate >= start && itemDate <= end;
-    
-    // Логируем первые и последние 5 записей для отладки
-    if (index < 5 || index >= items.length - 5) {
-      console.log(`🗓️ ${item.date} -> ${itemDate.toISOString().split('T')[0]}: ${included ? 'INCLUDED' : 'EXCLUDED'}`);
-    }
-    
-    return included;
-  });
-  
-  console.log('🗓️ Filtered result:', { 
-    filteredItems: filtered.length,
-    firstDate: filtered[0]?.date,
-    lastDate: filtered[filtered.length - 1]?.date,
-    firstFewDates: filtered.slice(0, 3).map(d => d.date),
-    lastFewDates: filtered.slice(-3).map(d => d.date)
+// Шарды годятся, если каждый ряд в них доходит до месяца конца диапазона;
+// иначе (шарды старее файла данных) читаем весь файл
+const manifestCovers = (manifest: BundleManifest, codes: string[], endDate: string): boolean =>
+  codes.every(code => {
+    const series = manifest.series[code];
+    return series !== undefined && series.max_date.slice(0, 7) >= endDate.slice(0, 7);
   });
-  
-  return filtered;
+
+// Индекс, в котором есть все точки диапазона: шарды или весь файл
+const loadRangeIndex = async (query: ProfitabilityDataRequest): Promise<DataIndex> => {
+  const manifest = await loadManifest();
+  const codes = Object.values(resolveInstrumentCodes(query));
+  if (!manifest || !manifestCovers(manifest, codes, query.endDate)) {
+    return loadIndex();
+  }
+  await Promise.all(
+    codes.flatMap(code =>
+      planShardFetch(manifest, [code], query.startDate, query.endDate).map(shard => loadShard(code, shard))
+    )
+  );
+  return shardIndex;
 };
 
 // Функция для получения данных (замена API роута)
@@ -123,68 +192,20 @@ export const fetchProfitabilityData = async (
       throw new Error('Missing required parameters');
     }
 
-    const data = await loadData();
-    const result: Record<string, DataItem[]> = {};
-
-    // Получаем данные по инфляции
-    if (instruments.includes('inflation')) {
-      const inflationTool = findToolByCode(data, 'inflation');
-      if (inflationTool && inflationTool.items && 'date' in inflationTool.items[0]) {
-        result.inflation = filterDataByDates(inflationTool.items as DataItem[], startDate, endDate);
-      }
+    const query = { startDate, endDate, instruments, depositTerm, bondType };
+    const cacheKey = rangeQueryKey(query);
+    const cached = responseCache.get(cacheKey);
+    if (cached) {
+      return cached;
     }
 
-    // Получаем данные по депозитам
-    if (instruments.includes('deposits')) {
-      let depositCode = 'deposit_ruble_1'; // по умолчанию
-      
-      switch (depositTerm) {
-        case 'less_than_1_year':
-          depositCode = 'deposit_ruble_1';
-          break;
-        case '1_to_3_years':
-          depositCode = 'deposit_ruble_1_3';
-          break;
-        case 'more_than_3_years':
-          depositCode = 'deposit_ruble_3';
-          break;
-      }
-
-      const depositTool = findToolByCode(data, depositCode);
-      if (depositTool && depositTool.items && 'date' in depositTool.items[0]) {
-        result.deposits = filterDataByDates(depositTool.items as DataItem[], startDate, endDate);
-      }
-    }
-
-    // Получаем данные по облигациям
-    if (instruments.includes('bonds')) {
-      let bondCode = 'bonds_ofz'; // по умолчанию
-      
-      switch (bondType) {
-        case 'ofz':
-          bondCode = 'bonds_ofz';
-          break;
-        case 'corporate':
-          bondCode = 'bonds_corporate';
-          break;
-        case 'municipal':
-          bondCode = 'bonds_ofz'; // пока используем ОФЗ
-          break;
-      }
-
-      const bondTool = findToolByCode(data, bondCode);
-      if (bondTool && bondTool.items && 'date' in bondTool.items[0]) {
-        result.bonds = filterDataByDates(bondTool.items as DataItem[], startDate, endDate);
-      }
-    }
-
-    // Получаем данные по акциям
-    if (instruments.includes('stocks')) {
-      const stockTool = findToolByCode(data, 'stock');
-      if (stockTool && stockTool.items && 'date' in stockTool.items[0]) {
-        result.stocks = filterDataByDates(stockTool.items as DataItem[], startDate, endDate);
-      }
-    }
+    const result = queryProfitabilityData(await loadRangeIndex(query), query);
+    console.log('🗓️ Range query:', {
+      startDate,
+      endDate,
+      sizes: Object.fromEntries(Object.entries(result).map(([key, items]) => [key, items.length]))
+    });
+    responseCache.set(cacheKey, result);
 
     return result as ProfitabilityDataResponse;
   } catch (error) {
@@ -193,6 +214,28 @@ export const fetchProfitabilityData = async (
   }
 };
 
+// Расчет на сервере (/api/profitability-compute): итоги и ряды графика вместо
+// исходных точек. GET, чтобы браузер сам повторял запрос с If-None-Match
+export const fetchComputedProfitability = async (
+  request: ProfitabilityDataRequest & { amount: number; inflation: boolean }
+): Promise<ComputedProfitability> => {
+  const params = new URLSearchParams({
+    startDate: request.startDate,
+    endDate: request.endDate,
+    instruments: request.instruments.join(','),
+    amount: String(request.amount),
+    inflation: request.inflation ? '1' : '0',
+  });
+  if (request.depositTerm) params.set('depositTerm', request.depositTerm);
+  if (request.bondType) params.set('bondType', request.bondType);
+
+  const response = await fetch(getAssetPath(`/api/profitability-compute?${params}`));
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return response.json();
+};
+
 // Функция конвертации даты из Date в строку YYYY-MM-DD
 export const formatDateForApi = (date: Date): string => {
   // Используем местное время вместо UTC, чтобы избежать сдвига дат из-за часовых поясов
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Статические наборы данных для экспортированного сайта (next export)
+
+Вместо одного all_data_final.json клиент получает:
+- manifest.json - дерево инструментов и для каждого ряда список шардов
+  с мин./макс. датой, числом точек, размером и SHA-256;
+- <код>/<десятилетие>.<хэш>.json - точки ряда за десятилетие в прежнем
+  формате items [{date, value}].
+
+Хэш содержимого в имени шарда позволяет отдавать шарды с долгим
+кэшированием: изменившийся шард получает новое имя, неизменные остаются
+в кэше браузера. Клиенту для диапазона и набора инструментов нужен
+манифест и только пересекающиеся с диапазоном шарды (plan_fetch).
+Последний шард ряда, если он не больше INLINE_SHARD_BYTES, дублируется
+в манифесте (items): диапазон по умолчанию (последний год) строится
+одним запросом манифеста, как и при загрузке всего файла.
+
+Манифест зависит только от содержимого шардов и без изменений в данных
+не перезаписывается. Шарды - производные файлы этапа bundles в
+pipeline.py и в репозиторий не входят; пока их нет, клиент читает файл
+данных целиком.
+
+Запуск: python static_bundles.py [data/all_data_final.json] [--output public/data/shards]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+from columnar_data import iter_series_nodes
+from return_tables import series_kind
+
+MANIFEST_NAME = 'manifest.json'
+BUNDLE_DIR = 'public/data/shards'
+MANIFEST_VERSION = 1
+# Последний шард ряда такого размера (месячные точки за 2020-е) встраивается в манифест
+INLINE_SHARD_BYTES = 4096
+
+
+def date_key(date_str):
+    """'DD.MM.YYYY' -> 'YYYY-MM-DD' (сравнивается как строка)"""
+    return f"{date_str[6:10]}-{date_str[3:5]}-{date_str[0:2]}"
+
+
+def split_by_decade(items):
+    """items ряда -> {десятилетие: items} в исходном порядке"""
+    shards = {}
+    for item in items:
+        decade = int(item['date'][6:10]) // 10 * 10
+        shards.setdefault(decade, []).append(item)
+    return shards
+
+
+def tree_skeleton(tools):
+    """Дерево инструментов без точек: name, code, sort и вложенные узлы"""
+    skeleton = []
+    for tool in tools:
+        node = {key: value for key, value in tool.items() if key != 'items'}
+        items = tool.get('items') or []
+        if items and 'code' in items[0]:
+            node['children'] = tree_skeleton(items)
+        skeleton.append(node)
+    return skeleton
+
+
+def _encode(payload):
+    # Без отступов: шарды и манифест читает только клиент
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_bundles(main_data, output_dir=BUNDLE_DIR):
+    """Запись шардов и манифеста. Возвращает манифест.
+
+    Шарды и манифест с тем же содержимым не перезаписываются, устаревшие
+    файлы удаляются после записи нового манифеста.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'tools': tree_skeleton(main_data['tools']),
+        'series': {},
+    }
+    keep = {MANIFEST_NAME}
+    written = 0
+
+    for node in iter_series_nodes(main_data['tools']):
+        code = node.get('code')
+        items = node['items']
+        if not code or not items or code in manifest['series']:
+            continue
+        os.makedirs(os.path.join(output_dir, code), exist_ok=True)
+        shards = []
+        for decade, shard_items in sorted(split_by_decade(items).items()):
+            data = _encode({'code': code, 'decade': decade, 'items': shard_items})
+            digest = hashlib.sha256(data).hexdigest()
+            path = f"{code}/{decade}.{digest[:12]}.json"
+            full_path = os.path.join(output_dir, path)
+            if not os.path.exists(full_path):
+                _write_atomic(full_path, data)
+                written += 1
+            keep.add(path)
+            dates = [date_key(item['date']) for item in shard_items]
+            shards.append({
+                'decade': decade,
+                'path': path,
+                'min_date': min(dates),
+                'max_date': max(dates),
+                'count': len(shard_items),
+                'bytes': len(data),
+                'sha256': digest,
+            })
+        if shards[-1]['bytes'] <= INLINE_SHARD_BYTES:
+            shards[-1]['items'] = shard_items
+        manifest['series'][code] = {
+            'kind': series_kind(code),
+            'min_date': shards[0]['min_date'],
+            'max_date': shards[-1]['max_date'],
+            'count': len(items),
+            'shards': shards,
+        }
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    data = _encode(manifest)
+    if not os.path.exists(manifest_path) or _read(manifest_path) != data:
+        _write_atomic(manifest_path, data)
+    removed = _remove_stale(output_dir, keep)
+    print(f"✅ Шарды: {sum(len(s['shards']) for s in manifest['series'].values())} "
+          f"(записано {written}, удалено устаревших {removed}), манифест {output_dir}/{MANIFEST_NAME}")
+    return manifest
+
+
+def _remove_stale(output_dir, keep):
+    removed = 0
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, '/')
+            if path not in keep:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return removed
+
+
+def plan_fetch(manifest, codes, start_date, end_date):
+    """Шарды, нужные для диапазона 'YYYY-MM-DD'..'YYYY-MM-DD' и кодов.
+
+    Та же логика, что у клиента (services/profitabilityDataService.ts).
+    """
+    plan = []
+    for code in codes:
+        series = manifest['series'].get(code)
+        if series is None:
+            continue
+        plan.extend(shard for shard in series['shards']
+                    if shard['max_date'] >= start_date and shard['min_date'] <= end_date)
+    return plan
+
+
+def verify_bundles(output_dir=BUNDLE_DIR):
+    """Проверка размеров и контрольных сумм шардов. Возвращает список ошибок"""
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    errors = []
+    for code, series in manifest['series'].items():
+        for shard in series['shards']:
+            path = os.path.join(output_dir, shard['path'])
+            if not os.path.exists(path):
+                errors.append(f"{code}: нет файла {shard['path']}")
+                continue
+            data = _read(path)
+            if len(data) != shard['bytes'] or hashlib.sha256(data).hexdigest() != shard['sha256']:
+                errors.append(f"{code}: контрольная сумма {shard['path']} не совпадает")
+    return errors
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('data', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('--output', default=BUNDLE_DIR, help='каталог шардов')
+    arg_parser.add_argument('--verify', action='store_true', help='только проверить контрольные суммы')
+    args = arg_parser.parse_args()
+
+    if args.verify:
+        errors = verify_bundles(args.output)
+        for error in errors:
+            print(f"❌ {error}")
+        if not errors:
+            print(f"✅ Шарды {args.output} совпадают с манифестом")
+        return 1 if errors else 0
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        main_data = json.load(f)
+    manifest = build_bundles(main_data, args.output)
+    total = sum(shard['bytes'] for series in manifest['series'].values() for shard in series['shards'])
+    print(f"📦 {len(manifest['series'])} рядов, {total} байт в шардах (исходный файл {os.path.getsize(args.data)} байт)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,50 +1,92 @@
+import argparse
 import json
-import calendar
+import os
 from datetime import datetime
 
+import numpy as np
+
+from columnar_data import write_columnar
+from daily_series import (DAILY_DEPOSIT_SOURCE, DEPOSIT_BUCKETS, load_daily, load_daily_json, monthly_returns,
+                          write_daily)
+from data_store import MainDataStore
+from metrics import add_arguments as add_metrics_arguments, configure as configure_metrics, metrics
+from return_tables import build_return_tables, save_return_tables
+
 def load_moex_stocks():
     """Загружаем данные из stocks_moex.json"""
     with open('data/stocks_moex.json', 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def load_main_data():
+def load_main_data(store=None):
     """Загружаем главный файл данных"""
-    with open('data/all_data_final.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return (store or MainDataStore()).load()
+
+# Источники месячной доходности: код инструмента -> файл {"YYYY-MM": доходность}
+# (inflation_data.json - месячная инфляция в долях от inflation_parser.py)
+RETURN_SOURCES = {
+    'inflation': 'inflation_data.json',
+    'stock': 'data/stocks_moex.json',
+    'bonds_ofz': 'data/bonds_ofz.json',
+    'bonds_corporate': 'data/bonds_corp.json',
+}
+
+# Ставки по депозитам {"YYYY-MM": {"<1": ..., "1-3": ..., ">3": ...}}
+DEPOSIT_SOURCE = 'data/deposits_real_excel.json'
+
+# Дневной уровень: цены закрытия {"YYYY-MM-DD": цена}; дневные ставки
+# депозитов - DAILY_DEPOSIT_SOURCE из daily_series.py
+DAILY_SOURCES = {
+    'stock': 'data/stocks_moex_daily.json',
+}
+DAILY_OUTPUT = 'data/all_data_daily.bin'
+
+# Производные файлы главного: колоночная копия и таблицы накопленной доходности
+COLUMNAR_OUTPUT = 'data/all_data_final.bin'
+RETURN_TABLES_OUTPUT = 'data/return_tables.json'
+
+def month_end_dates(periods):
+    """['YYYY-MM', ...] -> ['DD.MM.YYYY', ...] последних дней месяцев"""
+    months = np.array(periods, dtype='datetime64[M]')
+    last_days = (months + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')
+    iso = np.datetime_as_string(last_days, unit='D')
+    # YYYY-MM-DD -> DD.MM.YYYY
+    return [f"{d[8:10]}.{d[5:7]}.{d[0:4]}" for d in iso.tolist()]
+
+def convert_returns_to_accumulated_format(returns_data, base_value=100, base_date="31.12.1999"):
+    """Месячная доходность -> накопленный индекс, одним cumprod.
+
+    Индекс равен base_value на base_date; компаундируются только месяцы
+    после месяца базы, более ранние (ИПЦ Росстата идет с 1991) отбрасываются.
+    """
+    _, base_month, base_year = base_date.split('.')
+    sorted_periods = sorted(period for period in returns_data if period > f"{base_year}-{base_month}")
+    # База стоит первой, чтобы порядок умножений совпадал с пошаговым расчетом
+    factors = np.empty(len(sorted_periods) + 1, dtype=np.float64)
+    factors[0] = base_value
+    factors[1:] = [1 + returns_data[period] for period in sorted_periods]
+    values = np.cumprod(factors)[1:]
+
+    result = [{"date": base_date, "value": base_value}]
+    result.extend(
+        {"date": date_str, "value": round(value, 2)}
+        for date_str, value in zip(month_end_dates(sorted_periods), values.tolist())
+    )
+    return result
+
+def convert_rates_to_series(rates_data, bucket):
+    """Ставки депозитов {"YYYY-MM": {срок: ставка}} -> ряд для одного срока"""
+    sorted_periods = sorted(period for period in rates_data if bucket in rates_data[period])
+    return [
+        {"date": date_str, "value": rates_data[period][bucket]}
+        for period, date_str in zip(sorted_periods, month_end_dates(sorted_periods))
+    ]
 
 def convert_moex_to_accumulated_format(moex_data):
     """Преобразуем данные из формата доходности в накопленные значения индекса"""
     print("🔄 Преобразование данных из stocks_moex.json...")
     
     # Начинаем со 100 (базовое значение индекса на 31.12.1999)
-    base_value = 100
-    current_value = base_value
-    
-    # Добавляем стартовую точку
-    result = [{
-        "date": "31.12.1999",
-        "value": base_value
-    }]
-    
-    # Сортируем периоды по датам
-    sorted_periods = sorted(moex_data.keys())
-    
-    for period in sorted_periods:
-        year, month = period.split('-')
-        year, month = int(year), int(month)
-        
-        # Получаем последний день месяца
-        last_day = calendar.monthrange(year, month)[1]
-        date_str = f"{last_day:02d}.{month:02d}.{year}"
-        
-        # Применяем доходность к текущему значению
-        monthly_return = moex_data[period]
-        current_value = current_value * (1 + monthly_return)
-        
-        result.append({
-            "date": date_str,
-            "value": round(current_value, 2)
-        })
+    result = convert_returns_to_accumulated_format(moex_data)
     
     print(f"✅ Преобразовано {len(result)} записей")
     print(f"   Период: {result[0]['date']} - {result[-1]['date']}")
@@ -52,108 +94,242 @@ def convert_moex_to_accumulated_format(moex_data):
     
     return result
 
+def rebase_daily_index(days, closes, base_value=100):
+    """Цены закрытия -> индекс, равный base_value на конец первого месяца,
+    как у месячного ряда, построенного из тех же цен"""
+    months = days.astype('datetime64[D]').astype('datetime64[M]')
+    first_month_end = int(np.searchsorted(months, months[0], side='right')) - 1
+    return closes * (base_value / closes[first_month_end])
+
+def load_daily_updates(path):
+    """Месячный ряд из дневных цен, если месячного файла доходности нет"""
+    days, closes = load_daily_json(path)
+    returns = monthly_returns(days, closes)
+    if not returns:
+        return None
+    base_date = month_end_dates([str(days[0].astype('datetime64[D]').astype('datetime64[M]'))])[0]
+    return convert_returns_to_accumulated_format(returns, base_date=base_date)
+
+def load_daily_series(codes):
+    """Дневные ряды запрошенных инструментов: {код: (дни, значения)}"""
+    series = {}
+    for code, path in DAILY_SOURCES.items():
+        if code in codes and os.path.exists(path):
+            days, closes = load_daily_json(path)
+            if len(days):
+                series[code] = (days, rebase_daily_index(days, closes))
+    if os.path.exists(DAILY_DEPOSIT_SOURCE) and any(code in DEPOSIT_BUCKETS or code == 'deposits' for code in codes):
+        for code, (days, rates) in load_daily(DAILY_DEPOSIT_SOURCE, mmap=False).items():
+            if code in codes or 'deposits' in codes:
+                series[code] = (days, rates)
+    return series
+
+def save_daily_tier(series, path=DAILY_OUTPUT):
+    """Дневной файл: ряды из прошлой версии, которые сейчас не обновлялись, сохраняются"""
+    if os.path.exists(path):
+        previous = load_daily(path, mmap=False)
+        previous.update(series)
+        series = previous
+    return write_daily(series, path, value_dtype=None)
+
+def index_tools_by_code(tools, index=None):
+    """Код инструмента -> узел дерева (на любом уровне вложенности)"""
+    if index is None:
+        index = {}
+    for tool in tools:
+        code = tool.get('code')
+        if code and code not in index:
+            index[code] = tool
+        items = tool.get('items') or []
+        if items and 'code' in items[0]:
+            index_tools_by_code(items, index)
+    return index
+
+def update_main_data_tools(main_data, updates):
+    """Заменяем ряды нескольких инструментов за один проход.
+
+    updates: {код: новые items}. Возвращает список кодов, у которых
+    ряд действительно изменился.
+    """
+    tools_by_code = index_tools_by_code(main_data['tools'])
+    updated = []
+    
+    for code, new_items in updates.items():
+        tool = tools_by_code.get(code)
+        if tool is None:
+            print(f"❌ Не найден инструмент {code} в главном файле")
+            continue
+        old_count = len(tool.get('items', []))
+        if tool.get('items') == new_items:
+            print(f"⏭️ {tool.get('name', code)} ({code}): без изменений")
+            continue
+        tool['items'] = new_items
+        print(f"✅ {tool.get('name', code)} ({code}): было {old_count}, стало {len(new_items)} записей")
+        updated.append(code)
+    
+    return updated
+
 def update_main_data_with_stocks(main_data, new_stocks_data):
     """Обновляем данные по акциям в главном файле"""
     print("🔄 Обновление данных по акциям в главном файле...")
+    return bool(update_main_data_tools(main_data, {'stock': new_stocks_data}))
+
+def load_instrument_updates(codes):
+    """Читаем исходные файлы и строим новые ряды для запрошенных инструментов"""
+    updates = {}
     
-    updated = False
-    
-    for tool in main_data['tools']:
-        if tool.get('name') == 'Акции' and tool.get('code') == 'stock':
-            old_count = len(tool.get('items', []))
-            tool['items'] = new_stocks_data
-            new_count = len(new_stocks_data)
-            
-            print(f"✅ Обновлены данные по акциям:")
-            print(f"   Было записей: {old_count}")
-            print(f"   Стало записей: {new_count}")
-            print(f"   Добавлено: {new_count - old_count} записей")
-            
-            updated = True
-            break
+    for code in codes:
+        if code in RETURN_SOURCES:
+            path = RETURN_SOURCES[code]
+            daily_path = DAILY_SOURCES.get(code)
+            if not os.path.exists(path) and daily_path and os.path.exists(daily_path):
+                # Месячного файла нет: доходности месяцев из дневных цен закрытия
+                daily_items = load_daily_updates(daily_path)
+                if daily_items:
+                    updates[code] = daily_items
+                    print(f"   {daily_path}: {len(daily_items) - 1} месяцев -> {code}")
+                continue
+            if not os.path.exists(path):
+                print(f"⚠️  {path} не найден, {code} пропущен")
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                returns_data = json.load(f)
+            if not returns_data:
+                print(f"⚠️  {path} пуст, {code} пропущен")
+                continue
+            updates[code] = convert_returns_to_accumulated_format(returns_data)
+            print(f"   {path}: {len(updates[code]) - 1} месяцев -> {code}")
     
-    if not updated:
-        print("❌ Не найдена секция с акциями в главном файле")
-        return False
+    deposit_codes = [code for code in codes if code in DEPOSIT_BUCKETS or code == 'deposits']
+    if deposit_codes:
+        if not os.path.exists(DEPOSIT_SOURCE):
+            print(f"⚠️  {DEPOSIT_SOURCE} не найден, депозиты пропущены")
+        else:
+            with open(DEPOSIT_SOURCE, 'r', encoding='utf-8') as f:
+                rates_data = json.load(f)
+            # 'deposits' - вся группа сроков сразу
+            if 'deposits' in deposit_codes:
+                deposit_codes = list(DEPOSIT_BUCKETS)
+            for code in deposit_codes:
+                updates[code] = convert_rates_to_series(rates_data, DEPOSIT_BUCKETS[code])
+                print(f"   {DEPOSIT_SOURCE}: {len(updates[code])} месяцев -> {code}")
     
-    return True
+    return updates
 
-def backup_original_file():
-    """Создаем резервную копию оригинального файла"""
+def backup_original_file(store):
+    """Создаем снимок оригинального файла (reflink/жесткая ссылка, без копирования)"""
     print("💾 Создание резервной копии...")
     
     try:
-        with open('data/all_data_final.json', 'r', encoding='utf-8') as f:
-            original_data = f.read()
-        
-        with open('data/all_data_final_backup.json', 'w', encoding='utf-8') as f:
-            f.write(original_data)
-        
-        print("✅ Резервная копия создана: data/all_data_final_backup.json")
-        return True
+        snapshot = store.snapshot()
+        print(f"✅ Резервная копия создана: {snapshot}")
+        return snapshot
     except Exception as e:
         print(f"❌ Ошибка создания резервной копии: {e}")
-        return False
+        return None
 
-def main():
-    print("🚀 ОБНОВЛЕНИЕ ДАННЫХ ПО АКЦИЯМ\n")
+def main(codes=None):
+    if codes is None:
+        codes = list(RETURN_SOURCES) + ['deposits']
+    print(f"🚀 ОБНОВЛЕНИЕ ДАННЫХ: {', '.join(codes)}\n")
     
-    # Создаем резервную копию
-    if not backup_original_file():
-        print("❌ Не удалось создать резервную копию. Прерываем операцию.")
-        return
+    store = MainDataStore()
+    snapshot = None
+    columnar_tmp = COLUMNAR_OUTPUT + '.new'
     
     try:
         # Загружаем данные
         print("\n📁 Загрузка данных...")
-        moex_data = load_moex_stocks()
-        main_data = load_main_data()
-        
-        print(f"   stocks_moex.json: {len(moex_data)} записей")
+        with metrics.span('assemble.load'):
+            main_data = load_main_data(store)
         print(f"   all_data_final.json: {len(main_data['tools'])} инструментов")
         
-        # Преобразуем данные MOEX в нужный формат
+        # Преобразуем исходные файлы в формат главного файла
         print("\n🔄 Преобразование формата...")
-        new_stocks_data = convert_moex_to_accumulated_format(moex_data)
+        with metrics.span('assemble.convert') as span:
+            updates = load_instrument_updates(codes)
+            span['rows'] = sum(len(items) for items in updates.values())
+        
+        # Дневной уровень пишется отдельно: месячные ряды из него не зависят
+        daily_series = load_daily_series(codes)
+        if daily_series:
+            with metrics.span('assemble.daily') as span:
+                span['bytes'] = save_daily_tier(daily_series)
+                span['rows'] = sum(len(days) for days, _ in daily_series.values())
+            print(f"✅ Дневной файл {DAILY_OUTPUT}: {span['rows']} точек, {span['bytes']} байт")
         
         # Обновляем главный файл
         print("\n📝 Обновление главного файла...")
-        if update_main_data_with_stocks(main_data, new_stocks_data):
+        updated_codes = update_main_data_tools(main_data, updates)
+        if updates and not updated_codes:
+            print("✅ Данные не изменились, файл не перезаписывается")
+            return updated_codes
+        elif updated_codes:
             
-            # Сохраняем обновленный файл
+            # Производные файлы строятся до замены главного: ошибка в рядах
+            # (например, даты не по порядку) не должна оставить испорченный файл
+            with metrics.span('assemble.columnar'):
+                columnar_size = write_columnar(main_data, columnar_tmp)
+            with metrics.span('assemble.return_tables'):
+                return_tables = build_return_tables(main_data)
+            
+            # Создаем резервную копию
+            snapshot = backup_original_file(store)
+            if snapshot is None:
+                print("❌ Не удалось создать резервную копию. Прерываем операцию.")
+                return None
+            
+            # Сохраняем обновленный файл: атомарно, заново кодируются только измененные ряды
             print("\n💾 Сохранение обновленного файла...")
-            with open('data/all_data_final.json', 'w', encoding='utf-8') as f:
-                json.dump(main_data, f, ensure_ascii=False, indent=2)
+            with metrics.span('assemble.save') as span:
+                reused, encoded = store.save(main_data, updated_codes)
+                span['bytes'] = os.path.getsize(store.path)
             
             print("✅ Файл all_data_final.json успешно обновлен!")
+            print(f"   Рядов сериализовано: {encoded}, скопировано без изменений: {reused}")
+            
+            # Колоночная копия для быстрого чтения
+            os.replace(columnar_tmp, COLUMNAR_OUTPUT)
+            print(f"✅ Колоночный файл {COLUMNAR_OUTPUT}: {columnar_size} байт")
+            
+            # Таблицы накопленной доходности для O(1) расчетов
+            save_return_tables(return_tables, RETURN_TABLES_OUTPUT)
+            print(f"✅ Таблицы доходности: {RETURN_TABLES_OUTPUT}")
             
             # Показываем статистику
             print("\n📊 СТАТИСТИКА ОБНОВЛЕНИЯ:")
+            current_date = datetime(2025, 5, 31)
             
-            # Найдем обновленные данные для статистики
-            for tool in main_data['tools']:
-                if tool.get('name') == 'Акции':
-                    updated_stocks = tool['items']
-                    print(f"   Новый период данных: {updated_stocks[0]['date']} - {updated_stocks[-1]['date']}")
-                    print(f"   Всего записей: {len(updated_stocks)}")
-                    
-                    # Проверяем актуальность
-                    last_date = datetime.strptime(updated_stocks[-1]['date'], '%d.%m.%Y')
-                    current_date = datetime(2025, 5, 31)
-                    
-                    if last_date >= current_date:
-                        print("   ✅ Данные актуальны до мая 2025!")
-                    else:
-                        months_behind = (current_date.year - last_date.year) * 12 + (current_date.month - last_date.month)
-                        print(f"   ⚠️  Отстают на {months_behind} месяцев")
-                    break
+            for code in updated_codes:
+                items = updates[code]
+                print(f"   {code}: {items[0]['date']} - {items[-1]['date']}, {len(items)} записей")
+                
+                # Проверяем актуальность
+                last_date = datetime.strptime(items[-1]['date'], '%d.%m.%Y')
+                if last_date < current_date:
+                    months_behind = (current_date.year - last_date.year) * 12 + (current_date.month - last_date.month)
+                    print(f"   ⚠️  Отстают на {months_behind} месяцев")
             
+            return updated_codes
         else:
             print("❌ Не удалось обновить данные")
             
     except Exception as e:
         print(f"❌ Ошибка при обновлении: {e}")
-        print("💡 Восстановите из резервной копии: data/all_data_final_backup.json")
+        if snapshot:
+            print(f"💡 Восстановите из резервной копии: {snapshot}")
+    finally:
+        # Колоночный файл не дошел до замены - главный файл не обновлялся
+        if os.path.exists(columnar_tmp):
+            os.remove(columnar_tmp)
+    
+    return None
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description='Обновление рядов в data/all_data_final.json')
+    arg_parser.add_argument('codes', nargs='*',
+                            help=f"коды инструментов ({', '.join(list(RETURN_SOURCES) + list(DEPOSIT_BUCKETS))}, deposits); по умолчанию все")
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    configure_metrics(args.metrics, args.profile)
+    main(args.codes or None)
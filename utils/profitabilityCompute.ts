@@ -0,0 +1,141 @@
+// Расчет доходности по индексированным рядам: итоги по инструментам и ряды
+// графика в колоночном виде. Формулы те же, что в calculateDepositProfitability,
+// calculateBondProfitability/calculateStockProfitability и в построении графика
+// useProfitabilityCalculator, но накопленная инфляция берется по индексу
+// месяца за O(1) вместо сортировки на каждый месяц.
+
+import {
+  queryProfitabilityData,
+  type DataIndex,
+  type RangeQuery,
+  type SeriesItem
+} from './profitabilityIndex';
+
+export interface ComputeQuery extends RangeQuery {
+  amount: number;
+  inflation: boolean; // учитывать инфляцию (реальная доходность и пунктирные линии)
+}
+
+export interface ComputedResult {
+  instrument: string;
+  finalAmount: number;
+  profit: number;
+  profitPercentage: number;
+  inflationAdjustedProfit?: number;
+}
+
+// Ряды графика: общая ось месяцев и по массиву значений на линию
+// (null - у инструмента нет точки за этот месяц)
+export interface ComputedChart {
+  months: string[]; // "YYYY-MM"
+  series: Record<string, (number | null)[]>;
+}
+
+export interface ComputedProfitability {
+  results: ComputedResult[];
+  chart: ComputedChart;
+}
+
+// Ключ ответа -> подпись инструмента на графике, в порядке карточек
+const INSTRUMENT_LABELS: [string, string][] = [
+  ['deposits', 'Депозит'],
+  ['bonds', 'Облигации'],
+  ['stocks', 'Акции'],
+];
+
+// Точность значений графика в процентах: на экране 2 знака
+const CHART_DIGITS = 1e3;
+
+const itemMonth = (date: string): string => `${date.slice(6, 10)}-${date.slice(3, 5)}`;
+
+// Ряды из индекса уже отсортированы по дате
+const computeSeries = (
+  key: string,
+  amount: number,
+  items: SeriesItem[]
+): { finalAmount: number; months: string[]; cumulative: number[] } | null => {
+  if (key === 'deposits') {
+    if (items.length === 0) return null;
+    let cumulativeAmount = amount;
+    const cumulative = items.map(item => {
+      cumulativeAmount = cumulativeAmount * (1 + item.value / 100 / 12);
+      return ((cumulativeAmount - amount) / amount) * 100;
+    });
+    return { finalAmount: cumulativeAmount, months: items.map(item => itemMonth(item.date)), cumulative };
+  }
+
+  if (items.length < 2) return null;
+  const startValue = items[0].value;
+  const cumulative = items.map(item => ((amount * (item.value / startValue) - amount) / amount) * 100);
+  const finalAmount = amount * (items[items.length - 1].value / startValue);
+  return { finalAmount, months: items.map(item => itemMonth(item.date)), cumulative };
+};
+
+const round = (value: number): number => Math.round(value * CHART_DIGITS) / CHART_DIGITS;
+
+export const computeProfitability = (index: DataIndex, query: ComputeQuery): ComputedProfitability => {
+  const instruments = query.inflation ? [...query.instruments, 'inflation'] : query.instruments;
+  const data = queryProfitabilityData(index, { ...query, instruments });
+  const inflation = query.inflation ? data.inflation : undefined;
+
+  const results: ComputedResult[] = [];
+  const computed: { label: string; months: string[]; cumulative: number[] }[] = [];
+
+  for (const [key, label] of INSTRUMENT_LABELS) {
+    const items = data[key];
+    if (!query.instruments.includes(key) || !items) continue;
+    const series = computeSeries(key, query.amount, items);
+    // Как на клиенте: без точек инструмент дает нулевой результат без графика
+    const finalAmount = series ? series.finalAmount : query.amount;
+    const profit = finalAmount - query.amount;
+    const profitPercentage = (profit / query.amount) * 100;
+
+    let inflationAdjustedProfit: number | undefined;
+    if (inflation) {
+      inflationAdjustedProfit = inflation.length > 0
+        ? ((1 + profitPercentage / 100) / (inflation[inflation.length - 1].value / inflation[0].value) - 1) * 100
+        : profitPercentage;
+    }
+
+    results.push({ instrument: label, finalAmount, profit, profitPercentage, inflationAdjustedProfit });
+    computed.push({ label, months: series ? series.months : [], cumulative: series ? series.cumulative : [] });
+  }
+
+  // Ось месяцев - по первому инструменту, остальные сопоставляются по месяцу
+  const months = computed.length > 0 ? computed[0].months : [];
+  const series: Record<string, (number | null)[]> = {};
+  for (const { label, months: ownMonths, cumulative } of computed) {
+    const byMonth = new Map<string, number>();
+    ownMonths.forEach((month, i) => {
+      // Как find на клиенте: при повторе месяца берется первая точка
+      if (!byMonth.has(month)) byMonth.set(month, cumulative[i]);
+    });
+    const values = months.map(month => (byMonth.has(month) ? byMonth.get(month)! : null));
+    series[label] = values.map(value => (value === null ? null : round(value)));
+
+    if (inflation && inflation.length > 0) {
+      // Накопленная инфляция к i-му месяцу оси: индекс i-й точки к первой
+      const base = inflation[0].value;
+      series[`${label}_inflation`] = values.map((value, i) => {
+        if (value === null) return null;
+        const multiplier = inflation[Math.min(i, inflation.length - 1)].value / base;
+        return round(((1 + value / 100) / multiplier - 1) * 100);
+      });
+    }
+  }
+
+  return { results, chart: { months, series } };
+};
+
+// Колоночный график -> строки для ProfitabilityChart
+export const chartToRows = (chart: ComputedChart): { month: string; [name: string]: string | number }[] =>
+  chart.months.map((month, i) => {
+    const row: { month: string; [name: string]: string | number } = { month };
+    for (const [name, values] of Object.entries(chart.series)) {
+      const value = values[i];
+      if (value !== null && value !== undefined) {
+        row[name] = value;
+      }
+    }
+    return row;
+  });
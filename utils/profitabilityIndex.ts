@@ -0,0 +1,196 @@
+// Индекс рядов доходности: строится один раз после загрузки данных,
+// дальше запрос диапазона - два бинарных поиска и slice без разбора дат
+
+export interface SeriesItem {
+  date: string; // DD.MM.YYYY
+  value: number;
+}
+
+interface ToolNode {
+  code: string;
+  items: SeriesItem[] | ToolNode[];
+}
+
+export interface IndexedSeries {
+  times: Float64Array; // UTC-метки дат в мс, по возрастанию
+  items: SeriesItem[];
+}
+
+export type DataIndex = Map<string, IndexedSeries>;
+
+export interface RangeQuery {
+  startDate: string; // YYYY-MM-DD
+  endDate: string;   // YYYY-MM-DD
+  instruments: string[];
+  depositTerm?: string;
+  bondType?: string;
+}
+
+// DD.MM.YYYY -> та же метка, что и new Date('YYYY-MM-DD')
+export const itemDateToTime = (date: string): number => {
+  const [day, month, year] = date.split('.');
+  return Date.UTC(parseInt(year), parseInt(month) - 1, parseInt(day));
+};
+
+const isSeries = (items: SeriesItem[] | ToolNode[]): items is SeriesItem[] =>
+  items.length > 0 && 'date' in items[0];
+
+// Обход дерева в том же порядке, что и прежний findToolByCode:
+// при повторе кода побеждает первый найденный инструмент
+export const buildDataIndex = (tools: ToolNode[]): DataIndex => {
+  const index: DataIndex = new Map();
+
+  const visit = (nodes: ToolNode[]) => {
+    for (const node of nodes) {
+      if (!node.items || node.items.length === 0) continue;
+      if (isSeries(node.items)) {
+        if (index.has(node.code)) continue;
+        const entries = node.items
+          .map(item => ({ item, time: itemDateToTime(item.date) }))
+          .sort((a, b) => a.time - b.time);
+        index.set(node.code, {
+          times: Float64Array.from(entries, e => e.time),
+          items: entries.map(e => e.item),
+        });
+      } else {
+        visit(node.items);
+      }
+    }
+  };
+
+  visit(tools);
+  return index;
+};
+
+// Первый индекс с times[i] >= target (или > target при strict)
+const bisect = (times: Float64Array, target: number, strict: boolean): number => {
+  let lo = 0;
+  let hi = times.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (times[mid] < target || (strict && times[mid] === target)) {
+      lo = mid + 1;
+    } else {
+      hi = mid;
+    }
+  }
+  return lo;
+};
+
+// Элементы ряда с датой в [startDate, endDate] включительно
+export const queryRange = (
+  index: DataIndex,
+  code: string,
+  startDate: string,
+  endDate: string
+): SeriesItem[] | undefined => {
+  const series = index.get(code);
+  if (!series) return undefined;
+
+  const start = new Date(startDate).getTime();
+  const end = new Date(endDate).getTime();
+  if (isNaN(start) || isNaN(end)) return [];
+
+  return series.items.slice(bisect(series.times, start, false), bisect(series.times, end, true));
+};
+
+// Ключ ответа -> код инструмента в данных
+export const resolveInstrumentCodes = (query: RangeQuery): Record<string, string> => {
+  const codes: Record<string, string> = {};
+
+  if (query.instruments.includes('inflation')) {
+    codes.inflation = 'inflation';
+  }
+
+  if (query.instruments.includes('deposits')) {
+    let depositCode = 'deposit_ruble_1'; // по умолчанию
+    switch (query.depositTerm) {
+      case 'less_than_1_year':
+        depositCode = 'deposit_ruble_1';
+        break;
+      case '1_to_3_years':
+        depositCode = 'deposit_ruble_1_3';
+        break;
+      case 'more_than_3_years':
+        depositCode = 'deposit_ruble_3';
+        break;
+    }
+    codes.deposits = depositCode;
+  }
+
+  if (query.instruments.includes('bonds')) {
+    let bondCode = 'bonds_ofz'; // по умолчанию
+    switch (query.bondType) {
+      case 'ofz':
+        bondCode = 'bonds_ofz';
+        break;
+      case 'corporate':
+        bondCode = 'bonds_corporate';
+        break;
+      case 'municipal':
+        bondCode = 'bonds_ofz'; // пока используем ОФЗ
+        break;
+    }
+    codes.bonds = bondCode;
+  }
+
+  if (query.instruments.includes('stocks')) {
+    codes.stocks = 'stock';
+  }
+
+  return codes;
+};
+
+// Ключ кэша: одинаковые запросы с разным порядком инструментов совпадают
+export const rangeQueryKey = (query: RangeQuery): string => {
+  const codes = resolveInstrumentCodes(query);
+  const parts = Object.keys(codes).sort().map(key => `${key}=${codes[key]}`);
+  return `${query.startDate}|${query.endDate}|${parts.join(',')}`;
+};
+
+// Ответ по всем запрошенным инструментам
+export const queryProfitabilityData = (
+  index: DataIndex,
+  query: RangeQuery
+): Record<string, SeriesItem[]> => {
+  const result: Record<string, SeriesItem[]> = {};
+  const codes = resolveInstrumentCodes(query);
+
+  for (const key of Object.keys(codes)) {
+    const items = queryRange(index, codes[key], query.startDate, query.endDate);
+    if (items) {
+      result[key] = items;
+    }
+  }
+
+  return result;
+};
+
+// Небольшой LRU-кэш ответов для частых комбинаций (диапазон, инструменты)
+export class ResponseCache<V> {
+  private entries = new Map<string, V>();
+
+  constructor(private maxEntries: number = 256) {}
+
+  get(key: string): V | undefined {
+    const value = this.entries.get(key);
+    if (value !== undefined) {
+      // Переносим в конец как недавно использованный
+      this.entries.delete(key);
+      this.entries.set(key, value);
+    }
+    return value;
+  }
+
+  set(key: string, value: V): void {
+    this.entries.delete(key);
+    this.entries.set(key, value);
+    if (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+}
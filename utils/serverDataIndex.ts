@@ -0,0 +1,37 @@
+// Загрузка data/all_data_final.json для API роутов (только сервер):
+// файл читается и индексируется один раз на процесс, версия данных -
+// хэш содержимого, из нее и параметров запроса строятся ETag ответов
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+import { buildDataIndex, type DataIndex } from './profitabilityIndex';
+
+interface ServerData {
+  index: DataIndex;
+  version: string;
+}
+
+let cachedData: ServerData | null = null;
+
+export const loadServerData = (): ServerData => {
+  if (!cachedData) {
+    const filePath = path.join(process.cwd(), 'data', 'all_data_final.json');
+    const fileContent = fs.readFileSync(filePath, 'utf-8');
+    cachedData = {
+      index: buildDataIndex(JSON.parse(fileContent).tools),
+      version: crypto.createHash('sha1').update(fileContent).digest('hex').slice(0, 16),
+    };
+  }
+  return cachedData;
+};
+
+// Слабый ETag: одинаковые данные и одинаковый ключ запроса дают один ответ
+export const makeEtag = (version: string, key: string): string =>
+  `W/"${crypto.createHash('sha1').update(`${version}|${key}`).digest('hex').slice(0, 20)}"`;
+
+// Совпадает ли If-None-Match с ETag (поддерживает список и *)
+export const etagMatches = (header: string | string[] | undefined, etag: string): boolean => {
+  if (!header) return false;
+  const values = (Array.isArray(header) ? header.join(',') : header).split(',').map(value => value.trim());
+  return values.includes('*') || values.includes(etag) || values.includes(etag.replace(/^W\//, ''));
+};
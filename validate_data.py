@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка покрытия и согласованности рядов all_data_final.json
+
+Все ряды дерева склеиваются в общие массивы (номер ряда, месяц, день,
+значение), и каждая проверка - одна векторная операция по всем рядам
+сразу:
+
+- duplicate        - два значения за один месяц               (ошибка)
+- non_monotonic    - дата меньше предыдущей                    (ошибка)
+- gap              - пропущенные месяцы внутри ряда            (ошибка)
+- invalid_value    - NaN/inf, индекс <= 0                      (ошибка)
+- end_misaligned   - ряд заканчивается раньше остальных        (ошибка)
+- duplicate_code   - код инструмента встречается дважды        (ошибка)
+- jump             - неправдоподобный скачок за месяц          (предупреждение)
+- not_month_end    - дата не последний день месяца             (предупреждение)
+
+Отчет - JSON (--output или --json), код выхода 1 при проблемах уровня
+--fail-on (по умолчанию error).
+
+Запуск: python validate_data.py [data/all_data_final.json] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from operator import itemgetter
+
+import numpy as np
+
+from columnar_data import iter_series_nodes
+from return_tables import month_key, series_kind
+
+SEVERITY = {
+    'duplicate': 'error',
+    'non_monotonic': 'error',
+    'gap': 'error',
+    'invalid_value': 'error',
+    'end_misaligned': 'error',
+    'duplicate_code': 'error',
+    'jump': 'warning',
+    'not_month_end': 'warning',
+}
+SEVERITY_ORDER = {'warning': 0, 'error': 1}
+
+# Относительный скачок индекса и абсолютный скачок ставки (п.п.) за месяц
+MAX_INDEX_JUMP = 0.5
+MAX_RATE_JUMP = 10.0
+
+_get_date = itemgetter('date')
+_get_value = itemgetter('value')
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _parse_dates(dates):
+    """['DD.MM.YYYY', ...] -> (месяц, день) без цикла по строкам"""
+    joined = ''.join(dates).encode('ascii')
+    if len(joined) == 10 * len(dates):
+        raw = np.frombuffer(joined, dtype=np.uint8).reshape(-1, 10).astype(np.int64) - 48
+        digits = raw[:, [0, 1, 3, 4, 6, 7, 8, 9]]
+        # '.' - 48 == -2: проверяем разделители и цифры, иначе разбираем по одной
+        if (raw[:, 2] == -2).all() and (raw[:, 5] == -2).all() and ((digits >= 0) & (digits <= 9)).all():
+            day = raw[:, 0] * 10 + raw[:, 1]
+            month = raw[:, 3] * 10 + raw[:, 4]
+            year = raw[:, 6] * 1000 + raw[:, 7] * 100 + raw[:, 8] * 10 + raw[:, 9]
+            return year * 12 + month - 1, day
+    # Нестандартная ширина (например, '1.1.2000')
+    parts = np.array([[int(p) for p in date.split('.')] for date in dates], dtype=np.int64).reshape(-1, 3)
+    return parts[:, 2] * 12 + parts[:, 1] - 1, parts[:, 0]
+
+
+def _month_end_day(ordinals):
+    year, month = np.divmod(ordinals, 12)
+    days = _DAYS_IN_MONTH[month]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return days + ((month == 1) & leap)
+
+
+def flatten_series(main_data):
+    """Все ряды в общих массивах: коды, границы рядов и столбцы точек"""
+    codes = []
+    dates = []
+    values = []
+    lengths = []
+    duplicate_codes = []
+    seen = set()
+    for node in iter_series_nodes(main_data['tools']):
+        code = node.get('code')
+        if code in seen:
+            duplicate_codes.append(code)
+        seen.add(code)
+        items = node['items']
+        codes.append(code)
+        lengths.append(len(items))
+        dates.extend(map(_get_date, items))
+        values.extend(map(_get_value, items))
+
+    ordinals, days = _parse_dates(dates) if dates else (np.empty(0, np.int64), np.empty(0, np.int64))
+    return {
+        'codes': codes,
+        'series_id': np.repeat(np.arange(len(codes)), lengths),
+        'starts': np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64) if codes else np.empty(0, np.int64),
+        'lengths': np.array(lengths, dtype=np.int64),
+        'ordinals': ordinals,
+        'days': days,
+        'values': np.array(values, dtype=np.float64),
+        'dates': dates,
+        'duplicate_codes': duplicate_codes,
+    }
+
+
+def validate(main_data, max_index_jump=MAX_INDEX_JUMP, max_rate_jump=MAX_RATE_JUMP):
+    """Список проблем: [{check, severity, code, date, ...}]"""
+    flat = flatten_series(main_data)
+    codes = flat['codes']
+    sid = flat['series_id']
+    ordinals = flat['ordinals']
+    days = flat['days']
+    values = flat['values']
+    dates = flat['dates']
+    issues = []
+
+    def add(check, positions, **columns):
+        for k, pos in enumerate(positions.tolist()):
+            issue = {
+                'check': check,
+                'severity': SEVERITY[check],
+                'code': codes[sid[pos]],
+                'date': dates[pos],
+            }
+            issue.update({name: column[k] for name, column in columns.items()})
+            issues.append(issue)
+
+    for code in flat['duplicate_codes']:
+        issues.append({'check': 'duplicate_code', 'severity': SEVERITY['duplicate_code'], 'code': code})
+
+    if len(values) == 0:
+        return issues, flat
+
+    # Пары соседних точек внутри одного ряда
+    same = sid[1:] == sid[:-1]
+    step = np.diff(ordinals)
+    day_step = np.diff(days)
+    cur = np.nonzero(same)[0] + 1
+
+    pair_step = step[same]
+    add('non_monotonic', cur[(pair_step < 0) | ((pair_step == 0) & (day_step[same] < 0))])
+    add('duplicate', cur[(pair_step == 0) & (day_step[same] >= 0)])
+    gap_mask = pair_step > 1
+    add('gap', cur[gap_mask], missing_months=(pair_step[gap_mask] - 1).tolist(),
+        previous_date=[dates[p - 1] for p in cur[gap_mask].tolist()])
+
+    # Значения: индексы > 0 и конечные, ставки просто конечные
+    is_rate = np.array([series_kind(code or '') == 'rate' for code in codes])
+    point_is_rate = is_rate[sid]
+    invalid = ~np.isfinite(values) | (~point_is_rate & (values <= 0))
+    add('invalid_value', np.nonzero(invalid)[0], value=values[invalid].tolist())
+
+    # Скачки за месяц (только между соседними месяцами)
+    prev = values[:-1][same]
+    curv = values[1:][same]
+    monthly = pair_step == 1
+    rate_pair = point_is_rate[cur]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.abs(curv / prev - 1)
+    absolute = np.abs(curv - prev)
+    jump = monthly & np.where(rate_pair, absolute > max_rate_jump, relative > max_index_jump)
+    jump &= np.isfinite(prev) & np.isfinite(curv)
+    add('jump', cur[jump], previous_value=prev[jump].tolist(), value=curv[jump].tolist())
+
+    # Даты не на конец месяца
+    not_end = days != _month_end_day(ordinals)
+    add('not_month_end', np.nonzero(not_end)[0])
+
+    # Конец ряда против общего последнего месяца
+    last_pos = flat['starts'] + flat['lengths'] - 1
+    nonempty = flat['lengths'] > 0
+    last_ordinals = np.where(nonempty, ordinals[np.maximum(last_pos, 0)], -1)
+    latest = int(last_ordinals[nonempty].max()) if nonempty.any() else 0
+    lag = latest - last_ordinals
+    lagging = nonempty & (lag > 0)
+    add('end_misaligned', last_pos[lagging], months_behind=lag[lagging].tolist(),
+        expected_month=[month_key(latest)] * int(lagging.sum()))
+
+    return issues, flat
+
+
+def build_report(path, main_data, elapsed_load, **limits):
+    start = time.perf_counter()
+    issues, flat = validate(main_data, **limits)
+    elapsed_check = time.perf_counter() - start
+
+    summary = {}
+    for issue in issues:
+        summary[issue['check']] = summary.get(issue['check'], 0) + 1
+    return {
+        'file': path,
+        'instruments': len(flat['codes']),
+        'points': int(len(flat['values'])),
+        'latest_month': month_key(int(flat['ordinals'].max())) if len(flat['ordinals']) else None,
+        'errors': sum(1 for issue in issues if issue['severity'] == 'error'),
+        'warnings': sum(1 for issue in issues if issue['severity'] == 'warning'),
+        'summary': summary,
+        'load_ms': round(elapsed_load * 1000, 3),
+        'check_ms': round(elapsed_check * 1000, 3),
+        'issues': issues,
+    }
+
+
+def exit_code(report, fail_on='error'):
+    threshold = SEVERITY_ORDER[fail_on]
+    return 1 if any(SEVERITY_ORDER[issue['severity']] >= threshold for issue in report['issues']) else 0
+
+
+def run_validation(path='data/all_data_final.json', output=None, fail_on='error', **limits):
+    """Проверка файла с записью отчета; возвращает код выхода"""
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        main_data = json.load(f)
+    report = build_report(path, main_data, time.perf_counter() - start, **limits)
+
+    if output:
+        tmp_path = output + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, output)
+
+    print(f"🔍 {path}: {report['instruments']} инструментов, {report['points']} точек, "
+          f"проверка {report['check_ms']:.1f} мс")
+    if not report['issues']:
+        print("✅ Проблем не найдено")
+    for issue in report['issues'][:50]:
+        mark = '❌' if issue['severity'] == 'error' else '⚠️ '
+        details = ', '.join(f"{key}={value}" for key, value in issue.items()
+                            if key not in ('check', 'severity', 'code'))
+        print(f"{mark} {issue['check']}: {issue['code']} {details}")
+    if len(report['issues']) > 50:
+        print(f"   ... и еще {len(report['issues']) - 50}")
+    if report['issues']:
+        print(f"📊 Ошибок: {report['errors']}, предупреждений: {report['warnings']}")
+    return exit_code(report, fail_on)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('data', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('--output', help='записать отчет JSON в файл')
+    arg_parser.add_argument('--json', action='store_true', help='вывести только отчет JSON в stdout')
+    arg_parser.add_argument('--fail-on', choices=sorted(SEVERITY_ORDER), default='error',
+                            help='минимальный уровень проблем для кода выхода 1')
+    arg_parser.add_argument('--max-index-jump', type=float, default=MAX_INDEX_JUMP,
+                            help='допустимое относительное изменение индекса за месяц')
+    arg_parser.add_argument('--max-rate-jump', type=float, default=MAX_RATE_JUMP,
+                            help='допустимое изменение ставки за месяц, п.п.')
+    args = arg_parser.parse_args()
+
+    limits = {'max_index_jump': args.max_index_jump, 'max_rate_jump': args.max_rate_jump}
+    if args.json:
+        start = time.perf_counter()
+        with open(args.data, 'r', encoding='utf-8') as f:
+            main_data = json.load(f)
+        report = build_report(args.data, main_data, time.perf_counter() - start, **limits)
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+        return exit_code(report, args.fail_on)
+
+    return run_validation(args.data, args.output, args.fail_on, **limits)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
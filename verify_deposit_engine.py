@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка пакетного расчета вкладов (deposit_engine.py) по эталону
+калькулятора
+
+Эталон benchmarks/golden/deposits.json строит benchmarks/golden_deposits.mjs,
+выполняя сам hooks/useDepositCalculator.ts. Для каждого вклада сверяются
+итоги (total, profit, effective_rate, total_interest) из quote_batch и
+график построчно: матрицы schedule_batch и построчный iter_schedule.
+При изменении хука эталон нужно перестроить.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from deposit_engine import iter_schedule, quote_batch, schedule_batch
+
+GOLDEN_FILE = 'benchmarks/golden/deposits.json'
+
+
+def close(a, b, tolerance):
+    return math.isclose(a, b, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def verify(cases, tolerance=1e-12):
+    """Возвращает список расхождений (пустой - расчет совпадает с эталоном)"""
+    amounts = np.array([case['amount'] for case in cases], dtype=np.float64)
+    rates = np.array([case['rate'] for case in cases])
+    months = np.array([case['months'] for case in cases])
+    periods = [case['capitalization'] for case in cases]
+    start_dates = [case['start_date'] for case in cases]
+
+    quotes = quote_batch(amounts, rates, months, periods)
+    schedules = schedule_batch(amounts, rates, months, periods, start_dates)
+    iso_dates = np.datetime_as_string(schedules['dates'], unit='D')
+
+    errors = []
+    for i, case in enumerate(cases):
+        label = (case['amount'], case['rate'], case['months'], case['capitalization'], case['start_date'])
+        for name in ('total', 'profit', 'effective_rate', 'total_interest'):
+            if not close(float(quotes[name][i]), case[name], tolerance):
+                errors.append((label, name, case[name], float(quotes[name][i])))
+
+        # Начальная строка в матрицы не входит
+        expected = case['schedule'][1:]
+        rows = int(schedules['valid'][i].sum())
+        if rows != len(expected):
+            errors.append((label, 'rows', len(expected), rows))
+            continue
+        for row, (date, interest, balance, capitalization) in enumerate(expected):
+            iso = iso_dates[i, row]
+            actual = (f"{iso[8:10]}.{iso[5:7]}.{iso[0:4]}", float(schedules['interest'][i, row]),
+                      float(schedules['balance'][i, row]), int(schedules['is_capitalization'][i, row]))
+            if (actual[0] != date or not close(actual[1], interest, tolerance)
+                    or not close(actual[2], balance, tolerance) or actual[3] != capitalization):
+                errors.append((label, f'schedule[{row + 1}]', (date, interest, balance, capitalization), actual))
+                break
+
+        lazy = [[item['date'], item['interest'], item['balance'], int(item['isCapitalization'])]
+                for item in iter_schedule(case['amount'], case['rate'], case['months'], case['capitalization'],
+                                          case['start_date'])]
+        if len(lazy) != len(case['schedule']) or any(
+            a[0] != e[0] or a[3] != e[3] or not close(a[1], e[1], tolerance) or not close(a[2], e[2], tolerance)
+            for a, e in zip(lazy, case['schedule'])
+        ):
+            errors.append((label, 'iter_schedule', len(case['schedule']), len(lazy)))
+
+    return errors
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('golden', nargs='?', default=GOLDEN_FILE)
+    arg_parser.add_argument('--tolerance', type=float, default=1e-12, help='относительная погрешность')
+    args = arg_parser.parse_args()
+
+    with open(args.golden, 'r', encoding='utf-8') as f:
+        cases = json.load(f)['cases']
+
+    errors = verify(cases, args.tolerance)
+    if errors:
+        print(f"❌ Найдено расхождений: {len(errors)}")
+        for error in errors[:20]:
+            print(f"   {error}")
+        return 1
+
+    rows = sum(len(case['schedule']) for case in cases)
+    print(f"✅ Расчет совпадает с калькулятором: {len(cases)} вкладов, {rows} строк графиков")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
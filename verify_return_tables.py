@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка таблиц доходности (return_tables.py) прямым пересчетом
+
+Для случайных диапазонов месяцев каждый инструмент пересчитывается так
+же, как это делает фронтенд: точки ряда фильтруются по диапазону,
+депозиты капитализируются помесячно, индексы берутся как отношение
+последней точки к первой, инфляция - отношение индексов за тот же
+период. Результат сравнивается с O(1) ответом из таблиц.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+
+from columnar_data import date_to_month_ordinal, iter_series_nodes
+from return_tables import (INFLATION_CODE, build_return_tables, chart_series, load_return_tables,
+                           month_key, nominal_return, real_return, series_kind)
+
+
+def brute_force_growth(points, kind, start, end):
+    """Множитель за [start, end] по исходным точкам (порядковые номера месяцев)"""
+    selected = [value for ordinal, value in points if start <= ordinal <= end]
+    if not selected:
+        return None
+    if kind == 'rate':
+        amount = 1.0
+        for value in selected:
+            amount *= 1 + value / 100 / 12
+        return amount
+    return selected[-1] / selected[0]
+
+
+def brute_force_chart(points, kind, start, end):
+    selected = [(ordinal, value) for ordinal, value in points if start <= ordinal <= end]
+    result = []
+    amount = 1.0
+    for ordinal, value in selected:
+        if kind == 'rate':
+            amount *= 1 + value / 100 / 12
+        else:
+            amount = value / selected[0][1]
+        result.append((month_key(ordinal), (amount - 1) * 100))
+    return result
+
+
+def close(a, b, tolerance):
+    if a is None or b is None:
+        return a is None and b is None
+    return math.isclose(a, b, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def verify(main_data, tables, samples=5000, seed=0, tolerance=1e-9):
+    """Возвращает список расхождений (пустой - таблицы верны)"""
+    rng = random.Random(seed)
+    series = {}
+    for node in iter_series_nodes(main_data['tools']):
+        if node['code'] not in series:
+            points = sorted((date_to_month_ordinal(item['date'])[0], item['value']) for item in node['items'])
+            series[node['code']] = points
+
+    first = min(points[0][0] for points in series.values())
+    last = max(points[-1][0] for points in series.values())
+
+    # Все короткие диапазоны (до года) и случайные длинные
+    ranges = [(s, s + length) for s in range(first, last + 1) for length in range(12) if s + length <= last]
+    for _ in range(samples):
+        a, b = rng.randint(first, last), rng.randint(first, last)
+        ranges.append((min(a, b), max(a, b)))
+
+    errors = []
+    inflation = series.get(INFLATION_CODE)
+    for code, points in series.items():
+        kind = series_kind(code)
+        for start, end in ranges:
+            start_key, end_key = month_key(start), month_key(end)
+            expected = brute_force_growth(points, kind, start, end)
+            actual = nominal_return(tables, code, start_key, end_key)
+            if not close(None if expected is None else expected - 1, actual, tolerance):
+                errors.append((code, start_key, end_key, 'nominal', expected, actual))
+                continue
+
+            if inflation is not None and expected is not None:
+                inflation_growth = brute_force_growth(inflation, 'index', start, end)
+                expected_real = expected / inflation_growth - 1 if inflation_growth else expected - 1
+                actual_real = real_return(tables, code, start_key, end_key)
+                if not close(expected_real, actual_real, tolerance):
+                    errors.append((code, start_key, end_key, 'real', expected_real, actual_real))
+
+        for start, end in ranges[::50]:
+            expected_chart = brute_force_chart(points, kind, start, end)
+            actual_chart = chart_series(tables, code, month_key(start), month_key(end))
+            if len(expected_chart) != len(actual_chart) or any(
+                em != am or not close(ev, av, tolerance)
+                for (em, ev), (am, av) in zip(expected_chart, actual_chart)
+            ):
+                errors.append((code, month_key(start), month_key(end), 'chart', len(expected_chart), len(actual_chart)))
+
+    return errors, len(ranges)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('data', nargs='?', default='data/all_data_final.json')
+    arg_parser.add_argument('tables', nargs='?', help='готовые таблицы; по умолчанию строятся заново')
+    arg_parser.add_argument('--samples', type=int, default=5000, help='число случайных диапазонов')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        main_data = json.load(f)
+    tables = load_return_tables(args.tables) if args.tables else build_return_tables(main_data)
+
+    errors, checked = verify(main_data, tables, args.samples, args.seed)
+    if errors:
+        print(f"❌ Найдено расхождений: {len(errors)}")
+        for error in errors[:20]:
+            print(f"   {error}")
+        return 1
+
+    print(f"✅ Таблицы совпадают с прямым пересчетом: {len(tables['instruments'])} инструментов, "
+          f"{checked} диапазонов")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())